@@ -0,0 +1,64 @@
+import argparse
+import json
+import sys
+from pathlib import Path
+
+from benchmarks.cases import CASES
+from benchmarks.harness import (
+    DEFAULT_SIZES,
+    DEFAULT_TOLERANCE,
+    compare_results,
+    format_comparison,
+    read_results,
+    run_benchmarks,
+    write_results,
+)
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="Ledger hot-path benchmarks.")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run = commands.add_parser("run", help="run the benchmarks and write JSON results")
+    run.add_argument("--sizes", type=int, nargs="+", default=list(DEFAULT_SIZES), help="ledger sizes to test")
+    run.add_argument("--case", dest="cases", action="append", choices=sorted(CASES), help="run only this case (repeatable)")
+    run.add_argument("--repeat", type=int, default=3, help="timed runs per case and size (default: %(default)s)")
+    run.add_argument("--seed", type=int, default=0, help="seed for the synthetic ledger")
+    run.add_argument("--output", type=Path, help="write results here instead of stdout")
+    run.add_argument("--baseline", type=Path, help="compare against this results file afterwards")
+    run.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (default: %(default)s)")
+
+    compare = commands.add_parser("compare", help="compare two results files")
+    compare.add_argument("baseline", type=Path)
+    compare.add_argument("current", type=Path)
+    compare.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed slowdown (default: %(default)s)")
+    return parser
+
+
+def _log(line: str) -> None:
+    print(line, file=sys.stderr)
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+
+    if args.command == "run":
+        results = run_benchmarks(args.sizes, cases=args.cases, repeat=args.repeat, seed=args.seed, log=_log)
+        if args.output is not None:
+            write_results(args.output, results)
+        else:
+            print(json.dumps(results, indent=2))
+        if args.baseline is None:
+            return 0
+        baseline = read_results(args.baseline)
+    else:
+        baseline = read_results(args.baseline)
+        results = read_results(args.current)
+
+    rows = compare_results(baseline, results, tolerance=args.tolerance)
+    _log(format_comparison(rows))
+    return 1 if any(row["regressed"] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
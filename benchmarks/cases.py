@@ -0,0 +1,362 @@
+import random
+import tkinter as tk
+from dataclasses import dataclass, field
+from datetime import timedelta
+from pathlib import Path
+from tkinter import ttk
+from typing import Any, Callable
+
+from benchmarks.fake_tk import FakeScrollbar, FakeTreeview
+from benchmarks.synthetic import generate_raw_rows, generate_transactions
+from budget_app.controllers.budget_controller import BudgetController
+from budget_app.models.forecast import CashFlowForecast
+from budget_app.models.ledger import Ledger
+from budget_app.models.recurring import FREQUENCIES, RecurringRule
+from budget_app.models.reports import ReportCube
+from budget_app.models.search import parse_query
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+from budget_app.storage.exporter import export_csv
+from budget_app.storage.partitions import PartitionedRepository
+from budget_app.storage.repository import TransactionRepository
+from budget_app.utils.validators import FORM_VALIDATOR
+from budget_app.views.virtual_tree import VirtualTreeview
+
+MUTATIONS = 1000
+FORECAST_DAYS = 5 * 365
+SCROLL_STEPS = 200
+SEARCHES = ("shop", "or", "card min:100", "debit from:2023-01-01 to:2023-06-30", "max:5", "zzz")
+
+
+@dataclass
+class Context:
+    # Everything the cases for one ledger size share.  Inputs are generated
+    # once per size and reused by every repeat.
+    size: int
+    workdir: Path
+    seed: int = 0
+    cache: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def transactions(self) -> list[Transaction]:
+        if "transactions" not in self.cache:
+            self.cache["transactions"] = generate_transactions(self.size, seed=self.seed)
+        return self.cache["transactions"]
+
+    @property
+    def raw_rows(self) -> list[tuple[str, str, str, str, str]]:
+        if "raw_rows" not in self.cache:
+            self.cache["raw_rows"] = generate_raw_rows(self.size, seed=self.seed)
+        return self.cache["raw_rows"]
+
+    @property
+    def recurring_rules(self) -> list[RecurringRule]:
+        # One rule per 20 ledger rows, mostly monthly, as budgets tend to be.
+        if "recurring_rules" not in self.cache:
+            rng = random.Random(self.seed)
+            first = min(tx.date for tx in self.transactions)
+            self.cache["recurring_rules"] = [
+                RecurringRule(
+                    category=tx.category,
+                    amount=tx.amount,
+                    start=first + timedelta(days=rng.randrange(365)),
+                    frequency=rng.choice(FREQUENCIES + ("month", "month")),
+                    interval=rng.randrange(1, 4),
+                )
+                for tx in self.transactions[: max(1, self.size // 20)]
+            ]
+        return self.cache["recurring_rules"]
+
+    def ledger_file(self) -> Path:
+        path = self.workdir / "transactions.json"
+        if not path.exists():
+            TransactionRepository(path).save(self.transactions)
+        return path
+
+    def binary_ledger_file(self) -> Path:
+        path = self.workdir / "transactions.ledger"
+        if not path.exists():
+            TransactionRepository(path).save(self.transactions)
+        return path
+
+    def partitioned_root(self) -> Path:
+        root = self.workdir / "partitioned"
+        if not root.exists():
+            PartitionedRepository(root).add_many(self.transactions)
+        return root
+
+    def close(self) -> None:
+        root = self.cache.pop("tk_root", None)
+        if root is not None:
+            root.destroy()
+
+
+# A case's setup runs untimed before every repeat and returns the timed
+# callable, which returns the number of operations it performed.
+Setup = Callable[[Context], Callable[[], int]]
+
+
+@dataclass(frozen=True)
+class Case:
+    name: str
+    setup: Setup
+    unit: str = "rows"
+
+
+CASES: dict[str, Case] = {}
+
+
+def case(name: str, *, unit: str = "rows") -> Callable[[Setup], Setup]:
+    def register(setup: Setup) -> Setup:
+        CASES[name] = Case(name, setup, unit)
+        return setup
+    return register
+
+
+@case("repository.load")
+def _repository_load(context: Context) -> Callable[[], int]:
+    repository = TransactionRepository(context.ledger_file())
+    return lambda: len(repository.load())
+
+
+@case("repository.load_binary")
+def _repository_load_binary(context: Context) -> Callable[[], int]:
+    repository = TransactionRepository(context.binary_ledger_file())
+    return lambda: len(repository.load())
+
+
+@case("repository.totals_binary", unit="queries")
+def _repository_totals_binary(context: Context) -> Callable[[], int]:
+    # One year-long range per month of the synthetic ledger's span, answered
+    # from the mapped file.
+    repository = TransactionRepository(context.binary_ledger_file())
+    dates = sorted(tx.date for tx in context.transactions)
+    starts = [dates[len(dates) * step // 12] for step in range(12)]
+
+    def run() -> int:
+        for start in starts:
+            repository.totals(start=start, end=start.replace(year=start.year + 1) - timedelta(days=1))
+        return len(starts)
+    return run
+
+
+@case("partitions.totals", unit="queries")
+def _partitions_totals(context: Context) -> Callable[[], int]:
+    # The same year-long ranges as repository.totals_binary, answered from
+    # the manifest's aggregates plus the two edge months of each range.
+    repository = PartitionedRepository(context.partitioned_root())
+    dates = sorted(tx.date for tx in context.transactions)
+    starts = [dates[len(dates) * step // 12] for step in range(12)]
+
+    def run() -> int:
+        for start in starts:
+            repository.totals(start=start, end=start.replace(year=start.year + 1) - timedelta(days=1))
+        return len(starts)
+    return run
+
+
+@case("repository.save")
+def _repository_save(context: Context) -> Callable[[], int]:
+    repository = TransactionRepository(context.workdir / "saved.json")
+    transactions = context.transactions
+
+    def run() -> int:
+        repository.save(transactions)
+        return len(transactions)
+    return run
+
+
+@case("transaction.from_input")
+def _from_input(context: Context) -> Callable[[], int]:
+    rows = context.raw_rows
+
+    def run() -> int:
+        for raw_date, category, memo, amount, kind in rows:
+            Transaction.from_input(
+                raw_date=raw_date,
+                raw_category=category,
+                raw_memo=memo,
+                raw_amount=amount,
+                raw_kind=kind,
+            )
+        return len(rows)
+    return run
+
+
+@case("validators.batch")
+def _validate_batch(context: Context) -> Callable[[], int]:
+    columns = tuple(list(column) for column in zip(*context.raw_rows))
+
+    def run() -> int:
+        return len(FORM_VALIDATOR.validate(*columns).transactions)
+    return run
+
+
+@case("controller.add")
+def _controller_add(context: Context) -> Callable[[], int]:
+    controller = BudgetController()
+    transactions = context.transactions
+
+    def run() -> int:
+        for tx in transactions:
+            controller.add_transaction(tx)
+        return len(transactions)
+    return run
+
+
+@case("controller.update_remove", unit="mutations")
+def _controller_update_remove(context: Context) -> Callable[[], int]:
+    controller = BudgetController()
+    transactions = context.transactions
+    ids = [controller.add_transaction(tx) for tx in transactions]
+    rng = random.Random(context.seed)
+    count = min(MUTATIONS, len(ids))
+    updates = [(tx_id, transactions[rng.randrange(len(transactions))]) for tx_id in rng.sample(ids, count)]
+    removals = rng.sample(ids, count)
+
+    def run() -> int:
+        for tx_id, tx in updates:
+            controller.update_transaction(tx_id, tx)
+        for tx_id in removals:
+            controller.remove_transaction(tx_id)
+        return 2 * count
+    return run
+
+
+@case("summary.compute")
+def _summary_compute(context: Context) -> Callable[[], int]:
+    transactions = context.transactions
+
+    def run() -> int:
+        summary = SummaryAggregates(transactions)
+        return summary.count
+    return run
+
+
+@case("reports.rebuild")
+def _reports_rebuild(context: Context) -> Callable[[], int]:
+    cube = ReportCube()
+    transactions = context.transactions
+
+    def run() -> int:
+        cube.rebuild(transactions)
+        return len(transactions)
+    return run
+
+
+@case("ledger.search", unit="queries")
+def _ledger_search(context: Context) -> Callable[[], int]:
+    # As-you-type lookups against an indexed ledger; building the index is
+    # part of loading and is not timed here.
+    ledger = Ledger(context.transactions, search_index=True)
+    queries = [parse_query(text) for text in SEARCHES]
+
+    def run() -> int:
+        for query in queries:
+            ledger.search(query)
+        return len(queries)
+    return run
+
+
+@case("ledger.sorted_edits", unit="mutations")
+def _ledger_sorted_edits(context: Context) -> Callable[[], int]:
+    # Edits against a ledger whose Treeview is sorted by amount and memo:
+    # each one moves its row within the cached orders by bisect.
+    transactions = context.transactions
+    ledger = Ledger(transactions)
+    ledger.sorted_ids("amount")
+    ledger.sorted_ids("memo")
+    rng = random.Random(context.seed)
+    count = min(MUTATIONS, len(transactions))
+    edits = [transactions[rng.randrange(len(transactions))] for _ in range(count)]
+
+    def run() -> int:
+        for tx in edits:
+            ledger.update(ledger.id_at(rng.randrange(len(ledger))), tx)
+            ledger.remove(ledger.add(tx))
+        return 3 * count
+    return run
+
+
+@case("forecast.build", unit="rules")
+def _forecast_build(context: Context) -> Callable[[], int]:
+    rules = context.recurring_rules
+    start = min(rule.start for rule in rules)
+
+    def run() -> int:
+        CashFlowForecast(rules, start=start, days=FORECAST_DAYS).balance_cents()
+        return len(rules)
+    return run
+
+
+@case("forecast.update", unit="changes")
+def _forecast_update(context: Context) -> Callable[[], int]:
+    # One rule changed and the curve read again, as when editing a rule
+    # with the projection on screen.
+    rules = context.recurring_rules
+    engine = CashFlowForecast(rules, start=min(rule.start for rule in rules), days=FORECAST_DAYS)
+    engine.balance_cents()
+    rng = random.Random(context.seed)
+    count = min(MUTATIONS, len(rules))
+    changes = [(rng.randrange(len(rules)), rules[rng.randrange(len(rules))]) for _ in range(count)]
+
+    def run() -> int:
+        for rule_id, rule in changes:
+            engine.update(rule_id, rule)
+            engine.balance_cents()
+        return count
+    return run
+
+
+@case("export.csv")
+def _export_csv(context: Context) -> Callable[[], int]:
+    path = context.workdir / "export.csv"
+    transactions = context.transactions
+    return lambda: export_csv(transactions, path)
+
+
+@case("treeview.refresh", unit="refreshes")
+def _treeview_refresh(context: Context) -> Callable[[], int]:
+    # A full reset followed by jumps across the whole ledger, on a hidden Tk
+    # root when a display is available and on fake widgets otherwise.
+    ledger = Ledger(context.transactions)
+    tree, scrollbar = _tree_widgets(context)
+
+    def row_values(position: int) -> tuple[str, str, str, str]:
+        tx = ledger.get(ledger.id_at(position))
+        return (tx.date.isoformat(), tx.category, tx.memo, f"${tx.amount:.2f}")
+
+    view = VirtualTreeview(
+        tree,
+        scrollbar,
+        row_count=ledger.__len__,
+        row_key=lambda position: str(ledger.id_at(position)),
+        row_values=row_values,
+    )
+
+    def run() -> int:
+        view.reset()
+        for step in range(SCROLL_STEPS):
+            view._on_scrollbar("moveto", str(step / SCROLL_STEPS))
+        return 1 + SCROLL_STEPS
+    return run
+
+
+def _tree_widgets(context: Context) -> tuple[Any, Any]:
+    root = context.cache.get("tk_root")
+    if root is None and not context.cache.get("tk_unavailable"):
+        try:
+            root = tk.Tk()
+        except tk.TclError:
+            context.cache["tk_unavailable"] = True
+        else:
+            root.withdraw()
+            context.cache["tk_root"] = root
+    if root is None:
+        return FakeTreeview(), FakeScrollbar()
+    tree = ttk.Treeview(root, columns=("date", "category", "memo", "amount"), show="headings")
+    return tree, ttk.Scrollbar(root, orient="vertical")
+
+
+def tk_backend(context: Context) -> str:
+    return "tk" if "tk_root" in context.cache else "fake"
@@ -0,0 +1,59 @@
+# Minimal stand-ins for ttk.Treeview and ttk.Scrollbar, used when no display
+# is available.  They keep just enough state for VirtualTreeview to run.
+
+
+class FakeTreeview:
+    def __init__(self) -> None:
+        self.children: list[str] = []
+        self.items: dict[str, dict] = {}
+        self.selected: list[str] = []
+        self._next = 0
+
+    def configure(self, **_options) -> None:
+        pass
+
+    def bind(self, *_args, **_kwargs) -> None:
+        pass
+
+    def insert(self, _parent, index, **options) -> str:
+        iid = f"I{self._next}"
+        self._next += 1
+        position = len(self.children) if index == "end" else index
+        self.children.insert(position, iid)
+        self.items[iid] = {"text": "", "values": (), "tags": ()}
+        self.items[iid].update(options)
+        return iid
+
+    def item(self, iid, option=None, **options):
+        if option is not None:
+            return self.items[iid][option]
+        self.items[iid].update(options)
+        return None
+
+    def delete(self, *iids) -> None:
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+            if iid in self.selected:
+                self.selected.remove(iid)
+
+    def move(self, iid, _parent, index) -> None:
+        self.children.remove(iid)
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+
+    def selection(self) -> tuple[str, ...]:
+        return tuple(self.selected)
+
+    def selection_set(self, items) -> None:
+        self.selected = list(items)
+
+    def yview_moveto(self, _fraction) -> None:
+        pass
+
+
+class FakeScrollbar:
+    def configure(self, **_options) -> None:
+        pass
+
+    def set(self, first, last) -> None:
+        self.position = (first, last)
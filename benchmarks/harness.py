@@ -0,0 +1,126 @@
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterable
+
+from benchmarks.cases import CASES, Context, tk_backend
+
+DEFAULT_SIZES = (10_000, 100_000, 1_000_000)
+DEFAULT_TOLERANCE = 0.15
+FORMAT_VERSION = 1
+
+
+def run_benchmarks(
+    sizes: Iterable[int] = DEFAULT_SIZES,
+    *,
+    cases: Iterable[str] | None = None,
+    repeat: int = 3,
+    seed: int = 0,
+    log: Callable[[str], None] | None = None,
+) -> dict[str, Any]:
+    # Every case is timed ``repeat`` times per size; ``best`` (the minimum)
+    # is what comparisons use, since it is the least disturbed by noise.
+    names = list(CASES) if cases is None else list(cases)
+    unknown = [name for name in names if name not in CASES]
+    if unknown:
+        raise ValueError(f"Unknown benchmark case(s): {', '.join(unknown)}.")
+
+    results = []
+    backend = None
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmpdir:
+            context = Context(size=size, workdir=Path(tmpdir), seed=seed)
+            try:
+                for name in names:
+                    case = CASES[name]
+                    timings = []
+                    ops = 0
+                    for _ in range(repeat):
+                        timed = case.setup(context)
+                        started = time.perf_counter()
+                        ops = timed()
+                        timings.append(time.perf_counter() - started)
+                    best = min(timings)
+                    results.append({
+                        "case": name,
+                        "size": size,
+                        "unit": case.unit,
+                        "ops": ops,
+                        "best": best,
+                        "median": statistics.median(timings),
+                        "runs": timings,
+                        "per_second": ops / best if best > 0 else None,
+                    })
+                    if log is not None:
+                        log(f"{name:<28} {size:>9,}  best {best * 1000:10.2f} ms  median {statistics.median(timings) * 1000:10.2f} ms")
+                if "treeview.refresh" in names:
+                    backend = tk_backend(context)
+            finally:
+                context.close()
+
+    return {
+        "version": FORMAT_VERSION,
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "implementation": platform.python_implementation(),
+            "platform": platform.platform(),
+            "repeat": repeat,
+            "seed": seed,
+            "treeview_backend": backend,
+        },
+        "results": results,
+    }
+
+
+def compare_results(
+    baseline: dict[str, Any],
+    current: dict[str, Any],
+    *,
+    tolerance: float = DEFAULT_TOLERANCE,
+) -> list[dict[str, Any]]:
+    # Pairs results by (case, size).  A pair regresses when the current best
+    # time is more than ``tolerance`` slower than the baseline's.
+    previous = {(row["case"], row["size"]): row for row in baseline["results"]}
+    rows = []
+    for row in current["results"]:
+        before = previous.get((row["case"], row["size"]))
+        if before is None or before["best"] <= 0:
+            continue
+        ratio = row["best"] / before["best"]
+        rows.append({
+            "case": row["case"],
+            "size": row["size"],
+            "baseline": before["best"],
+            "current": row["best"],
+            "ratio": ratio,
+            "regressed": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+def format_comparison(rows: list[dict[str, Any]]) -> str:
+    lines = [f"{'case':<28} {'size':>9}  {'baseline':>12}  {'current':>12}  {'change':>8}"]
+    for row in rows:
+        flag = "  REGRESSION" if row["regressed"] else ""
+        lines.append(
+            f"{row['case']:<28} {row['size']:>9,}  {row['baseline'] * 1000:10.2f}ms"
+            f"  {row['current'] * 1000:10.2f}ms  {(row['ratio'] - 1) * 100:+7.1f}%{flag}"
+        )
+    return "\n".join(lines)
+
+
+def read_results(path: Path) -> dict[str, Any]:
+    data = json.loads(path.read_text(encoding="utf-8"))
+    if data.get("version") != FORMAT_VERSION:
+        raise ValueError(f"{path} is not a version {FORMAT_VERSION} benchmark result file.")
+    return data
+
+
+def write_results(path: Path, results: dict[str, Any]) -> None:
+    path.write_text(json.dumps(results, indent=2) + "\n", encoding="utf-8")
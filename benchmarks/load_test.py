@@ -0,0 +1,175 @@
+import argparse
+import json
+import logging
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+from benchmarks.synthetic import CATEGORIES, generate_transactions
+from budget_app.storage.journal import JournalRepository
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.load_test",
+        description="Load-test the ledger HTTP API (python -m budget_app.cli serve).",
+    )
+    parser.add_argument("--url", help="base URL of a running server; by default one is started on a synthetic ledger")
+    parser.add_argument("--size", type=int, default=100_000, help="rows in the synthetic ledger (default: %(default)s)")
+    parser.add_argument("--requests", type=int, default=2000, help="total requests (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=8, help="client threads (default: %(default)s)")
+    parser.add_argument(
+        "--revalidate",
+        type=float,
+        default=0.5,
+        help="share of reads sent with the last ETag seen for that URL (default: %(default)s)",
+    )
+    parser.add_argument("--writes", type=float, default=0.01, help="share of requests that POST a transaction (default: %(default)s)")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the request mix")
+    return parser
+
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    if args.url:
+        results = run_load(args.url.rstrip("/"), args)
+    else:
+        with local_server(args.size) as url:
+            results = run_load(url, args)
+    print(format_results(results))
+    return 0 if not results["errors"] else 1
+
+
+@contextmanager
+def local_server(size: int) -> Iterator[str]:
+    # A throwaway server on a temporary synthetic ledger, on a free port.
+    from werkzeug.serving import make_server
+
+    from budget_app.api import LedgerService, create_app
+
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    with tempfile.TemporaryDirectory() as workdir:
+        path = Path(workdir) / "transactions.json"
+        repository = JournalRepository(path)
+        repository.save(generate_transactions(size))
+        repository.close()
+        service = LedgerService.open(path)
+        server = make_server("127.0.0.1", 0, create_app(service), threaded=True)
+        thread = threading.Thread(target=server.serve_forever, name="api-server", daemon=True)
+        thread.start()
+        try:
+            yield f"http://127.0.0.1:{server.server_port}"
+        finally:
+            server.shutdown()
+            thread.join()
+            service.close()
+
+
+def run_load(base_url: str, args: argparse.Namespace) -> dict:
+    rng = random.Random(args.seed)
+    plan = [_pick_request(rng, args.writes) for _ in range(args.requests)]
+    etags: dict[str, str] = {}
+    lock = threading.Lock()
+    latencies: dict[str, list[float]] = {}
+    statuses: Counter[int] = Counter()
+    errors: list[str] = []
+
+    def send(index: int) -> None:
+        method, path, body = plan[index]
+        headers = {"Content-Type": "application/json"} if body is not None else {}
+        with lock:
+            etag = etags.get(path)
+        if method == "GET" and etag is not None and random.Random(index).random() < args.revalidate:
+            headers["If-None-Match"] = etag
+        request = urllib.request.Request(base_url + path, data=body, method=method, headers=headers)
+        began = time.perf_counter()
+        try:
+            with urllib.request.urlopen(request, timeout=30) as response:
+                response.read()
+                status, new_etag = response.status, response.headers.get("ETag")
+        except urllib.error.HTTPError as exc:
+            status, new_etag = exc.code, exc.headers.get("ETag")
+            if status >= 400:
+                errors.append(f"{method} {path}: {status}")
+        except OSError as exc:
+            status, new_etag = 0, None
+            errors.append(f"{method} {path}: {exc}")
+        elapsed = time.perf_counter() - began
+        endpoint = f"{method} {path.split('?')[0]}"
+        with lock:
+            latencies.setdefault(endpoint, []).append(elapsed)
+            statuses[status] += 1
+            if method == "GET" and new_etag:
+                etags[path] = new_etag
+
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        list(pool.map(send, range(len(plan))))
+    elapsed = time.perf_counter() - began
+    return {
+        "requests": len(plan),
+        "seconds": elapsed,
+        "statuses": dict(statuses),
+        "latencies": latencies,
+        "errors": errors,
+    }
+
+
+def format_results(results: dict) -> str:
+    lines = [
+        f"{results['requests']} requests in {results['seconds']:.2f} s "
+        f"({results['requests'] / results['seconds']:.0f} req/s)",
+        "statuses: " + ", ".join(f"{status}={count}" for status, count in sorted(results["statuses"].items())),
+        f"{'endpoint':<28}{'count':>7}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}",
+    ]
+    for endpoint, samples in sorted(results["latencies"].items()):
+        samples = sorted(samples)
+        lines.append(
+            f"{endpoint:<28}{len(samples):>7}"
+            f"{_percentile(samples, 50):>9.2f}{_percentile(samples, 95):>9.2f}{_percentile(samples, 99):>9.2f}"
+        )
+    for error in results["errors"][:10]:
+        lines.append(f"error: {error}")
+    return "\n".join(lines)
+
+
+def _percentile(samples: list[float], percent: int) -> float:
+    if len(samples) < 2:
+        return samples[0] * 1000 if samples else 0.0
+    return statistics.quantiles(samples, n=100, method="inclusive")[percent - 1] * 1000
+
+
+def _pick_request(rng: random.Random, writes: float) -> tuple[str, str, bytes | None]:
+    roll = rng.random()
+    if roll < writes:
+        record = {
+            "date": f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}",
+            "category": rng.choice(CATEGORIES),
+            "memo": "load test",
+            "amount": f"-{rng.randint(100, 20000) / 100:.2f}",
+        }
+        return "POST", "/api/transactions", json.dumps([record]).encode("utf-8")
+    if roll < 0.3:
+        return "GET", "/api/summary", None
+    if roll < 0.5:
+        year = rng.randint(2015, 2024)
+        return "GET", f"/api/categories?from={year}-01-01&to={year}-12-31", None
+    # A few hot pages, as dashboards poll the same views.
+    offset = rng.choice((0, 100, 200, 1000))
+    category = rng.choice(("", *CATEGORIES[:3]))
+    query = f"?offset={offset}&limit=100" + (f"&category={category}" if category else "")
+    return "GET", "/api/transactions" + query, None
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,50 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from budget_app.models.transaction import Transaction
+
+CATEGORIES = (
+    "Groceries", "Rent", "Utilities", "Dining", "Transport", "Insurance",
+    "Health", "Entertainment", "Travel", "Gifts", "Education", "Subscriptions",
+)
+INCOME_CATEGORIES = ("Salary", "Interest", "Refunds")
+MEMOS = ("", "Card payment", "Direct debit", "Online order", "Cash", "Transfer", "Weekly shop")
+
+
+def generate_raw_rows(
+    count: int,
+    *,
+    seed: int = 0,
+    start: date = date(2015, 1, 1),
+    days: int = 3650,
+) -> list[tuple[str, str, str, str, str]]:
+    # (date, category, memo, amount, kind) strings as the form would submit
+    # them; the same seed always produces the same ledger.
+    rng = random.Random(seed)
+    rows = []
+    for _ in range(count):
+        day = start + timedelta(days=rng.randrange(days))
+        if rng.random() < 0.1:
+            category = rng.choice(INCOME_CATEGORIES)
+            kind = "income"
+            cents = rng.randrange(10_000, 500_000)
+        else:
+            category = rng.choice(CATEGORIES)
+            kind = "expense"
+            cents = rng.randrange(100, 50_000)
+        amount = f"{cents // 100}.{cents % 100:02d}"
+        rows.append((day.isoformat(), category, rng.choice(MEMOS), amount, kind))
+    return rows
+
+
+def generate_transactions(count: int, *, seed: int = 0) -> list[Transaction]:
+    return [
+        Transaction(
+            date=date.fromisoformat(raw_date),
+            category=category,
+            memo=memo,
+            amount=Decimal(amount) if kind == "income" else -Decimal(amount),
+        )
+        for raw_date, category, memo, amount, kind in generate_raw_rows(count, seed=seed)
+    ]
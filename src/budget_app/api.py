@@ -0,0 +1,356 @@
+import json
+import secrets
+import threading
+from collections import OrderedDict
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Callable
+
+from budget_app.controllers.budget_controller import BudgetController
+from budget_app.models.summary import Subtotal
+from budget_app.models.transaction import Transaction
+from budget_app.storage.journal import JournalEntry, JournalRepository
+from budget_app.storage.locking import LedgerConflictError
+from budget_app.utils.validators import FORM_VALIDATOR
+
+try:
+    import flask as _flask
+except ImportError:
+    _flask = None
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+MAX_CACHED_RESPONSES = 256
+
+
+class RequestError(ValueError):
+    # A request the client has to fix; ``rows`` points at bad bulk records.
+    def __init__(self, message: str, rows: list[dict[str, Any]] | None = None) -> None:
+        super().__init__(message)
+        self.rows = rows or []
+
+
+class LedgerService:
+    # The ledger behind the HTTP API, independent of Flask.  Every write
+    # bumps ``version`` and empties the response cache, so reads between
+    # writes are served from already-encoded bodies.  One lock serialises
+    # requests: reads of a cached body are cheap and writes must not
+    # interleave with renders.
+    # Changes other processes make to the ledger files are merged by
+    # sync(), which render() and writes call first; it costs a few stat()
+    # calls when nothing changed.  The ETag of every response is the
+    # version behind a random per-service nonce: versions restart at 0 with
+    # each server, so on their own a tag from before a restart could match
+    # a different ledger.
+
+    def __init__(self, repository: JournalRepository, transactions: list[Transaction]) -> None:
+        self._repository = repository
+        self._controller = BudgetController()
+        for tx in transactions:
+            self._controller.add_transaction(tx)
+        self._lock = threading.RLock()
+        self._version = 0
+        self._nonce = secrets.token_hex(8)
+        self._responses: OrderedDict[str, bytes] = OrderedDict()
+
+    @classmethod
+    def open(cls, path: Path) -> "LedgerService":
+        repository = JournalRepository(path)
+        transactions = repository.load()
+        if repository.last_report.error is not None:
+            repository.close()
+            raise OSError(f"Could not read {path}: {repository.last_report.error}")
+        return cls(repository, transactions)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    @property
+    def etag(self) -> str:
+        return f"{self._nonce}-{self._version}"
+
+    def close(self) -> None:
+        with self._lock:
+            self._repository.close()
+
+    def sync(self) -> bool:
+        # True if other processes changed the ledger since the last sync.
+        with self._lock:
+            entries = self._repository.refresh()
+            if entries is None:
+                transactions = self._repository.load()
+                self._controller = BudgetController()
+                for tx in transactions:
+                    self._controller.add_transaction(tx)
+            elif not entries:
+                return False
+            else:
+                for entry in entries:
+                    self._apply_entry(entry)
+            self._version += 1
+            self._responses.clear()
+            return True
+
+    def render(self, key: str, build: Callable[[], Any]) -> tuple[str, bytes]:
+        # (etag, JSON body) for ``key``, building and caching it on a miss.
+        with self._lock:
+            self.sync()
+            body = self._responses.get(key)
+            if body is None:
+                body = json.dumps(build(), separators=(",", ":")).encode("utf-8")
+                self._responses[key] = body
+                if len(self._responses) > MAX_CACHED_RESPONSES:
+                    self._responses.popitem(last=False)
+            else:
+                self._responses.move_to_end(key)
+            return self.etag, body
+
+    def list_transactions(
+        self,
+        *,
+        offset: int = 0,
+        limit: int = DEFAULT_PAGE_SIZE,
+        start: date | None = None,
+        end: date | None = None,
+        category: str | None = None,
+    ) -> dict[str, Any]:
+        _check_page(offset, limit)
+        ledger = self._controller.ledger
+        with self._lock:
+            ids = ledger.query(start=start, end=end, category=category)
+            page = ids[offset:offset + limit]
+            return {
+                "version": self._version,
+                "total": len(ids),
+                "offset": offset,
+                "limit": limit,
+                "items": [_transaction_json(tx_id, ledger.get(tx_id)) for tx_id in page],
+            }
+
+    def summary(self) -> dict[str, Any]:
+        with self._lock:
+            summary = self._controller.summary
+            return {"version": self._version, **_subtotal_json(summary.income, summary.expenses, summary.count)}
+
+    def categories(self, *, start: date | None = None, end: date | None = None) -> dict[str, Any]:
+        with self._lock:
+            if start is None and end is None:
+                rollup = self._controller.summary.by_category
+            elif _whole_months(start, end):
+                # Month-aligned ranges, the usual dashboard case, are rolled
+                # up from the summary's (month, category) cells.
+                first = None if start is None else f"{start.year:04d}-{start.month:02d}"
+                last = None if end is None else f"{end.year:04d}-{end.month:02d}"
+                rollup = {}
+                for (month, category), cell in self._controller.summary.cells.items():
+                    if (first is None or month >= first) and (last is None or month <= last):
+                        subtotal = rollup.get(category)
+                        if subtotal is None:
+                            subtotal = rollup[category] = Subtotal()
+                        subtotal.income += cell.income
+                        subtotal.expenses += cell.expenses
+                        subtotal.count += cell.count
+            else:
+                ledger = self._controller.ledger
+                rollup = {}
+                for tx_id in ledger.query(start=start, end=end):
+                    tx = ledger.get(tx_id)
+                    subtotal = rollup.get(tx.category)
+                    if subtotal is None:
+                        subtotal = rollup[tx.category] = Subtotal()
+                    subtotal.apply(tx.amount, 1)
+            return {
+                "version": self._version,
+                "categories": {
+                    category: _subtotal_json(subtotal.income, subtotal.expenses, subtotal.count)
+                    for category, subtotal in sorted(rollup.items())
+                },
+            }
+
+    def add_many(self, records: Any) -> dict[str, Any]:
+        # All or nothing: every record is validated with the form's rules
+        # before anything is written, and the ledger only changes once the
+        # journal append has reached the disk.
+        if not isinstance(records, list) or not records:
+            raise RequestError("Send a non-empty JSON array of transactions.")
+        errors = []
+        positions = []
+        columns: tuple[list[Any], ...] = ([], [], [], [], [])
+        for index, record in enumerate(records):
+            if not isinstance(record, dict):
+                errors.append({"index": index, "error": "Each transaction must be a JSON object."})
+                continue
+            positions.append(index)
+            for column, value in zip(columns, _raw_fields(record)):
+                column.append(value)
+        checked = FORM_VALIDATOR.validate(*columns)
+        errors.extend({"index": positions[error.row], "error": error.message} for error in checked.errors)
+        transactions = checked.transactions
+        if errors:
+            errors.sort(key=lambda error: error["index"])
+            raise RequestError(f"{len(errors)} transaction(s) are invalid.", errors)
+
+        with self._lock:
+            self.sync()
+            try:
+                self._repository.add_many(transactions)
+            except LedgerConflictError:
+                # Another process wrote since the sync.  Adds do not depend on
+                # row positions, so merge its changes and append once more.
+                self.sync()
+                self._repository.add_many(transactions)
+            ids = [self._controller.add_transaction(tx) for tx in transactions]
+            self._version += 1
+            self._responses.clear()
+            return {"version": self._version, "added": len(ids), "ids": ids}
+
+    def _apply_entry(self, entry: JournalEntry) -> None:
+        ledger = self._controller.ledger
+        if entry.op == "add":
+            self._controller.add_transaction(entry.tx)
+        elif entry.op == "update":
+            self._controller.update_transaction(ledger.id_at(entry.index), entry.tx)
+        else:
+            self._controller.remove_transaction(ledger.id_at(entry.index))
+
+
+def create_app(service: LedgerService) -> Any:
+    if _flask is None:
+        raise RuntimeError("The API server needs Flask (pip install flask).")
+    flask = _flask
+    app = flask.Flask("budget_app")
+
+    def respond(build: Callable[[], Any]) -> Any:
+        # A client holding the current version gets a 304 without the body
+        # being looked up at all.
+        service.sync()
+        if flask.request.if_none_match.contains(service.etag):
+            response = flask.Response(status=304)
+            response.set_etag(service.etag)
+            return response
+        key = flask.request.full_path
+        try:
+            etag, body = service.render(key, build)
+        except RequestError as exc:
+            return _error(flask, 400, exc)
+        response = flask.Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "no-cache"
+        return response
+
+    @app.route("/api/transactions", methods=["GET"])
+    def list_transactions() -> Any:
+        try:
+            args = flask.request.args
+            offset = int(args.get("offset", 0))
+            limit = int(args.get("limit", DEFAULT_PAGE_SIZE))
+            # Checked before respond(), so a bad page is a 400 even when
+            # the client's ETag is current.
+            _check_page(offset, limit)
+            start, end = _date_arg(args, "from"), _date_arg(args, "to")
+        except ValueError as exc:
+            return _error(flask, 400, exc)
+        category = flask.request.args.get("category") or None
+        return respond(
+            lambda: service.list_transactions(offset=offset, limit=limit, start=start, end=end, category=category)
+        )
+
+    @app.route("/api/transactions", methods=["POST"])
+    def add_transactions() -> Any:
+        payload = flask.request.get_json(silent=True)
+        if isinstance(payload, dict):
+            payload = payload.get("transactions")
+        try:
+            result = service.add_many(payload)
+        except RequestError as exc:
+            return _error(flask, 400, exc)
+        except LedgerConflictError as exc:
+            return _error(flask, 409, exc)
+        except (OSError, IndexError) as exc:
+            return _error(flask, 503, exc)
+        response = flask.jsonify(result)
+        response.status_code = 201
+        response.set_etag(service.etag)
+        return response
+
+    @app.route("/api/summary", methods=["GET"])
+    def summary() -> Any:
+        return respond(service.summary)
+
+    @app.route("/api/categories", methods=["GET"])
+    def categories() -> Any:
+        try:
+            start, end = _date_arg(flask.request.args, "from"), _date_arg(flask.request.args, "to")
+        except ValueError as exc:
+            return _error(flask, 400, exc)
+        return respond(lambda: service.categories(start=start, end=end))
+
+    return app
+
+
+def _error(flask: Any, status: int, exc: Exception) -> Any:
+    payload: dict[str, Any] = {"error": str(exc)}
+    if isinstance(exc, RequestError) and exc.rows:
+        payload["rows"] = exc.rows
+    response = flask.jsonify(payload)
+    response.status_code = status
+    return response
+
+
+def _check_page(offset: int, limit: int) -> None:
+    if offset < 0 or not 0 < limit <= MAX_PAGE_SIZE:
+        raise RequestError(f"offset must be >= 0 and limit between 1 and {MAX_PAGE_SIZE}.")
+
+
+def _date_arg(args: Any, name: str) -> date | None:
+    value = args.get(name)
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"{name} must be a date in YYYY-MM-DD format.") from None
+
+
+def _whole_months(start: date | None, end: date | None) -> bool:
+    if start is not None and start.day != 1:
+        return False
+    return end is None or (end + timedelta(days=1)).day == 1
+
+
+def _money(value: Decimal) -> str:
+    return format(value, "f")
+
+
+def _subtotal_json(income: Decimal, expenses: Decimal, count: int) -> dict[str, Any]:
+    return {
+        "count": count,
+        "income": _money(income),
+        "expenses": _money(expenses),
+        "balance": _money(income + expenses),
+    }
+
+
+def _transaction_json(tx_id: int, tx: Transaction) -> dict[str, Any]:
+    return {
+        "id": tx_id,
+        "date": tx.date.isoformat(),
+        "category": tx.category,
+        "memo": tx.memo,
+        "amount": _money(tx.amount),
+    }
+
+
+def _raw_fields(record: dict[str, Any]) -> tuple[str, str, str, str, str | None]:
+    # (date, category, memo, amount, kind) for the validator.  ``kind`` may
+    # be left out when the amount carries its sign.
+    kind = record.get("kind")
+    return (
+        str(record.get("date", "")),
+        str(record.get("category", "")),
+        str(record.get("memo", "")),
+        str(record.get("amount", "")),
+        None if kind is None else str(kind),
+    )
@@ -0,0 +1,272 @@
+import argparse
+import sqlite3
+import sys
+from contextlib import contextmanager
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from typing import Iterator
+
+from budget_app.models.columnar import ColumnarStore
+from budget_app.models.forecast import CashFlowForecast
+from budget_app.models.ledger import Ledger
+from budget_app.models.money import CENT
+from budget_app.models.recurring import FREQUENCIES, RecurringRule
+from budget_app.storage.exporter import export_csv, select_transactions
+from budget_app.storage.binary import BINARY_SUFFIX
+from budget_app.storage.journal import DEFAULT_DATA_PATH, JournalRepository
+from budget_app.storage.partitions import DEFAULT_ACCOUNT, PERIODS, PartitionedRepository, partition_ledger
+from budget_app.storage.recurring import RecurringRepository
+from budget_app.storage.repository import convert_ledger
+from budget_app.storage.sqlite_repository import SQLITE_SUFFIX, SQLiteTransactionRepository
+from budget_app.utils import trace
+from budget_app.utils.validators import FieldError, parse_magnitude
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="budget_app", description="Budget App command line tools.")
+    parser.add_argument("--data", type=Path, default=DEFAULT_DATA_PATH, help="ledger file (default: %(default)s)")
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="PATH",
+        help=f"write timings and counters to PATH: Chrome trace format for *.json, JSON lines otherwise "
+        f"(or set {trace.TRACE_ENV})",
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="export transactions to CSV")
+    export.add_argument("output", type=Path, help="CSV file to write; a .gz suffix compresses it")
+    export.add_argument("--from", dest="start", type=date.fromisoformat, help="first date to include (YYYY-MM-DD)")
+    export.add_argument("--to", dest="end", type=date.fromisoformat, help="last date to include (YYYY-MM-DD)")
+    export.add_argument("--category", help="only export this category")
+    export.add_argument("--gzip", action="store_true", default=None, help="gzip the output whatever its suffix")
+    export.set_defaults(handler=_export)
+
+    convert = commands.add_parser("convert", help="convert a ledger file between JSON and the binary format")
+    convert.add_argument("source", type=Path, help="ledger file to read, JSON or binary")
+    convert.add_argument("output", type=Path, help="ledger file to write")
+    convert.add_argument(
+        "--to",
+        dest="format",
+        choices=("json", "binary"),
+        help=f"output format (default: binary for *{BINARY_SUFFIX} files, JSON otherwise)",
+    )
+    convert.set_defaults(handler=_convert)
+
+    partition = commands.add_parser("partition", help="add a ledger file to a store partitioned by account and period")
+    partition.add_argument("source", type=Path, help="ledger file to read, JSON or binary")
+    partition.add_argument("root", type=Path, help="directory of the partitioned store")
+    partition.add_argument("--account", default=DEFAULT_ACCOUNT, help="account to file the transactions under (default: %(default)s)")
+    partition.add_argument("--by", dest="period", choices=PERIODS, help="partition period for a new store (default: year)")
+    partition.set_defaults(handler=_partition)
+
+    archive = commands.add_parser("archive", help="compress a partitioned store's old periods into read-only archives")
+    archive.add_argument("root", type=Path, help="directory of the partitioned store")
+    archive.add_argument("--before", type=date.fromisoformat, required=True, help="archive periods that end before this date (YYYY-MM-DD)")
+    archive.add_argument("--account", help="only archive this account")
+    archive.set_defaults(handler=_archive)
+
+    recurring = commands.add_parser("recurring", help="list, add or remove recurring transactions")
+    actions = recurring.add_subparsers(dest="action", required=True)
+    actions.add_parser("list", help="list the recurring transactions").set_defaults(handler=_recurring_list)
+    add = actions.add_parser("add", help="add a recurring transaction")
+    add.add_argument("category")
+    add.add_argument("amount", type=_signed_amount, help="signed amount: negative for expenses")
+    add.add_argument("--start", type=date.fromisoformat, required=True, help="first occurrence (YYYY-MM-DD)")
+    add.add_argument("--every", dest="interval", type=int, default=1, help="repeat every N units (default: %(default)s)")
+    add.add_argument("--unit", dest="frequency", choices=FREQUENCIES, default="month", help="(default: %(default)s)")
+    add.add_argument("--until", dest="end", type=date.fromisoformat, help="last possible occurrence (YYYY-MM-DD)")
+    add.add_argument("--memo", default="")
+    add.set_defaults(handler=_recurring_add)
+    remove = actions.add_parser("remove", help="remove a recurring transaction")
+    remove.add_argument("number", type=int, help="its number in `recurring list`")
+    remove.set_defaults(handler=_recurring_remove)
+
+    forecast = commands.add_parser("forecast", help="project the balance from the recurring transactions")
+    forecast.add_argument("--from", dest="start", type=date.fromisoformat, help="first day to project (default: today)")
+    forecast.add_argument("--days", type=int, default=365, help="how many days to project (default: %(default)s)")
+    forecast.set_defaults(handler=_forecast)
+
+    serve = commands.add_parser("serve", help="serve the ledger over a local HTTP API")
+    serve.add_argument("--host", default="127.0.0.1", help="interface to listen on (default: %(default)s)")
+    serve.add_argument("--port", type=int, default=8765, help="port to listen on (default: %(default)s)")
+    serve.set_defaults(handler=_serve)
+    return parser
+
+def _signed_amount(text: str) -> Decimal:
+    # argparse only reports ValueError and TypeError as usage errors, and
+    # Decimal raises InvalidOperation, so parse with the form's rules.
+    try:
+        magnitude = parse_magnitude(text)
+    except FieldError as exc:
+        raise argparse.ArgumentTypeError(str(exc)) from None
+    return -magnitude if text.strip().startswith("-") else magnitude
+
+def main(argv: list[str] | None = None) -> int:
+    args = build_parser().parse_args(argv)
+    tracer = trace.from_environment(path=args.trace)
+    if tracer is None:
+        return args.handler(args)
+    trace.install(tracer)
+    try:
+        with trace.span(f"cli.{args.command}"):
+            return args.handler(args)
+    finally:
+        trace.install(None)
+        tracer.close()
+
+def _load_columns(path: Path) -> ColumnarStore | Ledger:
+    # One-shot commands only filter and sum, so the ledger is read into
+    # columns rather than a Ledger, whose indexes would be built and dropped.
+    # Columns hold whole cents; the form accepts finer amounts, and a ledger
+    # holding one is read into a Ledger instead.
+    repository = JournalRepository(path)
+    transactions = repository.load()
+    repository.close()
+    if repository.last_report.error is not None:
+        raise OSError(f"Could not read {path}: {repository.last_report.error}")
+    try:
+        return ColumnarStore(transactions)
+    except ValueError:
+        return Ledger(transactions)
+
+@contextmanager
+def _query_source(path: Path) -> Iterator[ColumnarStore | Ledger | SQLiteTransactionRepository]:
+    # A SQLite ledger answers filters and sums in SQL without being loaded;
+    # other files are read in whole (see _load_columns).
+    if path.suffix != SQLITE_SUFFIX:
+        yield _load_columns(path)
+        return
+    if not path.exists():
+        raise FileNotFoundError(f"No such ledger: {path}")
+    repository = SQLiteTransactionRepository(path)
+    try:
+        yield repository
+    finally:
+        repository.close()
+
+def _balance_before(source: ColumnarStore | Ledger | SQLiteTransactionRepository, day: date) -> Decimal:
+    if isinstance(source, SQLiteTransactionRepository):
+        return sum(source.totals(end=day))
+    if isinstance(source, ColumnarStore):
+        return sum(source.totals(source.select(end=day)))
+    # The forecast counts whole cents.
+    return sum((source.get(tx_id).amount for tx_id in source.between(end=day)), Decimal(0)).quantize(CENT)
+
+def _export(args: argparse.Namespace) -> int:
+    try:
+        with _query_source(args.data) as source:
+            rows = select_transactions(source, start=args.start, end=args.end, category=args.category)
+            count = export_csv(rows, args.output, compress=args.gzip)
+    except (OSError, sqlite3.Error) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Exported {count} transaction(s) to {args.output}.")
+    return 0
+
+def _convert(args: argparse.Namespace) -> int:
+    binary = args.output.suffix == BINARY_SUFFIX if args.format is None else args.format == "binary"
+    try:
+        count = convert_ledger(args.source, args.output, binary=binary)
+    except (OSError, ValueError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Converted {count} transaction(s) to {args.output}.")
+    return 0
+
+def _partition(args: argparse.Namespace) -> int:
+    try:
+        count = partition_ledger(args.source, args.root, account=args.account, period=args.period)
+    except (OSError, ValueError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Added {count} transaction(s) to {args.root} under {args.account}.")
+    return 0
+
+def _archive(args: argparse.Namespace) -> int:
+    try:
+        archived = PartitionedRepository(args.root).archive(before=args.before, account=args.account)
+    except (OSError, ValueError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Archived {len(archived)} partition(s) in {args.root}.")
+    return 0
+
+def _recurring_list(args: argparse.Namespace) -> int:
+    try:
+        rules = RecurringRepository(args.data).load()
+    except (OSError, ValueError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    for number, rule in enumerate(rules, start=1):
+        every = rule.frequency if rule.interval == 1 else f"{rule.interval} {rule.frequency}s"
+        until = "" if rule.end is None else f" until {rule.end.isoformat()}"
+        print(f"{number}. {rule.category} {rule.amount:.2f} every {every} from {rule.start.isoformat()}{until} {rule.memo}".rstrip())
+    return 0
+
+def _recurring_add(args: argparse.Namespace) -> int:
+    try:
+        rule = RecurringRule(
+            category=args.category,
+            memo=args.memo,
+            amount=args.amount,
+            start=args.start,
+            frequency=args.frequency,
+            interval=args.interval,
+            end=args.end,
+        )
+        number = RecurringRepository(args.data).add(rule) + 1
+    except (OSError, ValueError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Added recurring transaction {number}.")
+    return 0
+
+def _recurring_remove(args: argparse.Namespace) -> int:
+    try:
+        RecurringRepository(args.data).remove(args.number - 1)
+    except (OSError, ValueError, IndexError) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    print(f"Removed recurring transaction {args.number}.")
+    return 0
+
+def _forecast(args: argparse.Namespace) -> int:
+    # Starts from the ledger's balance the day before and adds the recurring
+    # transactions; one-off entries already dated in the future are left out.
+    start = args.start or date.today()
+    try:
+        rules = RecurringRepository(args.data).load()
+        with _query_source(args.data) as source:
+            opening = _balance_before(source, start - timedelta(days=1))
+        forecast = CashFlowForecast(rules, start=start, days=args.days, opening=opening)
+    except (OSError, ValueError, sqlite3.Error) as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    for month, balance in forecast.month_ends().items():
+        print(f"{month}  {balance:>12.2f}")
+    day, balance = forecast.lowest()
+    print(f"Lowest: {balance:.2f} on {day.isoformat()}")
+    return 0
+
+def _serve(args: argparse.Namespace) -> int:
+    # The API is optional, so Flask is only imported when it is asked for.
+    from budget_app.api import LedgerService, create_app
+
+    try:
+        service = LedgerService.open(args.data)
+    except OSError as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    try:
+        app = create_app(service)
+        app.run(host=args.host, port=args.port, threaded=True)
+    except RuntimeError as exc:
+        print(f"budget_app: {exc}", file=sys.stderr)
+        return 1
+    finally:
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,21 +1,87 @@
+from budget_app.models.ledger import Ledger
+from budget_app.models.summary import SummaryAggregates
+
+
 class BudgetController:
-    def __init__(self):
-        self.transactions = []
+    # Transactions live in the in-memory ledger and summary, unless the
+    # repository answers queries itself (SQLite): then it holds them, every
+    # read and write goes to it, and IDs are its row IDs.
+    def __init__(self, repository=None):
+        self.repository = repository
+        self.ledger = Ledger()
+        self.summary = SummaryAggregates()
 
     def add_transaction(self, transaction):
-        self.transactions.append(transaction)
+        if self._repository_answers_queries():
+            return self.repository.insert(transaction)
+        transaction_id = self.ledger.add(transaction)
+        self.summary.add(transaction)
+        return transaction_id
 
-    def remove_transaction(self, transaction):
-        if transaction in self.transactions:
-            self.transactions.remove(transaction)
+    def remove_transaction(self, transaction_id):
+        if self._repository_answers_queries():
+            try:
+                transaction = self.repository.get(transaction_id)
+            except KeyError:
+                return None
+            self.repository.delete(transaction_id)
+            return transaction
+        if transaction_id not in self.ledger:
+            return None
+        transaction = self.ledger.remove(transaction_id)
+        self.summary.remove(transaction)
+        return transaction
 
-    def update_transaction(self, old_transaction, new_transaction):
-        index = self.transactions.index(old_transaction) if old_transaction in self.transactions else -1
-        if index != -1:
-            self.transactions[index] = new_transaction
+    def update_transaction(self, transaction_id, new_transaction):
+        if self._repository_answers_queries():
+            try:
+                previous = self.repository.get(transaction_id)
+            except KeyError:
+                return None
+            self.repository.update(transaction_id, new_transaction)
+            return previous
+        if transaction_id not in self.ledger:
+            return None
+        previous = self.ledger.update(transaction_id, new_transaction)
+        self.summary.replace(previous, new_transaction)
+        return previous
+
+    def get_transaction(self, transaction_id):
+        if self._repository_answers_queries():
+            return self.repository.get(transaction_id)
+        return self.ledger.get(transaction_id)
 
     def get_transactions(self):
-        return self.transactions
+        if self._repository_answers_queries():
+            return self.repository.load()
+        return self.ledger.transactions()
+
+    def get_transactions_page(self, offset=0, limit=None, start=None, end=None, category=None):
+        # Repositories that can filter and page themselves (SQLite) answer
+        # without the ledger ever being loaded into memory.
+        if self._repository_answers_queries():
+            rows = self.repository.query(start=start, end=end, category=category, limit=limit, offset=offset)
+            return [transaction for _, transaction in rows]
+
+        transaction_ids = self.ledger.query(start=start, end=end, category=category)
+        stop = None if limit is None else offset + limit
+        return [self.ledger.get(transaction_id) for transaction_id in transaction_ids[offset:stop]]
+
+    def count_transactions(self, start=None, end=None, category=None):
+        if self._repository_answers_queries():
+            return self.repository.count(start=start, end=end, category=category)
+        if start is None and end is None:
+            return len(self.ledger) if category is None else len(self.ledger.in_category(category))
+        return len(self.ledger.query(start=start, end=end, category=category))
 
     def calculate_total(self):
-        return sum(transaction.amount for transaction in self.transactions)
\ No newline at end of file
+        if self._repository_answers_queries():
+            income, expenses = self.repository.totals()
+            return income + expenses
+        return self.summary.balance
+
+    def _repository_answers_queries(self):
+        # An explicit opt-in rather than a check for query() or count():
+        # TransactionRepository.count reads the whole file, which the ledger
+        # already holds.
+        return getattr(self.repository, "answers_queries", False)
@@ -1,22 +1,83 @@
+from __future__ import annotations
+
+import functools
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import filedialog, messagebox, ttk
 from datetime import date
 from pathlib import Path
-
-from budget_app.storage.repository import TransactionRepository
+from typing import TYPE_CHECKING, Any, Callable, Sequence
+
+from budget_app.storage.journal import DEFAULT_DATA_PATH, JournalEntry, JournalLoadReport, JournalRepository
+from budget_app.storage.locking import LedgerConflictError
+from budget_app.storage.persistence import PersistenceWorker
+from budget_app.storage.watcher import FileWatcher
+from budget_app.models.ledger import Ledger
+from budget_app.models.search import SearchQuery, parse_query
+from budget_app.models.summary import SummaryAggregates
 from budget_app.models.transaction import Transaction
+from budget_app.utils import trace
+from budget_app.utils.startup import StartupProfile
+from budget_app.views.virtual_tree import VirtualTreeview
+
+# Import, export and reports are imported when first used: they are not
+# needed to show the window, and reports may pull in pandas.
+if TYPE_CHECKING:
+    from budget_app.models.reports import ReportCube
+    from budget_app.storage.importer import ImportReport
+    from budget_app.views.reports_view import ReportsWindow
+
+COLUMN_TITLES = {"date": "Date", "category": "Category", "memo": "Memo", "amount": "Amount"}
+
+def _handler(name: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    # Traces an event handler as the action ``name`` (see utils.trace), then
+    # ``name.settled`` from the event until Tk is idle again, which adds the
+    # redraws the handler caused.  Tracing off, it costs one global lookup.
+    def decorate(method: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(method)
+        def run(self: BudgetApp, *args: object) -> Any:
+            tracer = trace.active()
+            if tracer is None:
+                return method(self, *args)
+            started = time.perf_counter_ns()
+            try:
+                with tracer.action(name):
+                    return method(self, *args)
+            finally:
+                self.root.after_idle(
+                    lambda: tracer.record(f"{name}.settled", started, time.perf_counter_ns() - started, {})
+                )
+        return run
+    return decorate
 
 class BudgetApp:
-    def __init__(self) -> None:
+    def __init__(self, *, profile: StartupProfile | None = None) -> None:
+        self._profile = profile
         self.root = tk.Tk()
         self.root.title("Budget App")
         self.root.geometry("800x520")
         self.root.minsize(720, 440)
         self.root.configure(bg="#f5f5f7")
 
-        data_path = Path.home() / ".budget_app" / "transactions.json"
-        self._repository = TransactionRepository(data_path)
-        self.transactions: list[Transaction] = self._repository.load()
+        self._repository = JournalRepository(DEFAULT_DATA_PATH)
+        self._writer: PersistenceWorker | None = None
+        # Started once the ledger has loaded; merges what other processes write.
+        self._watcher: FileWatcher | None = None
+        self._ledger = Ledger(search_index=True)
+        self._aggregates = SummaryAggregates(debug=os.environ.get("BUDGET_APP_DEBUG") == "1")
+        # Built from the ledger when the Reports window is first opened.
+        self._reports: ReportCube | None = None
+        self._reports_window: ReportsWindow | None = None
+        self._load_queue: queue.Queue[list[Transaction] | SummaryAggregates | None] = queue.Queue()
+        # Totals from the summary sidecar, shown until the ledger has loaded.
+        self._cached_summary: SummaryAggregates | None = None
+        self._summary_saved = False
+        self._load_report = JournalLoadReport()
+        self._loading = False
+        self._closed = False
 
         self._summary_vars: dict[str, tk.StringVar] = {
             "balance": tk.StringVar(value="$0.00"),
@@ -29,7 +90,19 @@ class BudgetApp:
         self._memo_var = tk.StringVar()
         self._date_var = tk.StringVar(value=date.today().isoformat())
         self._tx_kind_var = tk.StringVar(value="Income")
-        self._editing_index: int | None = None
+        self._editing_id: int | None = None
+        self._search_var = tk.StringVar()
+        self._search_query = SearchQuery()
+        self._search_after: str | None = None
+        # Matching transaction IDs in ledger order while a search is active.
+        self._filtered: list[int] | None = None
+        # (column, descending) once a heading has been clicked.  ``_view``
+        # holds the IDs in display order whenever that differs from the
+        # ledger's; unfiltered, it is the ledger's cached order for the
+        # column, read back to front when ``_view_reversed`` is set.
+        self._sort: tuple[str, bool] | None = None
+        self._view: Sequence[int] | None = None
+        self._view_reversed = False
 
         self._configure_style()
         self._build_menu()
@@ -37,11 +110,30 @@ class BudgetApp:
         self._tree.bind("<Double-1>", self._on_start_edit)
         self._refresh_tree()
         self._update_summary()
+        self._set_loading(True)
+        # Parsing holds the GIL for long stretches, so the loader thread only
+        # starts once the empty window has been drawn.
+        self.root.after_idle(self._start_loading)
 
         self.root.protocol("WM_DELETE_WINDOW", self._on_close)
+        self._mark("build window")
 
     def run(self) -> None:
-        self.root.mainloop()
+        self.root.after_idle(self._mark, "first paint")
+        try:
+            self.root.mainloop()
+        finally:
+            # The loop can also end without _on_close (root.quit(), an
+            # error escaping Tk); queued writes must still reach the disk.
+            try:
+                self._shut_down()
+            except OSError:
+                # Only compaction can fail here; see _on_close.
+                pass
+
+    def _mark(self, phase: str) -> None:
+        if self._profile is not None:
+            self._profile.mark(phase)
 
     def _configure_style(self) -> None:
         style = ttk.Style(self.root)
@@ -89,10 +181,14 @@ class BudgetApp:
     def _build_menu(self) -> None:
         menu_bar = tk.Menu(self.root)
         file_menu = tk.Menu(menu_bar, tearoff=False)
+        file_menu.add_command(label="Import…", command=self._on_import)
         file_menu.add_command(label="Export CSV…", command=self._on_export_csv)
         file_menu.add_separator()
-        file_menu.add_command(label="Quit", command=self.root.quit)
+        file_menu.add_command(label="Quit", command=self._on_close)
         menu_bar.add_cascade(label="File", menu=file_menu)
+        view_menu = tk.Menu(menu_bar, tearoff=False)
+        view_menu.add_command(label="Reports…", command=self._on_show_reports)
+        menu_bar.add_cascade(label="View", menu=view_menu)
         self.root.config(menu=menu_bar)
 
     def _build_layout(self) -> None:
@@ -109,28 +205,43 @@ class BudgetApp:
             ttk.Label(block, textvariable=var, style="SummaryValue.TLabel").pack(anchor="w")
 
         tree_frame = ttk.LabelFrame(container, text="Transactions")
+        self._tree_frame = tree_frame
         tree_frame.pack(fill="both", expand=True, pady=(0, 16))
 
+        search_bar = ttk.Frame(tree_frame)
+        search_bar.pack(fill="x", side="top", padx=8, pady=(8, 0))
+        ttk.Label(search_bar, text="Search").pack(side="left")
+        search_entry = ttk.Entry(search_bar, textvariable=self._search_var)
+        search_entry.pack(side="left", fill="x", expand=True, padx=(6, 0))
+        search_entry.bind("<Escape>", lambda _event: self._search_var.set(""))
+        self._search_var.trace_add("write", self._on_search_changed)
+
         columns = ("date", "category", "memo", "amount")
         self._tree = ttk.Treeview(tree_frame, columns=columns, show="headings", height=10)
-        self._tree.heading("date", text="Date")
-        self._tree.heading("category", text="Category")
-        self._tree.heading("memo", text="Memo")
-        self._tree.heading("amount", text="Amount")
+        for column in columns:
+            self._tree.heading(column, text=COLUMN_TITLES[column], command=lambda column=column: self._on_sort(column))
         self._tree.column("date", width=90, anchor="center")
         self._tree.column("category", width=120)
         self._tree.column("memo", width=260)
         self._tree.column("amount", width=100, anchor="e")
         self._tree.pack(fill="both", expand=True, side="left", padx=(8, 0), pady=8)
 
-        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical", command=self._tree.yview)
+        scrollbar = ttk.Scrollbar(tree_frame, orient="vertical")
         scrollbar.pack(fill="y", side="right", padx=(0, 8), pady=8)
-        self._tree.configure(yscrollcommand=scrollbar.set)
+        self._rows = VirtualTreeview(
+            self._tree,
+            scrollbar,
+            row_count=self._row_count,
+            row_key=lambda row: str(self._row_id(row)),
+            row_values=self._row_values,
+        )
 
         tree_actions = ttk.Frame(tree_frame)
         tree_actions.pack(fill="x", side="bottom", anchor="e", padx=8, pady=(0, 8))
-        ttk.Button(tree_actions, text="Delete Selected", command=self._on_delete_selected).pack(side="right")
-        ttk.Button(tree_actions, text="Edit Selected", command=self._on_start_edit).pack(side="right", padx=(0, 8))
+        self._delete_button = ttk.Button(tree_actions, text="Delete Selected", command=self._on_delete_selected)
+        self._delete_button.pack(side="right")
+        self._edit_button = ttk.Button(tree_actions, text="Edit Selected", command=self._on_start_edit)
+        self._edit_button.pack(side="right", padx=(0, 8))
 
         form = ttk.LabelFrame(container, text="Add Transaction", padding=12)
         form.pack(fill="x")
@@ -166,6 +277,233 @@ class BudgetApp:
         for col in range(7):
             form.columnconfigure(col, weight=1 if col == 2 else 0)
 
+    def _start_loading(self) -> None:
+        # The ledger streams in on a worker thread; the window, the first
+        # batch and a running summary show up while the rest is parsed.  A
+        # valid summary sidecar goes first so the totals are right at once.
+        def load() -> None:
+            try:
+                cached = self._repository.cached_summary()
+                if cached is not None:
+                    self._load_queue.put(cached)
+                for batch in self._repository.iter_batches(report=self._load_report):
+                    self._load_queue.put(batch)
+            finally:
+                self._load_queue.put(None)
+
+        threading.Thread(target=load, name="ledger-load", daemon=True).start()
+        self.root.after(0, self._drain_load_queue)
+
+    def _drain_load_queue(self) -> None:
+        deadline = time.perf_counter() + 0.05
+        finished = False
+        while time.perf_counter() < deadline:
+            try:
+                batch = self._load_queue.get_nowait()
+            except queue.Empty:
+                break
+            if batch is None:
+                finished = True
+                break
+            if isinstance(batch, SummaryAggregates):
+                self._cached_summary = batch
+                self._update_summary()
+                continue
+            self._ledger.add_many(batch)
+            self._track_added(batch)
+
+        if finished:
+            self._finish_loading()
+        else:
+            first_rows = not self._rows.materialized
+            self._refresh_tree()
+            self._update_summary()
+            if first_rows and self._rows.materialized:
+                self._mark("first rows")
+            self.root.after(50, self._drain_load_queue)
+
+    @_handler("gui.finish_loading")
+    def _finish_loading(self) -> None:
+        report = self._load_report
+        for entry in report.entries:
+            self._apply_journal_entry(entry)
+        cached, self._cached_summary = self._cached_summary, None
+        if cached is not None and self._reports is not None:
+            self._reports.restore(self._aggregates.cells)
+        # A sidecar that matched needs no rewrite until something changes.
+        self._summary_saved = cached is not None
+        self._refresh_tree()
+        self._update_summary()
+        # The loader thread is done with the repository; from here on only
+        # the writer thread touches it.
+        self._writer = PersistenceWorker(self._repository, on_error=self._on_save_error)
+        self._set_loading(False)
+        if report.error is None:
+            self._watcher = FileWatcher(
+                self._repository.watched_paths,
+                on_change=lambda: self.root.after(0, self._merge_external_changes),
+            )
+            self._watcher.start()
+            # Anything written between the end of the load and the watcher's
+            # first look.
+            self._merge_external_changes()
+        if self._profile is not None:
+            self._mark("ledger loaded")
+            self._profile.report()
+            self._profile = None
+
+        if report.error is not None:
+            messagebox.showerror(
+                "Load Failed",
+                f"The ledger could not be read completely:\n{report.error}\n\nChanges will not be saved.",
+            )
+        elif report.skipped:
+            messagebox.showwarning(
+                "Load Warnings",
+                f"Skipped {report.skipped} invalid transaction record(s) while loading.",
+            )
+
+    def _apply_journal_entry(self, entry: JournalEntry) -> None:
+        if entry.op == "add":
+            assert entry.tx is not None
+            self._ledger.add(entry.tx)
+            self._track_added([entry.tx])
+        elif entry.op == "update":
+            assert entry.index is not None and entry.tx is not None
+            previous = self._ledger.update(self._ledger.id_at(entry.index), entry.tx)
+            self._track_replaced(previous, entry.tx)
+        else:
+            assert entry.index is not None
+            self._track_removed([self._ledger.remove(self._ledger.id_at(entry.index))])
+
+    @_handler("gui.merge_external_changes")
+    def _merge_external_changes(self) -> None:
+        # Our own queued writes go out first, so what refresh() returns is
+        # only what other processes wrote.
+        if self._writer is None:
+            return
+        if self._loading:
+            # An import is running; look again once it is done.
+            self.root.after(500, self._merge_external_changes)
+            return
+        self._writer.flush()
+        if self._writer.failing:
+            # The scheduled rollback merges once the failed writes are undone.
+            return
+        entries = self._repository.refresh()
+        if entries is None:
+            self._reload_ledger()
+            return
+        if not entries:
+            return
+        for entry in entries:
+            self._apply_journal_entry(entry)
+        self._summary_saved = False
+        self._drop_stale_edit()
+        self._refresh_tree()
+        self._update_summary()
+
+    def _reload_ledger(self) -> None:
+        # Another process saved over the ledger, or folded changes we never
+        # saw into a snapshot, so they cannot be merged one by one.
+        self._stop_watching()
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            try:
+                writer.close()
+            except OSError:
+                pass
+        self._ledger = Ledger(search_index=True)
+        self._aggregates.clear()
+        if self._reports is not None:
+            self._reports.clear()
+        self._load_report = JournalLoadReport()
+        self._drop_stale_edit()
+        self._set_loading(True, "reloading…")
+        self._refresh_tree()
+        self._update_summary()
+        self._start_loading()
+
+    def _stop_watching(self) -> None:
+        if self._watcher is not None:
+            self._watcher.stop()
+            self._watcher = None
+
+    def _set_loading(self, loading: bool, status: str = "loading…") -> None:
+        self._loading = loading
+        state = ["disabled"] if loading else ["!disabled"]
+        for button in (self._submit_button, self._edit_button, self._delete_button):
+            button.state(state)
+        self._tree_frame.configure(text=f"Transactions ({status})" if loading else self._tree_title())
+
+    @_handler("gui.import")
+    def _on_import(self) -> None:
+        if self._loading:
+            messagebox.showinfo("Import", "Wait for the current load or import to finish.")
+            return
+        filepath = filedialog.askopenfilename(
+            parent=self.root,
+            title="Import Transactions",
+            filetypes=[
+                ("Statements", "*.csv *.ofx *.qfx"),
+                ("CSV Files", "*.csv"),
+                ("OFX Files", "*.ofx *.qfx"),
+                ("All Files", "*.*"),
+            ],
+        )
+        if not filepath:
+            return
+
+        from budget_app.storage.importer import ImportReport, iter_import_batches
+
+        self._set_loading(True, "importing…")
+        existing = self._ledger.transactions()
+        report = ImportReport()
+
+        def on_progress(progress: ImportReport) -> None:
+            percent = 100 * progress.bytes_read // max(progress.bytes_total, 1)
+            self.root.after(0, self._set_loading, True, f"importing… {percent}%")
+
+        def run() -> None:
+            imported: list[Transaction] = []
+            error: Exception | None = None
+            try:
+                for batch in iter_import_batches(Path(filepath), existing, report=report, on_progress=on_progress):
+                    imported.extend(batch)
+            except (OSError, ValueError) as exc:
+                error = exc
+            self.root.after(0, self._finish_import, imported, report, error)
+
+        threading.Thread(target=run, name="ledger-import", daemon=True).start()
+
+    @_handler("gui.finish_import")
+    def _finish_import(self, imported: list[Transaction], report: ImportReport, error: Exception | None) -> None:
+        self._set_loading(False)
+        if error is not None:
+            messagebox.showerror("Import Failed", f"Could not import transactions:\n{error!s}")
+            return
+
+        if imported:
+            tx_ids = self._ledger.add_many(imported)
+            self._track_added(imported)
+
+            def undo_import() -> None:
+                self._track_removed(self._ledger.remove_many(tx_ids))
+
+            self._persist(lambda: self._repository.add_many(imported), undo_import)
+            self._refresh_tree()
+            self._update_summary()
+
+        message = (
+            f"Imported {report.imported} transaction(s).\n"
+            f"Skipped {report.duplicates} duplicate(s) and {report.invalid} invalid row(s)."
+        )
+        if report.errors:
+            details = "\n".join(f"Line {line}: {reason}" for line, reason in report.errors[:5])
+            message = f"{message}\n\n{details}"
+        messagebox.showinfo("Import", message)
+
+    @_handler("gui.add")
     def _on_add_transaction(self) -> None:
         try:
             transaction = Transaction.from_input(
@@ -179,105 +517,247 @@ class BudgetApp:
             messagebox.showerror("Invalid Input", str(exc))
             return
 
-        if self._editing_index is None:
-            self.transactions.append(transaction)
-            if not self._persist():
-                self.transactions.pop()
-                return
+        if self._editing_id is None:
+            tx_id = self._ledger.add(transaction)
+            self._track_added([transaction])
+
+            def undo_add() -> None:
+                self._track_removed([self._ledger.remove(tx_id)])
+
+            self._persist(lambda: self._repository.add(transaction), undo_add)
+            if self._filtered is None:
+                self._rows.row_inserted(self._row_of(tx_id))
+            else:
+                self._refresh_tree()
         else:
-            index = self._editing_index
-            previous = self.transactions[index]
-            self.transactions[index] = transaction
-            if not self._persist():
-                self.transactions[index] = previous
-                return
+            tx_id = self._editing_id
+            position = self._ledger.position_of(tx_id)
+            row = self._row_of(tx_id)
+            previous = self._ledger.update(tx_id, transaction)
+            self._track_replaced(previous, transaction)
+
+            def undo_update() -> None:
+                self._track_replaced(self._ledger.update(tx_id, previous), previous)
+
+            self._persist(lambda: self._repository.update(position, transaction), undo_update)
+            if self._filtered is not None:
+                self._refresh_tree()
+            elif self._row_of(tx_id) == row:
+                self._rows.row_updated(row)
+            else:
+                # The edit moved the row within the sort order.
+                self._rows.reset()
 
-        self._refresh_tree()
         self._update_summary()
         self._exit_edit_mode()
         self._reset_form()
 
+    @_handler("gui.delete")
     def _on_delete_selected(self) -> None:
-        selected = self._tree.selection()
+        selected = self._rows.selected_rows()
         if not selected:
             messagebox.showinfo("Delete Transaction", "Select at least one transaction to delete.")
             return 
         
-        indexes = sorted(
-            (int(self._tree.item(item_id, "text")) for item_id in selected),
-            reverse=True,
-        )
-        removed: list[tuple[int, Transaction]] = []
-        for index in indexes:
-            if 0 <= index < len(self.transactions):
-                removed.append((index, self.transactions.pop(index)))
-        
-        if not removed:
+        rows = [row for row in sorted(selected, reverse=True) if row < self._row_count()]
+        if not rows:
             return
+        if self._view is None:
+            positions = rows
+        else:
+            positions = sorted((self._ledger.position_of(self._row_id(row)) for row in rows), reverse=True)
+        tx_ids = [self._ledger.id_at(position) for position in positions]
+        removed = list(zip(tx_ids, self._ledger.remove_many(tx_ids)))
+        self._track_removed([tx for _, tx in removed])
+
+        def undo_delete() -> None:
+            self._ledger.restore_many(removed)
+            self._track_added([tx for _, tx in removed])
 
         self._exit_edit_mode()
-        if not self._persist():
-            for index, tx in reversed(removed):
-                self.transactions.insert(index, tx)
-            return
-        
-        self._refresh_tree()
+        self._persist(lambda: self._repository.delete(positions), undo_delete)
+        if self._filtered is None:
+            self._rows.rows_deleted(rows)
+        else:
+            self._refresh_tree()
         self._update_summary()
         self._reset_form()
 
+    @_handler("gui.export")
     def _on_export_csv(self) -> None:
-        if not self.transactions:
+        if self._loading:
+            messagebox.showinfo("Export", "Transactions are still loading.")
+            return
+        if not self._ledger:
             messagebox.showinfo("Export", "No transactions to export.")
             return
         filepath = filedialog.asksaveasfilename(
             parent=self.root,
             title="Export Transactions",
             defaultextension=".csv",
-            filetypes=[("CSV Files", "*.csv"), ("All Files", "*.*")],
+            filetypes=[("CSV Files", "*.csv"), ("Compressed CSV", "*.csv.gz"), ("All Files", "*.*")],
         )
         if not filepath:
             return
 
-        try: 
-            lines = ["date,category,memo,amount"]
-            for tx in self.transactions:
-                memo = tx.memo.replace('"', '""')
-                lines.append(
-                    f'{tx.date.isoformat()},{tx.category},"{memo}",{tx.amount:.2f}'
-                )
-            Path(filepath).write_text("\n".join(lines), encoding="utf-8")
-            messagebox.showinfo("Export", f"Transactions exported to {filepath}.")
-        except OSError as exc:
-            messagebox.showerror("Export Failed", f"Could not export transactions:\n{exc!s}")
+        # Transactions are immutable, so a shallow copy of the ledger is a
+        # consistent snapshot the worker can stream while editing goes on.
+        transactions = self._ledger.transactions()
+        from budget_app.storage.exporter import export_csv
+
+        def run() -> None:
+            try:
+                count = export_csv(transactions, Path(filepath))
+            except OSError as exc:
+                self.root.after(0, messagebox.showerror, "Export Failed", f"Could not export transactions:\n{exc!s}")
+            else:
+                self.root.after(0, messagebox.showinfo, "Export", f"Exported {count} transaction(s) to {filepath}.")
+
+        threading.Thread(target=run, name="ledger-export", daemon=True).start()
 
     def _style_treeview(self) -> None:
         self._tree.tag_configure("oddrow", background="#f0f6ff")
         self._tree.tag_configure("evenrow", background="#ffffff")
 
     def _refresh_tree(self) -> None:
-        for item in self._tree.get_children():
-            self._tree.delete(item)
-        for idx, tx in enumerate(self.transactions):
-            self._tree.insert(
-                "",
-                "end",
-                text=str(idx),
-                values=(
-                    tx.date.isoformat(),
-                    tx.category,
-                    tx.memo,
-                    f"${tx.amount:.2f}",
-                ),
-                tags=("evenrow" if idx % 2 == 0 else "oddrow",),
-            )
+        # While a search is active the matches are recomputed instead of
+        # patched row by row; the index makes that a few milliseconds.
+        with trace.span("gui.refresh_tree") as span:
+            if self._search_query.is_empty:
+                self._filtered = None
+            else:
+                self._filtered = self._ledger.search(self._search_query)
+            self._view, self._view_reversed = self._display_order()
+            self._rows.reset()
+            span.set(rows=self._row_count())
+        if not self._loading:
+            self._tree_frame.configure(text=self._tree_title())
+
+    def _display_order(self) -> tuple[Sequence[int] | None, bool]:
+        if self._sort is None:
+            return self._filtered, False
+        column, descending = self._sort
+        if self._filtered is None:
+            return self._ledger.sorted_ids(column), descending
+        return self._ledger.sort_ids(column, self._filtered, descending=descending), False
+
+    @_handler("gui.sort")
+    def _on_sort(self, column: str) -> None:
+        # Ascending, then descending, then back to ledger order.  The ledger
+        # keeps each column's order once built, so switching only changes
+        # which IDs the rows map to.
+        if self._sort is None or self._sort[0] != column:
+            self._sort = (column, False)
+        elif not self._sort[1]:
+            self._sort = (column, True)
+        else:
+            self._sort = None
+        for name, title in COLUMN_TITLES.items():
+            if self._sort is not None and self._sort[0] == name:
+                title = f"{title} {'▼' if self._sort[1] else '▲'}"
+            self._tree.heading(name, text=title)
+        self._refresh_tree()
+
+    def _tree_title(self) -> str:
+        if self._filtered is None:
+            return "Transactions"
+        return f"Transactions ({len(self._filtered)} of {len(self._ledger)} match)"
+
+    def _on_search_changed(self, *_args: object) -> None:
+        # Debounced so typing a word costs one search, not one per key.
+        if self._search_after is not None:
+            self.root.after_cancel(self._search_after)
+        self._search_after = self.root.after(150, self._apply_search)
+
+    @_handler("gui.search")
+    def _apply_search(self) -> None:
+        self._search_after = None
+        query = parse_query(self._search_var.get())
+        if query == self._search_query:
+            return
+        self._search_query = query
+        self._refresh_tree()
+
+    def _row_count(self) -> int:
+        return len(self._ledger) if self._view is None else len(self._view)
+
+    def _row_id(self, row: int) -> int:
+        if self._view is None:
+            return self._ledger.id_at(row)
+        if self._view_reversed:
+            row = len(self._view) - 1 - row
+        return self._view[row]
+
+    def _row_of(self, tx_id: int) -> int:
+        # The row showing ``tx_id`` while no search is active.
+        if self._sort is None:
+            return self._ledger.position_of(tx_id)
+        column, descending = self._sort
+        rank = self._ledger.sort_rank(column, tx_id)
+        return len(self._ledger) - 1 - rank if descending else rank
+
+    def _row_values(self, row: int) -> tuple[str, str, str, str]:
+        tx = self._ledger.get(self._row_id(row))
+        return (
+            tx.date.isoformat(),
+            tx.category,
+            tx.memo,
+            f"${tx.amount:.2f}",
+        )
+
+    def _track_added(self, transactions: list[Transaction]) -> None:
+        for tx in transactions:
+            self._aggregates.add(tx)
+        reports = self._tracked_reports()
+        if reports is not None:
+            reports.add_many(transactions)
+
+    def _track_removed(self, transactions: list[Transaction]) -> None:
+        reports = self._tracked_reports()
+        for tx in transactions:
+            self._aggregates.remove(tx)
+            if reports is not None:
+                reports.remove(tx)
+
+    def _track_replaced(self, old: Transaction, new: Transaction) -> None:
+        self._aggregates.replace(old, new)
+        reports = self._tracked_reports()
+        if reports is not None:
+            reports.replace(old, new)
+
+    def _tracked_reports(self) -> ReportCube | None:
+        # A cube seeded from the cached summary already covers the rows that
+        # are still loading; it is reseeded once the load finishes.
+        return self._reports if self._cached_summary is None else None
 
     def _update_summary(self) -> None:
-        income = sum(tx.amount for tx in self.transactions if tx.amount >= 0)
-        expenses = sum(tx.amount for tx in self.transactions if tx.amount < 0)
-        balance = income + expenses
-        self._summary_vars["income"].set(f"${income:.2f}")
-        self._summary_vars["expenses"].set(f"${expenses:.2f}")
-        self._summary_vars["balance"].set(f"${balance:.2f}")
+        with trace.span("gui.update_summary"):
+            if self._aggregates.debug:
+                self._aggregates.verify(self._ledger)
+                reports = self._tracked_reports()
+                if reports is not None and reports.snapshot() != type(reports)(self._ledger).snapshot():
+                    raise AssertionError("Report rollups drifted from a full rebuild.")
+            summary = self._aggregates if self._cached_summary is None else self._cached_summary
+            self._summary_vars["income"].set(f"${summary.income:.2f}")
+            self._summary_vars["expenses"].set(f"${summary.expenses:.2f}")
+            self._summary_vars["balance"].set(f"${summary.balance:.2f}")
+            if self._reports_window is not None and self._reports_window.is_open:
+                self._reports_window.refresh()
+
+    @_handler("gui.reports")
+    def _on_show_reports(self) -> None:
+        if self._reports_window is not None and self._reports_window.is_open:
+            self._reports_window.lift()
+            return
+        from budget_app.models.reports import ReportCube
+        from budget_app.views.reports_view import ReportsWindow
+
+        if self._reports is None:
+            # Built from the summary cells rather than the ledger, so opening
+            # the window costs months x categories even mid-load.
+            self._reports = ReportCube()
+            self._reports.restore((self._aggregates if self._cached_summary is None else self._cached_summary).cells)
+        self._reports_window = ReportsWindow(self.root, self._reports)
 
     def _reset_form(self) -> None:
         self._amount_var.set("")
@@ -286,36 +766,108 @@ class BudgetApp:
         self._date_var.set(date.today().isoformat())
         self._tx_kind_var.set("Income")
 
-    def _persist(self) -> bool:
-        try:
-            self._repository.save(self.transactions)
-        except OSError as exc:
-            messagebox.showerror("Save Failed", f"Could not save transactions:\n{exc!s}")
-            return False
-        return True
+    def _persist(self, write: Callable[[], None], undo: Callable[[], None]) -> None:
+        # The change is already applied to the ledger; the writer saves it in
+        # the background and ``undo`` reverts it if the save fails.
+        assert self._writer is not None
+        self._summary_saved = False
+        self._writer.submit(write, undo)
+
+    def _on_save_error(self, exc: Exception) -> None:
+        # Called on the writer thread; hand the failure to the Tk thread.
+        self.root.after(0, self._roll_back_failed_writes, exc)
+
+    def _roll_back_failed_writes(self, exc: Exception) -> None:
+        assert self._writer is not None
+        undos = self._writer.take_failed()
+        if not undos:
+            return
+        for undo in reversed(undos):
+            undo()
+        conflict = isinstance(exc, LedgerConflictError)
+        if conflict:
+            self._merge_external_changes()
+        self._drop_stale_edit()
+        self._refresh_tree()
+        self._update_summary()
+        if conflict:
+            messagebox.showwarning(
+                "Ledger Changed",
+                "Another program changed the ledger at the same time. Its changes have been loaded "
+                f"and your last {len(undos)} change(s) were undone; please make them again.",
+            )
+            return
+        messagebox.showerror(
+            "Save Failed",
+            f"Could not save transactions:\n{exc!s}\n\n{len(undos)} unsaved change(s) were undone.",
+        )
 
-    def _on_close(self) -> None:
-        if self._persist():
-            self.root.destroy()
+    def _drop_stale_edit(self) -> None:
+        if self._editing_id is not None and self._editing_id not in self._ledger:
+            self._exit_edit_mode()
+            self._reset_form()
 
+    def _on_close(self) -> None:
+        if self._writer is not None:
+            self._writer.flush()
+            if self._writer.failing:
+                # The scheduled rollback reports the failure; the window
+                # stays open so nothing is lost silently.
+                return
+        try:
+            self._shut_down()
+        except OSError as exc:
+            # Only compaction can fail here, and the journal it was folding
+            # in is still on disk, so nothing is lost by closing.
+            messagebox.showwarning("Save Warning", f"Could not compact the ledger:\n{exc!s}")
+        self.root.destroy()
+
+    def _shut_down(self) -> None:
+        # Writes out every queued change, closes the ledger and saves the
+        # summary cache.  Safe to call again; later calls do nothing.
+        if self._closed:
+            return
+        self._closed = True
+        self._stop_watching()
+        writer, self._writer = self._writer, None
+        if writer is None:
+            try:
+                self._repository.close()
+            except OSError:
+                pass
+            return
+        try:
+            writer.close()
+        finally:
+            if not self._summary_saved:
+                try:
+                    self._repository.save_summary(self._aggregates)
+                except OSError:
+                    # Only a cache: a stale sidecar is ignored on the next start.
+                    pass
+
+    @_handler("gui.start_edit")
     def _on_start_edit(self, event: tk.Event | None = None) -> None:
+        if self._loading:
+            return
         if event is not None:
             item_id = self._tree.identify_row(event.y)
             if item_id:
                 self._tree.selection_set(item_id)
 
-        selected = self._tree.selection()
+        selected = self._rows.selected_rows()
         if not selected:
             if event is None:
                 messagebox.showinfo("Edit Transaction", "Select a transaction to edit.")
             return
 
-        index = int(self._tree.item(selected[0], "text"))
-        if not (0 <= index < len(self.transactions)):
+        row = selected[0]
+        if not (0 <= row < self._row_count()):
             return
 
-        tx = self.transactions[index]
-        self._editing_index = index
+        tx_id = self._row_id(row)
+        tx = self._ledger.get(tx_id)
+        self._editing_id = tx_id
         self._date_var.set(tx.date.isoformat())
         self._category_var.set(tx.category)
         self._memo_var.set(tx.memo)
@@ -324,11 +876,12 @@ class BudgetApp:
         self._submit_button.config(text="Save")
         self._cancel_button.grid()
 
+    @_handler("gui.cancel_edit")
     def _on_cancel_edit(self) -> None:
         self._exit_edit_mode()
         self._reset_form()
 
     def _exit_edit_mode(self) -> None:
-        self._editing_index = None
+        self._editing_id = None
         self._submit_button.config(text="Add")
         self._cancel_button.grid_remove()
\ No newline at end of file
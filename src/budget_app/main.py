@@ -1,7 +1,52 @@
 # main.py
 
-from budget_app.gui import BudgetApp
+import argparse
+from pathlib import Path
+
+from budget_app.utils import trace
+from budget_app.utils.startup import StartupProfile
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="budget_app")
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="print how long each startup phase took once the ledger has loaded",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        metavar="PATH",
+        help=f"write timings and counters to PATH: Chrome trace format for *.json, JSON lines otherwise "
+        f"(or set {trace.TRACE_ENV})",
+    )
+    parser.add_argument(
+        "--profile-action",
+        action="append",
+        default=[],
+        metavar="NAME",
+        help=f"run the GUI action NAME (e.g. gui.add, or * for all) under cProfile and save a .prof file "
+        f"for each run (or set {trace.PROFILE_ENV})",
+    )
+    args = parser.parse_args(argv)
+    profile = StartupProfile() if args.profile_startup else None
+    tracer = trace.from_environment(path=args.trace, profile_actions=args.profile_action)
+    trace.install(tracer)
+
+    # Imported here so the profile covers it: the GUI module pulls in Tk.
+    from budget_app.gui import BudgetApp
+
+    if profile is not None:
+        profile.mark("import gui")
+    try:
+        app = BudgetApp(profile=profile)
+        app.run()
+    finally:
+        if tracer is not None:
+            trace.install(None)
+            tracer.close()
+
 
 if __name__ == "__main__":
-    app = BudgetApp()
-    app.run()
\ No newline at end of file
+    main()
@@ -0,0 +1,193 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date
+from decimal import Decimal
+from typing import Any, Iterable, Iterator, Sequence
+
+from budget_app.models.money import from_cents, to_cents
+from budget_app.models.transaction import Transaction
+
+try:
+  import numpy as _np
+except ImportError:
+  _np = None
+
+# datetime64[D] counts days from 1970-01-01, date.toordinal() from 0001-01-01.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def _column(values: array, dtype: Any) -> Any:
+  # Zero-copy NumPy view; it pins the array's buffer, so views must not
+  # outlive the call that made them.
+  if not values:
+    return _np.empty(0, dtype=dtype)
+  return _np.frombuffer(values, dtype=dtype)
+
+class ColumnarStore:
+  # Transactions stored column by column: int32 date ordinals, int64 cents
+  # and int32 category codes into an interned dictionary, with memos kept as
+  # a plain list.  Aggregations and filters run over the columns (with NumPy
+  # when it is installed) and Transaction objects are only built on request.
+  def __init__(self, transactions: Iterable[Transaction] = ()) -> None:
+    self._dates = array("i")
+    self._cents = array("q")
+    self._codes = array("i")
+    self._memos: list[str] = []
+    self._categories: list[str] = []
+    self._category_codes: dict[str, int] = {}
+    self.extend(transactions)
+
+  def __len__(self) -> int:
+    return len(self._cents)
+
+  def __getitem__(self, index: int) -> Transaction:
+    return Transaction(
+      date=date.fromordinal(self._dates[index]),
+      category=self._categories[self._codes[index]],
+      memo=self._memos[index],
+      amount=from_cents(self._cents[index]),
+    )
+
+  def __iter__(self) -> Iterator[Transaction]:
+    return self.iter_transactions()
+
+  @property
+  def categories(self) -> Sequence[str]:
+    return self._categories
+
+  def append(self, tx: Transaction) -> None:
+    cents = to_cents(tx.amount)
+    self._dates.append(tx.date.toordinal())
+    self._cents.append(cents)
+    self._codes.append(self._intern(tx.category))
+    self._memos.append(tx.memo)
+
+  def extend(self, transactions: Iterable[Transaction]) -> None:
+    for tx in transactions:
+      self.append(tx)
+
+  def replace(self, index: int, tx: Transaction) -> None:
+    cents = to_cents(tx.amount)
+    self._dates[index] = tx.date.toordinal()
+    self._cents[index] = cents
+    self._codes[index] = self._intern(tx.category)
+    self._memos[index] = tx.memo
+
+  def delete(self, index: int) -> None:
+    del self._dates[index]
+    del self._cents[index]
+    del self._codes[index]
+    del self._memos[index]
+
+  def select(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    categories: Iterable[str] | None = None,
+    by_date: bool = False,
+  ) -> Sequence[int]:
+    # Row indexes matching every given predicate, in storage order or, with
+    # ``by_date``, ordered by date and then storage order.
+    codes = None
+    if categories is not None:
+      codes = {self._category_codes[name] for name in categories if name in self._category_codes}
+    low = None if start is None else start.toordinal()
+    high = None if end is None else end.toordinal()
+
+    if _np is not None:
+      mask = _np.ones(len(self), dtype=bool)
+      dates = _column(self._dates, _np.int32)
+      if low is not None:
+        mask &= dates >= low
+      if high is not None:
+        mask &= dates <= high
+      if codes is not None:
+        mask &= _np.isin(_column(self._codes, _np.int32), list(codes))
+      rows = _np.flatnonzero(mask)
+      if by_date:
+        rows = rows[_np.argsort(dates[rows], kind="stable")]
+      return rows
+
+    rows = [
+      index
+      for index, (day, code) in enumerate(zip(self._dates, self._codes))
+      if (low is None or day >= low)
+      and (high is None or day <= high)
+      and (codes is None or code in codes)
+    ]
+    if by_date:
+      rows.sort(key=self._dates.__getitem__)
+    return rows
+
+  def totals(self, rows: Sequence[int] | None = None) -> tuple[Decimal, Decimal]:
+    # (income, expenses) over all rows or the selected ones.
+    if _np is not None:
+      cents = _column(self._cents, _np.int64)
+      if rows is not None:
+        cents = cents[_np.asarray(rows, dtype=_np.intp)]
+      income = int(cents[cents >= 0].sum())
+      expenses = int(cents[cents < 0].sum())
+      return from_cents(income), from_cents(expenses)
+
+    amounts: Iterable[int] = self._cents if rows is None else (self._cents[index] for index in rows)
+    income = expenses = 0
+    for cents in amounts:
+      if cents >= 0:
+        income += cents
+      else:
+        expenses += cents
+    return from_cents(income), from_cents(expenses)
+
+  def category_totals(self, rows: Sequence[int] | None = None) -> dict[str, Decimal]:
+    if _np is not None:
+      codes = _column(self._codes, _np.int32)
+      cents = _column(self._cents, _np.int64)
+      if rows is not None:
+        selection = _np.asarray(rows, dtype=_np.intp)
+        codes, cents = codes[selection], cents[selection]
+      sums = _np.zeros(len(self._categories), dtype=_np.int64)
+      _np.add.at(sums, codes, cents)
+      present = _np.zeros(len(self._categories), dtype=bool)
+      present[codes] = True
+      return {self._categories[code]: from_cents(int(sums[code])) for code in _np.flatnonzero(present)}
+
+    sums: dict[int, int] = {}
+    indexes: Iterable[int] = range(len(self)) if rows is None else rows
+    for index in indexes:
+      code = self._codes[index]
+      sums[code] = sums.get(code, 0) + self._cents[index]
+    return {self._categories[code]: from_cents(total) for code, total in sorted(sums.items())}
+
+  def month_totals(self, rows: Sequence[int] | None = None) -> dict[str, Decimal]:
+    if _np is not None:
+      dates = _column(self._dates, _np.int32)
+      cents = _column(self._cents, _np.int64)
+      if rows is not None:
+        selection = _np.asarray(rows, dtype=_np.intp)
+        dates, cents = dates[selection], cents[selection]
+      months = (dates.astype(_np.int64) - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]")
+      keys, inverse = _np.unique(months, return_inverse=True)
+      sums = _np.zeros(len(keys), dtype=_np.int64)
+      _np.add.at(sums, inverse, cents)
+      return {str(key): from_cents(int(total)) for key, total in zip(keys, sums)}
+
+    sums: dict[str, int] = {}
+    indexes: Iterable[int] = range(len(self)) if rows is None else rows
+    for index in indexes:
+      day = date.fromordinal(self._dates[index])
+      key = f"{day.year:04d}-{day.month:02d}"
+      sums[key] = sums.get(key, 0) + self._cents[index]
+    return {key: from_cents(total) for key, total in sorted(sums.items())}
+
+  def iter_transactions(self, rows: Sequence[int] | None = None) -> Iterator[Transaction]:
+    indexes: Iterable[Any] = range(len(self)) if rows is None else rows
+    for index in indexes:
+      yield self[int(index)]
+
+  def _intern(self, category: str) -> int:
+    code = self._category_codes.get(category)
+    if code is None:
+      code = self._category_codes[category] = len(self._categories)
+      self._categories.append(category)
+    return code
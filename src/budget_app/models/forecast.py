@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+from array import array
+from datetime import date, timedelta
+from decimal import Decimal
+from itertools import accumulate
+from typing import Any, Iterable, Iterator, Sequence
+
+from budget_app.models.money import from_cents, to_cents
+from budget_app.models.recurring import RecurringRule, day_in_month, month_index
+
+try:
+  import numpy as _np
+except ImportError:
+  _np = None
+
+# The curve is summed in segments of this many days.  A rule change re-sums
+# only the segments its occurrences fall in; the segments after them just
+# carry a different running total.
+SEGMENT_DAYS = 32
+
+# datetime64[D] counts days from 1970-01-01, date.toordinal() from 0001-01-01.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_EPOCH_MONTH = 1970 * 12
+
+def _ceil_div(numerator: Any, denominator: Any) -> Any:
+  return -(-numerator // denominator)
+
+class CashFlowForecast:
+  # Projected closing balance for each of ``days`` days from ``start``:
+  # ``opening`` plus every occurrence of the recurring rules up to that day,
+  # in cents.  Rules are kept under integer IDs, like Ledger rows.  A rule
+  # is expanded over the horizon when the curve is next read, all pending
+  # rules in one vectorised pass over date ordinals when NumPy is installed,
+  # and its day offsets are kept so a change can be taken back exactly.  The
+  # curve is cached until the rules change.
+  def __init__(
+    self,
+    rules: Iterable[RecurringRule] = (),
+    *,
+    start: date,
+    days: int,
+    opening: Decimal = Decimal(0),
+  ) -> None:
+    if days < 1:
+      raise ValueError("A forecast needs at least one day.")
+    self.start = start
+    self.days = days
+    self._opening = to_cents(opening)
+    self._first = start.toordinal()
+    self._segments = _ceil_div(days, SEGMENT_DAYS)
+    self._rules: dict[int, RecurringRule] = {}
+    self._offsets: dict[int, Sequence[int]] = {}
+    self._pending: set[int] = set()
+    self._next_id = 0
+    if _np is not None:
+      self._deltas: Any = _np.zeros(days, dtype=_np.int64)
+      self._within: Any = _np.zeros(days, dtype=_np.int64)
+    else:
+      self._deltas = [0] * days
+      self._within = [0] * days
+    self._dirty: set[int] = set()
+    self._curve: Any = None
+    self.add_many(rules)
+
+  def __len__(self) -> int:
+    return len(self._rules)
+
+  @property
+  def end(self) -> date:
+    return self.start + timedelta(days=self.days - 1)
+
+  @property
+  def opening(self) -> Decimal:
+    return from_cents(self._opening)
+
+  @opening.setter
+  def opening(self, amount: Decimal) -> None:
+    # Moves the whole curve; nothing is re-summed.
+    self._opening = to_cents(amount)
+    self._curve = None
+
+  def get(self, rule_id: int) -> RecurringRule:
+    return self._rules[rule_id]
+
+  def items(self) -> Iterator[tuple[int, RecurringRule]]:
+    return iter(list(self._rules.items()))
+
+  def add(self, rule: RecurringRule) -> int:
+    return self.add_many([rule])[0]
+
+  def add_many(self, rules: Iterable[RecurringRule]) -> list[int]:
+    added: list[int] = []
+    for rule in rules:
+      rule_id = self._next_id
+      self._next_id += 1
+      self._rules[rule_id] = rule
+      self._pending.add(rule_id)
+      added.append(rule_id)
+    return added
+
+  def update(self, rule_id: int, rule: RecurringRule) -> RecurringRule:
+    previous = self._rules[rule_id]
+    self._retract(rule_id)
+    self._rules[rule_id] = rule
+    self._pending.add(rule_id)
+    return previous
+
+  def remove(self, rule_id: int) -> RecurringRule:
+    self._retract(rule_id)
+    return self._rules.pop(rule_id)
+
+  def balance_cents(self) -> Sequence[int]:
+    # The daily closing balances in cents: a read-only int64 ndarray with
+    # NumPy, an int64 array otherwise.  Cached; callers must not modify it.
+    self._expand_pending()
+    if self._curve is None:
+      self._curve = self._sum_curve()
+    return self._curve
+
+  def balance_on(self, day: date) -> Decimal:
+    offset = day.toordinal() - self._first
+    if not 0 <= offset < self.days:
+      raise ValueError(f"{day.isoformat()} is outside the forecast.")
+    return from_cents(int(self.balance_cents()[offset]))
+
+  def lowest(self) -> tuple[date, Decimal]:
+    # The earliest day the balance is lowest, and that balance.
+    curve = self.balance_cents()
+    if _np is not None:
+      offset = int(_np.argmin(curve))
+    else:
+      offset = min(range(self.days), key=curve.__getitem__)
+    return self.start + timedelta(days=offset), from_cents(int(curve[offset]))
+
+  def month_ends(self) -> dict[str, Decimal]:
+    # Closing balance on the last forecast day of each month.
+    curve = self.balance_cents()
+    balances: dict[str, Decimal] = {}
+    last = month_index(self.end)
+    for index in range(month_index(self.start), last + 1):
+      day = self.end if index == last else day_in_month(index, 31)
+      balances[f"{index // 12:04d}-{index % 12 + 1:02d}"] = from_cents(int(curve[day.toordinal() - self._first]))
+    return balances
+
+  def _retract(self, rule_id: int) -> None:
+    if rule_id in self._pending:
+      self._pending.discard(rule_id)
+      return
+    offsets = self._offsets.pop(rule_id)
+    self._apply(offsets, -to_cents(self._rules[rule_id].amount))
+
+  def _expand_pending(self) -> None:
+    if not self._pending:
+      return
+    rule_ids = sorted(self._pending)
+    rules = [self._rules[rule_id] for rule_id in rule_ids]
+    self._pending.clear()
+    if _np is None:
+      for rule_id, rule in zip(rule_ids, rules):
+        offsets = array("q", (day.toordinal() - self._first for day in rule.occurrences(self.start, self.end)))
+        self._offsets[rule_id] = offsets
+        self._apply(offsets, to_cents(rule.amount))
+      return
+
+    offsets, bounds = self._expand_vectorised(rules)
+    for rule_id, (low, high) in zip(rule_ids, bounds):
+      self._offsets[rule_id] = offsets[low:high]
+    # Each offset's amount, in the flat array's order.
+    order = sorted(range(len(rules)), key=bounds.__getitem__)
+    amounts = _np.array([to_cents(rules[index].amount) for index in order], dtype=_np.int64)
+    self._apply(offsets, _np.repeat(amounts, [bounds[index][1] - bounds[index][0] for index in order]))
+
+  def _expand_vectorised(self, rules: list[RecurringRule]) -> tuple[Any, list[tuple[int, int]]]:
+    # Day offsets of every rule's occurrences within the horizon, laid out
+    # rule after rule in one flat array, and each rule's slice of it.
+    first = self._first
+    last = first + self.days - 1
+    pieces = []
+    bounds: list[tuple[int, int]] = [(0, 0)] * len(rules)
+    position = 0
+    for monthly in (False, True):
+      members = [index for index, rule in enumerate(rules) if (rule.step_days is None) == monthly]
+      if not members:
+        continue
+      group = [rules[index] for index in members]
+      starts = _np.array([rule.start.toordinal() for rule in group], dtype=_np.int64)
+      lows = _np.maximum(starts, first)
+      highs = _np.array([last if rule.end is None else min(last, rule.end.toordinal()) for rule in group], dtype=_np.int64)
+      expand = _monthly_ordinals if monthly else _stepped_ordinals
+      ordinals, counts = expand(group, starts, lows, highs)
+      ends = (position + _np.cumsum(counts)).tolist()
+      for index, end, count in zip(members, ends, counts.tolist()):
+        bounds[index] = (end - count, end)
+      position = ends[-1]
+      pieces.append(ordinals - first)
+    return _np.concatenate(pieces), bounds
+
+  def _apply(self, offsets: Sequence[int], cents: Any) -> None:
+    # Adds ``cents`` (one amount, or one per offset) on each offset's day.
+    if not len(offsets):
+      return
+    if _np is not None:
+      _np.add.at(self._deltas, offsets, cents)
+      touched = _np.zeros(self._segments, dtype=bool)
+      touched[_np.asarray(offsets) // SEGMENT_DAYS] = True
+      self._dirty.update(_np.flatnonzero(touched).tolist())
+    else:
+      deltas = self._deltas
+      for offset in offsets:
+        deltas[offset] += cents
+      self._dirty.update(offset // SEGMENT_DAYS for offset in offsets)
+    self._curve = None
+
+  def _sum_curve(self) -> Sequence[int]:
+    # Re-sums the dirty segments, then adds each segment's carried total.
+    within, deltas = self._within, self._deltas
+    for segment in self._dirty:
+      low = segment * SEGMENT_DAYS
+      high = min(low + SEGMENT_DAYS, self.days)
+      if _np is not None:
+        _np.cumsum(deltas[low:high], out=within[low:high])
+      else:
+        within[low:high] = accumulate(deltas[low:high])
+    self._dirty.clear()
+
+    if _np is not None:
+      carry = _np.full(self._segments, self._opening, dtype=_np.int64)
+      carry[1:] += _np.cumsum(within[SEGMENT_DAYS - 1::SEGMENT_DAYS][: self._segments - 1])
+      curve = within + _np.repeat(carry, SEGMENT_DAYS)[: self.days]
+      curve.flags.writeable = False
+      return curve
+
+    curve = array("q")
+    running = self._opening
+    for low in range(0, self.days, SEGMENT_DAYS):
+      high = min(low + SEGMENT_DAYS, self.days)
+      curve.extend([running + value for value in within[low:high]])
+      running += within[high - 1]
+    return curve
+
+def _stepped_ordinals(rules: list[RecurringRule], starts: Any, lows: Any, highs: Any) -> tuple[Any, Any]:
+  # A daily or weekly rule's k-th occurrence is start + k * step.  The k
+  # range within [low, high] gives each rule's count; the occurrences of all
+  # the rules are then one arange scaled and shifted per rule.
+  steps = _np.array([rule.step_days for rule in rules], dtype=_np.int64)
+  firsts = _ceil_div(lows - starts, steps)
+  counts = _np.maximum((highs - starts) // steps - firsts + 1, 0)
+  before = _np.cumsum(counts) - counts
+  origins = starts + (firsts - before) * steps
+  total = int(counts.sum())
+  return _np.repeat(origins, counts) + _np.arange(total, dtype=_np.int64) * _np.repeat(steps, counts), counts
+
+def _monthly_ordinals(rules: list[RecurringRule], starts: Any, lows: Any, highs: Any) -> tuple[Any, Any]:
+  # The same in months: the k-th occurrence falls in month base + k *
+  # interval, on the start's day or the month's last.  The first and last
+  # months can hold a day just outside [low, high], which is dropped.
+  intervals = _np.array([rule.interval for rule in rules], dtype=_np.int64)
+  bases = _months(starts)
+  firsts = _ceil_div(_months(lows) - bases, intervals)
+  counts = _np.maximum((_months(highs) - bases) // intervals - firsts + 1, 0)
+  owner = _np.repeat(_np.arange(len(rules)), counts)
+  k = _np.arange(int(counts.sum()), dtype=_np.int64) - _np.repeat(_np.cumsum(counts) - counts - firsts, counts)
+  months = (bases[owner] + k * intervals[owner] - _EPOCH_MONTH).astype("datetime64[M]")
+  month_starts = months.astype("datetime64[D]")
+  lengths = ((months + 1).astype("datetime64[D]") - month_starts).astype(_np.int64)
+  anchors = _np.array([rule.start.day for rule in rules], dtype=_np.int64)[owner]
+  ordinals = month_starts.astype(_np.int64) + _EPOCH_ORDINAL + _np.minimum(anchors, lengths) - 1
+  keep = (ordinals >= lows[owner]) & (ordinals <= highs[owner])
+  return ordinals[keep], _np.bincount(owner[keep], minlength=len(rules))
+
+def _months(ordinals: Any) -> Any:
+  # month_index() of each date ordinal.
+  return (ordinals - _EPOCH_ORDINAL).astype("datetime64[D]").astype("datetime64[M]").astype(_np.int64) + _EPOCH_MONTH
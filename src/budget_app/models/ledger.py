@@ -0,0 +1,390 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Callable, Collection, Iterable, Iterator
+
+from budget_app.models.search import SearchIndex, SearchQuery
+from budget_app.models.transaction import Transaction
+
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+
+def _date_key(day: date, tx_id: int) -> int:
+  return (day.toordinal() << _ID_BITS) | tx_id
+
+# Sort key per Treeview column.  Amounts compare as floats, several times
+# cheaper to build and compare than Decimals and exact to the cent; text
+# compares without regard to case.
+_SORT_KEYS: dict[str, Callable[[Transaction], Any]] = {
+  "date": lambda tx: tx.date.toordinal(),
+  "category": lambda tx: tx.category.casefold(),
+  "memo": lambda tx: tx.memo.casefold(),
+  "amount": lambda tx: float(tx.amount),
+}
+SORT_COLUMNS = tuple(_SORT_KEYS)
+
+def _sort_key(column: str) -> Callable[[Transaction], Any]:
+  try:
+    return _SORT_KEYS[column]
+  except KeyError:
+    raise ValueError(f"Cannot sort by {column!r}.") from None
+
+class _SortOrder:
+  # One column's permutation: ``ids`` ordered by (key, id), with the keys in
+  # a parallel list for bisect.  Equal keys form a run whose IDs ascend, so
+  # an entry is two bisects away.  ``ids`` is only ever changed in place,
+  # so a view holding it follows edits without asking again.
+  __slots__ = ("_key", "_keys", "ids")
+
+  def __init__(self, key: Callable[[Transaction], Any], items: Iterable[tuple[int, Transaction]]) -> None:
+    self._key = key
+    ids: list[int] = []
+    keys: list[Any] = []
+    for tx_id, tx in items:
+      ids.append(tx_id)
+      keys.append(key(tx))
+    # ``items`` come in ID order and the sort is stable, so ties stay in
+    # ID order.
+    permutation = sorted(range(len(keys)), key=keys.__getitem__)
+    self._keys = [keys[index] for index in permutation]
+    self.ids = array("q", [ids[index] for index in permutation])
+
+  def rank(self, tx_id: int, tx: Transaction) -> int:
+    return self._locate(self._key(tx), tx_id)
+
+  def add(self, tx_id: int, tx: Transaction) -> None:
+    key = self._key(tx)
+    position = self._locate(key, tx_id)
+    self._keys.insert(position, key)
+    self.ids.insert(position, tx_id)
+
+  def add_many(self, items: list[tuple[int, Transaction]]) -> None:
+    if len(items) < 64:
+      for tx_id, tx in items:
+        self.add(tx_id, tx)
+      return
+    # Two sorted runs, which the sort merges in close to linear time.
+    key = self._key
+    pairs = sorted([*zip(self._keys, self.ids), *((key(tx), tx_id) for tx_id, tx in items)])
+    self._keys = [pair[0] for pair in pairs]
+    self.ids[:] = array("q", [pair[1] for pair in pairs])
+
+  def remove(self, tx_id: int, tx: Transaction) -> None:
+    position = self.rank(tx_id, tx)
+    del self._keys[position]
+    del self.ids[position]
+
+  def discard_many(self, gone: Collection[int]) -> None:
+    kept = [(key, tx_id) for key, tx_id in zip(self._keys, self.ids) if tx_id not in gone]
+    self._keys = [pair[0] for pair in kept]
+    self.ids[:] = array("q", [pair[1] for pair in kept])
+
+  def _locate(self, key: Any, tx_id: int) -> int:
+    low = bisect_left(self._keys, key)
+    high = bisect_right(self._keys, key, low)
+    return bisect_left(self.ids, tx_id, low, high)
+
+class Ledger:
+  # Transactions keyed by stable integer IDs handed out in insertion order.
+  # ``_ids`` keeps the IDs in that order, so a row's position is a bisect
+  # away, and ``_by_date`` packs (date ordinal, id) into one sorted int64
+  # array for range queries.  A removed row stays in both as a tombstone,
+  # listed in ``_removed``, until the next read of either (see _compact).  With ``search_index`` it also maintains
+  # a SearchIndex (memo/category words and amounts) for search().  Column
+  # sort orders are built the first time a column is sorted and kept up to
+  # date from then on.
+  def __init__(self, transactions: Iterable[Transaction] = (), *, search_index: bool = False) -> None:
+    self._by_id: dict[int, Transaction] = {}
+    self._ids = array("q")
+    self._by_date = array("q")
+    self._by_category: dict[str, set[int]] = {}
+    self._search: SearchIndex | None = SearchIndex() if search_index else None
+    self._orders: dict[str, _SortOrder] = {}
+    self._removed: dict[int, Transaction] = {}
+    self._next_id = 0
+    self.add_many(transactions)
+
+  def __len__(self) -> int:
+    return len(self._by_id)
+
+  def __contains__(self, tx_id: object) -> bool:
+    return tx_id in self._by_id
+
+  def __iter__(self) -> Iterator[Transaction]:
+    self._compact()
+    by_id = self._by_id
+    return (by_id[tx_id] for tx_id in self._ids)
+
+  def get(self, tx_id: int) -> Transaction:
+    return self._by_id[tx_id]
+
+  def transactions(self) -> list[Transaction]:
+    return list(self)
+
+  def items(self) -> Iterator[tuple[int, Transaction]]:
+    self._compact()
+    by_id = self._by_id
+    return ((tx_id, by_id[tx_id]) for tx_id in self._ids)
+
+  def id_at(self, position: int) -> int:
+    self._compact()
+    return self._ids[position]
+
+  def position_of(self, tx_id: int) -> int:
+    self._compact()
+    position = bisect_left(self._ids, tx_id)
+    if position == len(self._ids) or self._ids[position] != tx_id:
+      raise KeyError(tx_id)
+    return position
+
+  def categories(self) -> list[str]:
+    return sorted(self._by_category)
+
+  def add(self, tx: Transaction) -> int:
+    tx_id = self._next_id
+    self._next_id += 1
+    self._by_id[tx_id] = tx
+    self._ids.append(tx_id)
+    self._index(tx_id, tx)
+    for order in self._orders.values():
+      order.add(tx_id, tx)
+    return tx_id
+
+  def add_many(self, transactions: Iterable[Transaction]) -> list[int]:
+    # Bulk loads append everything and sort the date index once, rather than
+    # shifting the array for every row.
+    added: list[int] = []
+    keys: list[int] = []
+    by_category = self._by_category
+    search = self._search
+    for tx in transactions:
+      tx_id = self._next_id
+      self._next_id += 1
+      self._by_id[tx_id] = tx
+      added.append(tx_id)
+      keys.append(_date_key(tx.date, tx_id))
+      by_category.setdefault(tx.category, set()).add(tx_id)
+    if search is not None:
+      search.add_many((tx_id, self._by_id[tx_id]) for tx_id in added)
+    if self._orders:
+      items = [(tx_id, self._by_id[tx_id]) for tx_id in added]
+      for order in self._orders.values():
+        order.add_many(items)
+    self._ids.extend(added)
+    if len(keys) < 64:
+      for key in keys:
+        self._by_date.insert(bisect_left(self._by_date, key), key)
+    else:
+      self._by_date = array("q", sorted([*self._by_date, *keys]))
+    return added
+
+  def update(self, tx_id: int, tx: Transaction) -> Transaction:
+    previous = self._by_id[tx_id]
+    self._unindex(tx_id, previous)
+    self._by_id[tx_id] = tx
+    self._index(tx_id, tx)
+    for order in self._orders.values():
+      order.remove(tx_id, previous)
+      order.add(tx_id, tx)
+    return previous
+
+  def remove(self, tx_id: int) -> Transaction:
+    # O(1) for the ledger's own structures: ``_ids`` and ``_by_date`` keep
+    # a tombstone until the next read compacts them.  Column orders in use
+    # are updated at once, since views hold them.
+    tx = self._by_id.pop(tx_id)
+    self._removed[tx_id] = tx
+    self._discard_category(tx_id, tx.category)
+    if self._search is not None:
+      self._search.remove(tx_id, tx)
+    for order in self._orders.values():
+      order.remove(tx_id, tx)
+    return tx
+
+  def remove_many(self, tx_ids: Iterable[int]) -> list[Transaction]:
+    # Every ID is checked before anything changes, so an unknown or
+    # repeated one leaves the ledger as it was.
+    tx_ids = list(tx_ids)
+    seen: set[int] = set()
+    for tx_id in tx_ids:
+      if tx_id not in self._by_id or tx_id in seen:
+        raise KeyError(tx_id)
+      seen.add(tx_id)
+    if len(tx_ids) < 64:
+      return [self.remove(tx_id) for tx_id in tx_ids]
+    # Many removals at once filter the column orders in a single pass.
+    removed = [self._by_id.pop(tx_id) for tx_id in tx_ids]
+    for tx_id, tx in zip(tx_ids, removed):
+      self._removed[tx_id] = tx
+      self._discard_category(tx_id, tx.category)
+    for order in self._orders.values():
+      order.discard_many(seen)
+    if self._search is not None:
+      self._search.remove_many(zip(tx_ids, removed))
+    return removed
+
+  def restore(self, tx_id: int, tx: Transaction) -> None:
+    # Puts a removed transaction back under its original ID and position.
+    if tx_id in self._by_id or tx_id >= self._next_id:
+      raise KeyError(tx_id)
+    self._compact()
+    self._by_id[tx_id] = tx
+    self._ids.insert(bisect_left(self._ids, tx_id), tx_id)
+    self._index(tx_id, tx)
+    for order in self._orders.values():
+      order.add(tx_id, tx)
+
+  def restore_many(self, items: Iterable[tuple[int, Transaction]]) -> None:
+    # The undo of remove_many(), with the same single rebuild for many rows.
+    items = list(items)
+    if len(items) < 64:
+      for tx_id, tx in items:
+        self.restore(tx_id, tx)
+      return
+    seen: set[int] = set()
+    for tx_id, _ in items:
+      if tx_id in self._by_id or tx_id >= self._next_id or tx_id in seen:
+        raise KeyError(tx_id)
+      seen.add(tx_id)
+    self._compact()
+    for tx_id, tx in items:
+      self._by_id[tx_id] = tx
+      self._by_category.setdefault(tx.category, set()).add(tx_id)
+    self._ids = array("q", sorted([*self._ids, *seen]))
+    self._by_date = array("q", sorted([*self._by_date, *(_date_key(tx.date, tx_id) for tx_id, tx in items)]))
+    for order in self._orders.values():
+      order.add_many(items)
+    if self._search is not None:
+      self._search.add_many(items)
+
+  def between(self, start: date | None = None, end: date | None = None) -> list[int]:
+    self._compact()
+    low = 0 if start is None else bisect_left(self._by_date, _date_key(start, 0))
+    if end is None:
+      high = len(self._by_date)
+    else:
+      high = bisect_right(self._by_date, _date_key(end, _ID_MASK))
+    return [key & _ID_MASK for key in self._by_date[low:high]]
+
+  def in_category(self, category: str) -> frozenset[int]:
+    return frozenset(self._by_category.get(category, ()))
+
+  def query(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> list[int]:
+    # IDs ordered by (date, id).
+    if category is not None and start is None and end is None:
+      members = self._by_category.get(category, set())
+      by_id = self._by_id
+      return sorted(members, key=lambda tx_id: (by_id[tx_id].date, tx_id))
+    ids = self.between(start, end)
+    if category is not None:
+      members = self._by_category.get(category, set())
+      ids = [tx_id for tx_id in ids if tx_id in members]
+    return ids
+
+  def search(self, query: SearchQuery) -> list[int]:
+    # IDs matching the query, in insertion order.  Each predicate is
+    # answered from its own index; the smallest candidate set is then
+    # intersected with the rest.
+    if self._search is None:
+      raise RuntimeError("This ledger was created without a search index.")
+    candidates: list[Iterable[int]] = []
+    if query.terms:
+      candidates.append(self._search.match(query.terms))
+    if query.start is not None or query.end is not None:
+      candidates.append(self.between(query.start, query.end))
+    low, high = query.min_amount, query.max_amount
+    if low is not None or high is not None:
+      by_id = self._by_id
+      candidates.append([
+        tx_id
+        for tx_id in self._search.amount_between(low, high)
+        if (low is None or abs(by_id[tx_id].amount) >= low) and (high is None or abs(by_id[tx_id].amount) <= high)
+      ])
+    if not candidates:
+      self._compact()
+      return list(self._ids)
+    if len(candidates) == 1:
+      return sorted(candidates[0])
+
+    candidates.sort(key=len)
+    result = set(candidates[0])
+    for ids in candidates[1:]:
+      if not result:
+        break
+      result.intersection_update(ids)
+    return sorted(result)
+
+  def sorted_ids(self, column: str) -> array:
+    # Every ID ordered by ``column`` ascending (reverse it for descending).
+    # The array is the cached order itself and changes as the ledger does;
+    # callers must not modify it.
+    return self._order(column).ids
+
+  def sort_rank(self, column: str, tx_id: int) -> int:
+    return self._order(column).rank(tx_id, self._by_id[tx_id])
+
+  def sort_ids(self, column: str, tx_ids: Collection[int], *, descending: bool = False) -> list[int]:
+    # ``tx_ids`` (say, search matches) in ``column`` order.  A small subset
+    # is sorted by key; a large one is picked out of the cached order.
+    if len(tx_ids) * 8 < len(self):
+      key = _sort_key(column)
+      by_id = self._by_id
+      ordered = sorted(tx_ids)
+      ordered.sort(key=lambda tx_id: key(by_id[tx_id]))
+      if descending:
+        ordered.reverse()
+      return ordered
+    members = tx_ids if isinstance(tx_ids, (set, frozenset)) else set(tx_ids)
+    ordered = [tx_id for tx_id in self.sorted_ids(column) if tx_id in members]
+    if descending:
+      ordered.reverse()
+    return ordered
+
+  def _order(self, column: str) -> _SortOrder:
+    order = self._orders.get(column)
+    if order is None:
+      order = self._orders[column] = _SortOrder(_sort_key(column), self.items())
+    return order
+
+  def _index(self, tx_id: int, tx: Transaction) -> None:
+    key = _date_key(tx.date, tx_id)
+    self._by_date.insert(bisect_left(self._by_date, key), key)
+    self._by_category.setdefault(tx.category, set()).add(tx_id)
+    if self._search is not None:
+      self._search.add(tx_id, tx)
+
+  def _compact(self) -> None:
+    # Drops the tombstones of removed rows from ``_ids`` and ``_by_date``: a
+    # few by bisect, many in one filtering pass.
+    removed = self._removed
+    if not removed:
+      return
+    if len(removed) < 64:
+      for tx_id, tx in removed.items():
+        del self._ids[bisect_left(self._ids, tx_id)]
+        del self._by_date[bisect_left(self._by_date, _date_key(tx.date, tx_id))]
+    else:
+      self._ids = array("q", (tx_id for tx_id in self._ids if tx_id not in removed))
+      self._by_date = array("q", (key for key in self._by_date if key & _ID_MASK not in removed))
+    removed.clear()
+
+  def _unindex(self, tx_id: int, tx: Transaction) -> None:
+    key = _date_key(tx.date, tx_id)
+    del self._by_date[bisect_left(self._by_date, key)]
+    self._discard_category(tx_id, tx.category)
+    if self._search is not None:
+      self._search.remove(tx_id, tx)
+
+  def _discard_category(self, tx_id: int, category: str) -> None:
+    members = self._by_category[category]
+    members.discard(tx_id)
+    if not members:
+      del self._by_category[category]
@@ -0,0 +1,14 @@
+from __future__ import annotations
+
+from decimal import Decimal
+
+CENT = Decimal("0.01")
+
+def to_cents(amount: Decimal) -> int:
+  cents = amount.scaleb(2)
+  if cents != cents.to_integral_value():
+    raise ValueError(f"Amount {amount} has more precision than whole cents.")
+  return int(cents)
+
+def from_cents(cents: int) -> Decimal:
+  return Decimal(cents).scaleb(-2)
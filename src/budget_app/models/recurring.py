@@ -0,0 +1,80 @@
+from __future__ import annotations
+
+import calendar
+from dataclasses import dataclass
+from datetime import date, timedelta
+from decimal import Decimal
+from typing import Iterator
+
+from budget_app.models.money import to_cents
+from budget_app.models.transaction import Transaction
+
+FREQUENCIES = ("day", "week", "month")
+
+def month_index(day: date) -> int:
+  return day.year * 12 + day.month - 1
+
+def day_in_month(index: int, day: int) -> date:
+  # ``day`` of month ``index`` (see month_index), or the month's last day
+  # when it is shorter.
+  year, month = divmod(index, 12)
+  return date(year, month + 1, min(day, calendar.monthrange(year, month + 1)[1]))
+
+@dataclass(slots=True, frozen=True)
+class RecurringRule:
+  # A transaction repeating every ``interval`` days, weeks or months, first
+  # on ``start`` and last on or before ``end`` when there is one.  Monthly
+  # rules keep the start's day of month, moved to the last day of shorter
+  # months: a rule from Jan 31 falls on Feb 28 (29) and then Mar 31.
+  category: str
+  amount: Decimal
+  start: date
+  frequency: str = "month"
+  interval: int = 1
+  memo: str = ""
+  end: date | None = None
+
+  def __post_init__(self) -> None:
+    if not self.category.strip():
+      raise ValueError("Recurring rules need a category.")
+    if self.frequency not in FREQUENCIES:
+      raise ValueError(f"Frequency must be one of {', '.join(FREQUENCIES)}, not {self.frequency!r}.")
+    if self.interval < 1:
+      raise ValueError("The interval must be at least 1.")
+    if self.end is not None and self.end < self.start:
+      raise ValueError("A recurring rule cannot end before it starts.")
+    to_cents(self.amount)
+
+  @property
+  def step_days(self) -> int | None:
+    # Days between occurrences; None for monthly rules, whose gaps vary.
+    if self.frequency == "month":
+      return None
+    return self.interval * (7 if self.frequency == "week" else 1)
+
+  def occurrences(self, start: date | None = None, end: date | None = None) -> Iterator[date]:
+    # Dates the rule falls on within [start, end], generated lazily; without
+    # an end (of its own or given) it never stops.
+    first = self.start if start is None else max(start, self.start)
+    last = self.end if end is None else end if self.end is None else min(end, self.end)
+    step = self.step_days
+    if step is not None:
+      skipped = -(-(first - self.start).days // step)
+      day = self.start + timedelta(days=skipped * step)
+      while last is None or day <= last:
+        yield day
+        day += timedelta(days=step)
+      return
+
+    base = month_index(self.start)
+    count = -(-(month_index(first) - base) // self.interval)
+    while True:
+      day = day_in_month(base + count * self.interval, self.start.day)
+      if last is not None and day > last:
+        return
+      if day >= first:
+        yield day
+      count += 1
+
+  def transaction(self, day: date) -> Transaction:
+    return Transaction(date=day, category=self.category, memo=self.memo, amount=self.amount)
@@ -0,0 +1,203 @@
+from __future__ import annotations
+
+from bisect import bisect_left, bisect_right, insort
+from datetime import date
+from decimal import Decimal
+from typing import Iterable, Mapping
+
+from budget_app.models.money import from_cents, to_cents
+from budget_app.models.summary import Subtotal, month_key
+from budget_app.models.transaction import Transaction
+
+try:
+  import pandas as _pd
+except ImportError:
+  _pd = None
+
+# Below this a plain loop beats building a DataFrame.
+_VECTOR_MIN = 256
+
+def shift_month(key: str, months: int) -> str:
+  year, month = divmod(int(key[:4]) * 12 + int(key[5:7]) - 1 + months, 12)
+  return f"{year:04d}-{month + 1:02d}"
+
+def month_window(end: date, months: int) -> tuple[str, str]:
+  # (first, last) month keys of the ``months`` months ending with ``end``'s.
+  last = f"{end.year:04d}-{end.month:02d}"
+  return shift_month(last, 1 - months), last
+
+class ReportCube:
+  # Income/expense subtotals for every (month, category) pair, kept up to
+  # date by delta.  Reports read the cells for the months they cover, so a
+  # query costs months x categories however long the ledger is.  Months are
+  # "YYYY-MM" keys, which sort chronologically.
+  def __init__(self, transactions: Iterable[Transaction] = ()) -> None:
+    self._cells: dict[str, dict[str, Subtotal]] = {}
+    self._months: list[str] = []
+    self.add_many(transactions)
+
+  def months(self) -> list[str]:
+    return list(self._months)
+
+  def categories(self) -> list[str]:
+    return sorted({category for row in self._cells.values() for category in row})
+
+  def cell(self, month: str, category: str) -> Subtotal:
+    return self._cells.get(month, {}).get(category, Subtotal())
+
+  def add(self, tx: Transaction) -> None:
+    self._apply(month_key(tx), tx.category, tx.amount, 1)
+
+  def remove(self, tx: Transaction) -> None:
+    self._apply(month_key(tx), tx.category, tx.amount, -1)
+
+  def replace(self, old: Transaction, new: Transaction) -> None:
+    self.remove(old)
+    self.add(new)
+
+  def clear(self) -> None:
+    self._cells.clear()
+    self._months.clear()
+
+  def add_many(self, transactions: Iterable[Transaction]) -> None:
+    # With pandas installed, large batches are grouped in one vectorised
+    # pass over integer cents and merged cell by cell.  Amounts finer than
+    # a cent cannot go through cents, so such batches take the plain loop.
+    transactions = list(transactions)
+    if _pd is not None and len(transactions) >= _VECTOR_MIN:
+      try:
+        cents = [to_cents(tx.amount) for tx in transactions]
+      except ValueError:
+        pass
+      else:
+        self._merge_frame(transactions, cents)
+        return
+    for tx in transactions:
+      self.add(tx)
+
+  def rebuild(self, transactions: Iterable[Transaction]) -> None:
+    self.clear()
+    self.add_many(transactions)
+
+  def restore(self, cells: Mapping[tuple[str, str], Subtotal]) -> None:
+    # Replaces the contents with (month, category) -> subtotal cells, such
+    # as SummaryAggregates.cells or a cached summary, without a ledger pass.
+    self.clear()
+    for (month, category), cell in cells.items():
+      self._row(month)[category] = Subtotal(cell.income, cell.expenses, cell.count)
+
+  def category_by_month(
+    self,
+    start: str | None = None,
+    end: str | None = None,
+  ) -> dict[str, dict[str, Subtotal]]:
+    # category -> month -> subtotal, for months in [start, end].
+    table: dict[str, dict[str, Subtotal]] = {}
+    for month in self._months_between(start, end):
+      for category, subtotal in self._cells[month].items():
+        table.setdefault(category, {})[month] = subtotal
+    return table
+
+  def totals_by_category(self, start: str | None = None, end: str | None = None) -> dict[str, Subtotal]:
+    totals: dict[str, Subtotal] = {}
+    for month in self._months_between(start, end):
+      for category, subtotal in self._cells[month].items():
+        _accumulate(totals, category, subtotal)
+    return totals
+
+  def totals_by_month(self, start: str | None = None, end: str | None = None) -> dict[str, Subtotal]:
+    totals: dict[str, Subtotal] = {}
+    for month in self._months_between(start, end):
+      for subtotal in self._cells[month].values():
+        _accumulate(totals, month, subtotal)
+    return totals
+
+  def table(
+    self,
+    start: str | None = None,
+    end: str | None = None,
+    *,
+    field: str = "expenses",
+  ) -> tuple[list[str], list[tuple[str, list[Decimal | None], Decimal]]]:
+    # Every month from ``start`` to ``end`` (or the first/last month with
+    # data) and one (category, per-month values, total) row per category,
+    # ready to render.  ``field`` is "income", "expenses" or "balance".
+    if not self._months:
+      return [], []
+    first = self._months[0] if start is None else start
+    last = self._months[-1] if end is None else end
+    months = []
+    month = first
+    while month <= last:
+      months.append(month)
+      month = shift_month(month, 1)
+
+    by_month = self.category_by_month(first, last)
+    totals = self.totals_by_category(first, last)
+    rows = []
+    for category in sorted(by_month):
+      cells = by_month[category]
+      values = [getattr(cells[month], field) if month in cells else None for month in months]
+      rows.append((category, values, getattr(totals[category], field)))
+    return months, rows
+
+  def snapshot(self) -> dict[tuple[str, str], tuple[object, ...]]:
+    return {
+      (month, category): (subtotal.income, subtotal.expenses, subtotal.count)
+      for month, row in self._cells.items()
+      for category, subtotal in row.items()
+    }
+
+  def _months_between(self, start: str | None, end: str | None) -> list[str]:
+    low = 0 if start is None else bisect_left(self._months, start)
+    high = len(self._months) if end is None else bisect_right(self._months, end)
+    return self._months[low:high]
+
+  def _row(self, month: str) -> dict[str, Subtotal]:
+    row = self._cells.get(month)
+    if row is None:
+      row = self._cells[month] = {}
+      insort(self._months, month)
+    return row
+
+  def _apply(self, month: str, category: str, amount: Decimal, sign: int) -> None:
+    row = self._row(month)
+    subtotal = row.get(category)
+    if subtotal is None:
+      subtotal = row[category] = Subtotal()
+    subtotal.apply(amount, sign)
+    if subtotal.count == 0:
+      del row[category]
+      if not row:
+        del self._cells[month]
+        del self._months[bisect_left(self._months, month)]
+
+  def _merge_frame(self, transactions: list[Transaction], cents: list[int]) -> None:
+    frame = _pd.DataFrame({
+      "month": [month_key(tx) for tx in transactions],
+      "category": [tx.category for tx in transactions],
+      "cents": cents,
+    })
+    frame["income"] = frame["cents"].clip(lower=0)
+    frame["expenses"] = frame["cents"].clip(upper=0)
+    grouped = frame.groupby(["month", "category"], sort=False).agg(
+      income=("income", "sum"),
+      expenses=("expenses", "sum"),
+      count=("cents", "size"),
+    )
+    for (month, category), income, expenses, count in grouped.itertuples(name=None):
+      row = self._row(month)
+      subtotal = row.get(category)
+      if subtotal is None:
+        subtotal = row[category] = Subtotal()
+      subtotal.income += from_cents(int(income))
+      subtotal.expenses += from_cents(int(expenses))
+      subtotal.count += int(count)
+
+def _accumulate(totals: dict[str, Subtotal], key: str, subtotal: Subtotal) -> None:
+  total = totals.get(key)
+  if total is None:
+    total = totals[key] = Subtotal()
+  total.income += subtotal.income
+  total.expenses += subtotal.expenses
+  total.count += subtotal.count
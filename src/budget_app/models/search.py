@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import Iterable
+
+from budget_app.models.transaction import Transaction
+
+_TOKEN = re.compile(r"\w+")
+_ID_BITS = 32
+_ID_MASK = (1 << _ID_BITS) - 1
+_MAX_CENTS = (1 << 31) - 1
+
+def tokenize(text: str) -> list[str]:
+  return _TOKEN.findall(text.casefold())
+
+def transaction_tokens(tx: Transaction) -> set[str]:
+  return {*tokenize(tx.memo), *tokenize(tx.category)}
+
+def _trigrams(token: str) -> set[str]:
+  return {token[index:index + 3] for index in range(len(token) - 2)}
+
+def _magnitude_cents(amount: Decimal) -> int:
+  # Whole cents of |amount|, truncated and capped so the packed key fits in
+  # an int64.  Range lookups widen by a cent and callers re-check exactly.
+  return min(int(abs(amount) * 100), _MAX_CENTS)
+
+def _magnitude_key(amount: Decimal, tx_id: int) -> int:
+  return (_magnitude_cents(amount) << _ID_BITS) | tx_id
+
+@dataclass(frozen=True, slots=True)
+class SearchQuery:
+  # Text terms must all match (each one anywhere inside a memo or category
+  # word, or as a word prefix when shorter than three characters).  Amount
+  # bounds apply to the magnitude, so ``min_amount=50`` finds large
+  # expenses and large incomes alike.
+  terms: tuple[str, ...] = ()
+  start: date | None = None
+  end: date | None = None
+  min_amount: Decimal | None = None
+  max_amount: Decimal | None = None
+
+  @property
+  def is_empty(self) -> bool:
+    return (
+      not self.terms
+      and self.start is None
+      and self.end is None
+      and self.min_amount is None
+      and self.max_amount is None
+    )
+
+def parse_query(text: str) -> SearchQuery:
+  # Free text plus ``from:YYYY-MM-DD``, ``to:YYYY-MM-DD``, ``min:N`` and
+  # ``max:N`` filters.  A filter that does not parse is searched as text.
+  terms: list[str] = []
+  filters: dict[str, object] = {}
+  for word in text.split():
+    key, _, value = word.partition(":")
+    key = key.lower()
+    try:
+      if key in {"from", "to"} and value:
+        filters["start" if key == "from" else "end"] = date.fromisoformat(value)
+        continue
+      if key in {"min", "max"} and value:
+        filters[f"{key}_amount"] = Decimal(value.lstrip("$")).copy_abs()
+        continue
+    except (ValueError, InvalidOperation):
+      pass
+    terms.extend(tokenize(word))
+  return SearchQuery(terms=tuple(dict.fromkeys(terms)), **filters)
+
+class SearchIndex:
+  # Inverted index from memo and category words to transaction IDs.  Next
+  # to the postings it keeps the vocabulary sorted, for prefix lookups, and
+  # a trigram -> word map, so a substring is resolved against the (small)
+  # vocabulary before any posting set is touched.  Amount magnitudes are
+  # indexed like the ledger's dates: (cents, id) packed into a sorted
+  # int64 array.
+  def __init__(self) -> None:
+    self._postings: dict[str, set[int]] = {}
+    self._vocabulary: list[str] = []
+    self._trigrams: dict[str, set[str]] = {}
+    self._by_magnitude = array("q")
+
+  def __len__(self) -> int:
+    return len(self._postings)
+
+  def add(self, tx_id: int, tx: Transaction) -> None:
+    self._add_words(tx_id, tx)
+    key = _magnitude_key(tx.amount, tx_id)
+    self._by_magnitude.insert(bisect_left(self._by_magnitude, key), key)
+
+  def add_many(self, items: Iterable[tuple[int, Transaction]]) -> None:
+    keys: list[int] = []
+    for tx_id, tx in items:
+      self._add_words(tx_id, tx)
+      keys.append(_magnitude_key(tx.amount, tx_id))
+    if len(keys) < 64:
+      for key in keys:
+        self._by_magnitude.insert(bisect_left(self._by_magnitude, key), key)
+    else:
+      self._by_magnitude = array("q", sorted([*self._by_magnitude, *keys]))
+
+  def remove(self, tx_id: int, tx: Transaction) -> None:
+    self._remove_words(tx_id, tx)
+    key = _magnitude_key(tx.amount, tx_id)
+    position = bisect_left(self._by_magnitude, key)
+    if position < len(self._by_magnitude) and self._by_magnitude[position] == key:
+      del self._by_magnitude[position]
+
+  def remove_many(self, items: Iterable[tuple[int, Transaction]]) -> None:
+    items = list(items)
+    if len(items) < 64:
+      for tx_id, tx in items:
+        self.remove(tx_id, tx)
+      return
+    gone: set[int] = set()
+    for tx_id, tx in items:
+      self._remove_words(tx_id, tx)
+      gone.add(tx_id)
+    self._by_magnitude = array("q", (key for key in self._by_magnitude if key & _ID_MASK not in gone))
+
+  def amount_between(self, low: Decimal | None = None, high: Decimal | None = None) -> list[int]:
+    # IDs whose |amount| may lie in [low, high]; whole-cent truncation means
+    # the edges can include a few near misses, never drop a match.
+    start = 0 if low is None else bisect_left(self._by_magnitude, _magnitude_cents(low) << _ID_BITS)
+    if high is None:
+      stop = len(self._by_magnitude)
+    else:
+      stop = bisect_right(self._by_magnitude, (_magnitude_cents(high) << _ID_BITS) | _ID_MASK)
+    return [key & _ID_MASK for key in self._by_magnitude[start:stop]]
+
+  def words_matching(self, term: str) -> list[str]:
+    if len(term) < 3:
+      # Too short for trigrams, and as a substring it would match nearly
+      # everything, so short terms only match word prefixes.
+      low = bisect_left(self._vocabulary, term)
+      high = bisect_left(self._vocabulary, term + "\U0010ffff")
+      return self._vocabulary[low:high]
+    candidates: set[str] | None = None
+    for gram in sorted(_trigrams(term), key=lambda gram: len(self._trigrams.get(gram, ()))):
+      words = self._trigrams.get(gram)
+      if not words:
+        return []
+      candidates = set(words) if candidates is None else candidates & words
+      if not candidates:
+        return []
+    assert candidates is not None
+    return [word for word in candidates if term in word]
+
+  def match(self, terms: Iterable[str]) -> set[int]:
+    # IDs whose words match every term, intersecting smallest first.
+    matches: list[set[int]] = []
+    for term in terms:
+      words = self.words_matching(term)
+      if not words:
+        return set()
+      if len(words) == 1:
+        matches.append(self._postings[words[0]])
+      else:
+        matches.append(set().union(*(self._postings[word] for word in words)))
+    if not matches:
+      return set()
+    matches.sort(key=len)
+    result = set(matches[0])
+    for ids in matches[1:]:
+      result &= ids
+      if not result:
+        break
+    return result
+
+  def _add_words(self, tx_id: int, tx: Transaction) -> None:
+    postings = self._postings
+    for token in transaction_tokens(tx):
+      ids = postings.get(token)
+      if ids is None:
+        ids = postings[token] = set()
+        self._add_word(token)
+      ids.add(tx_id)
+
+  def _remove_words(self, tx_id: int, tx: Transaction) -> None:
+    for token in transaction_tokens(tx):
+      ids = self._postings.get(token)
+      if ids is None:
+        continue
+      ids.discard(tx_id)
+      if not ids:
+        del self._postings[token]
+        self._drop_word(token)
+
+  def _add_word(self, word: str) -> None:
+    insort(self._vocabulary, word)
+    for gram in _trigrams(word):
+      self._trigrams.setdefault(gram, set()).add(word)
+
+  def _drop_word(self, word: str) -> None:
+    del self._vocabulary[bisect_left(self._vocabulary, word)]
+    for gram in _trigrams(word):
+      words = self._trigrams[gram]
+      words.discard(word)
+      if not words:
+        del self._trigrams[gram]
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import Decimal
+from typing import Hashable, Iterable, Mapping
+
+from budget_app.models.transaction import Transaction
+
+ZERO = Decimal("0")
+
+def month_key(tx: Transaction) -> str:
+  return f"{tx.date.year:04d}-{tx.date.month:02d}"
+
+@dataclass(slots=True)
+class Subtotal:
+  income: Decimal = ZERO
+  expenses: Decimal = ZERO
+  count: int = 0
+
+  @property
+  def balance(self) -> Decimal:
+    return self.income + self.expenses
+
+  def apply(self, amount: Decimal, sign: int) -> None:
+    if amount >= 0:
+      self.income += sign * amount
+    else:
+      self.expenses += sign * amount
+    self.count += sign
+
+class SummaryAggregates:
+  # Running income/expense totals, plus the same split per (month, category)
+  # cell, per category and per month, all updated by delta so every
+  # mutation costs O(1) and reading a roll-up costs nothing.
+  def __init__(self, transactions: Iterable[Transaction] = (), *, debug: bool = False) -> None:
+    self.debug = debug
+    self._total = Subtotal()
+    self._cells: dict[tuple[str, str], Subtotal] = {}
+    self._by_category: dict[str, Subtotal] = {}
+    self._by_month: dict[str, Subtotal] = {}
+    for tx in transactions:
+      self.add(tx)
+
+  @classmethod
+  def from_cells(cls, cells: Mapping[tuple[str, str], Subtotal]) -> SummaryAggregates:
+    summary = cls()
+    for key, cell in cells.items():
+      summary._cells[key] = Subtotal(cell.income, cell.expenses, cell.count)
+      _merge(summary._total, cell)
+      _merge(summary._by_month.setdefault(key[0], Subtotal()), cell)
+      _merge(summary._by_category.setdefault(key[1], Subtotal()), cell)
+    return summary
+
+  @property
+  def income(self) -> Decimal:
+    return self._total.income
+
+  @property
+  def expenses(self) -> Decimal:
+    return self._total.expenses
+
+  @property
+  def balance(self) -> Decimal:
+    return self._total.balance
+
+  @property
+  def count(self) -> int:
+    return self._total.count
+
+  @property
+  def cells(self) -> Mapping[tuple[str, str], Subtotal]:
+    # (month key, category) -> subtotal
+    return self._cells
+
+  @property
+  def by_category(self) -> Mapping[str, Subtotal]:
+    return self._by_category
+
+  @property
+  def by_month(self) -> Mapping[str, Subtotal]:
+    return self._by_month
+
+  def add(self, tx: Transaction) -> None:
+    self._apply(tx, 1)
+
+  def remove(self, tx: Transaction) -> None:
+    self._apply(tx, -1)
+
+  def replace(self, old: Transaction, new: Transaction) -> None:
+    self._apply(old, -1)
+    self._apply(new, 1)
+
+  def clear(self) -> None:
+    self._total = Subtotal()
+    self._cells.clear()
+    self._by_category.clear()
+    self._by_month.clear()
+
+  def verify(self, transactions: Iterable[Transaction]) -> None:
+    expected = SummaryAggregates(transactions)._snapshot()
+    actual = self._snapshot()
+    if actual != expected:
+      raise AssertionError(f"Running summary drifted from a full recompute: {actual!r} != {expected!r}")
+
+  def _snapshot(self) -> tuple[object, ...]:
+    return (
+      _as_tuple(self._total),
+      {key: _as_tuple(value) for key, value in self._cells.items()},
+      {key: _as_tuple(value) for key, value in self._by_category.items()},
+      {key: _as_tuple(value) for key, value in self._by_month.items()},
+    )
+
+  def _apply(self, tx: Transaction, sign: int) -> None:
+    amount = tx.amount
+    self._total.apply(amount, sign)
+    month = month_key(tx)
+    _apply_bucket(self._cells, (month, tx.category), amount, sign)
+    _apply_bucket(self._by_category, tx.category, amount, sign)
+    _apply_bucket(self._by_month, month, amount, sign)
+
+def _apply_bucket(buckets: dict, key: Hashable, amount: Decimal, sign: int) -> None:
+  bucket = buckets.get(key)
+  if bucket is None:
+    bucket = buckets[key] = Subtotal()
+  bucket.apply(amount, sign)
+  if bucket.count == 0:
+    del buckets[key]
+
+def _merge(total: Subtotal, cell: Subtotal) -> None:
+  total.income += cell.income
+  total.expenses += cell.expenses
+  total.count += cell.count
+
+def _as_tuple(subtotal: Subtotal) -> tuple[Decimal, Decimal, int]:
+  return (subtotal.income, subtotal.expenses, subtotal.count)
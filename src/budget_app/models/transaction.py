@@ -2,9 +2,11 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import date
-from decimal import Decimal, InvalidOperation
+from decimal import Decimal
 from typing import Self
 
+from budget_app.utils.validators import FORM_VALIDATOR
+
 @dataclass(slots=True, frozen=True)
 class Transaction:
   date: date
@@ -22,26 +24,12 @@ class Transaction:
     raw_amount: str,
     raw_kind: str,
   ) -> Self:
-    category = raw_category.strip()
-    memo = raw_memo.strip()
-    kind = raw_kind.strip().lower()
-
-    if not category:
-      raise ValueError("Category cannot be empty.")
-    if kind not in {"income", "expense"}:
-      raise ValueError("Select Income or Expense.")
-    
-    try:
-      parsed_date = date.fromisoformat(raw_date.strip())
-    except ValueError as exc:
-      raise ValueError("Use YYYY-MM-DD format.") from exc
-    
-    try: 
-      parsed_amount = Decimal(raw_amount.strip())
-    except (InvalidOperation, ValueError) as exc:
-      raise ValueError("Enter a valid numeric amount.") from exc
-    
-    magnitude = parsed_amount.copy_abs()
-    amount = magnitude if kind == "income" else -magnitude
-
-    return cls(date=parsed_date, category=category, memo=memo, amount=amount)
\ No newline at end of file
+    # The form is a one-row batch: same rules, same messages.
+    parsed_date, category, memo, amount = FORM_VALIDATOR.fields(
+      raw_date=raw_date,
+      raw_category=raw_category,
+      raw_memo=raw_memo,
+      raw_amount=raw_amount,
+      raw_kind=raw_kind,
+    )
+    return cls(date=parsed_date, category=category, memo=memo, amount=amount)
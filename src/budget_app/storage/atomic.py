@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Any, Iterator
+
+@contextmanager
+def atomic_write(path: Path, mode: str = "w", *, encoding: str | None = "utf-8") -> Iterator[IO[Any]]:
+  # Writes go to a sibling temp file that is fsynced and renamed over
+  # ``path`` only once the block finishes, so readers see either the old
+  # file or the complete new one.  On error the temp file is removed.
+  path.parent.mkdir(parents=True, exist_ok=True)
+  tmp_path = path.with_name(path.name + ".tmp")
+  if "b" in mode:
+    encoding = None
+  try:
+    with open(tmp_path, mode, encoding=encoding) as handle:
+      yield handle
+      handle.flush()
+      os.fsync(handle.fileno())
+    os.replace(tmp_path, path)
+  except BaseException:
+    tmp_path.unlink(missing_ok=True)
+    raise
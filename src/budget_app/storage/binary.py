@@ -0,0 +1,327 @@
+from __future__ import annotations
+
+import mmap
+import struct
+from array import array
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from budget_app.models.money import from_cents, to_cents
+from budget_app.models.transaction import Transaction
+from budget_app.storage.atomic import atomic_write
+
+# NumPy is imported by the first vectorised read rather than with this
+# module, which the repository imports and the window with it; see _numpy.
+_UNLOADED: Any = object()
+_np: Any = _UNLOADED
+
+# File layout, all little-endian:
+#   header    see _HEADER below
+#   records   ``count`` fixed-width rows in ledger order: date ordinal (i32),
+#             category string id (u32), memo string id (u32), cents (i64)
+#   index     ``count`` u32 row numbers sorted by date, ties in ledger order
+#   strings   ``string_count + 1`` u32 offsets into the UTF-8 blob that
+#             follows; the first ``category_count`` strings are categories
+BINARY_MAGIC = b"BLDG"
+BINARY_VERSION = 1
+BINARY_SUFFIX = ".ledger"
+
+_HEADER = struct.Struct("<4sHHQqqiiIIQQQ")
+_RECORD = struct.Struct("<iIIq")
+_OFFSET = struct.Struct("<I")
+
+_RECORD_FIELDS = [("date", "<i4"), ("category", "<u4"), ("memo", "<u4"), ("cents", "<i8")]
+
+def _numpy() -> Any:
+  # The numpy module, or None when it is not installed.
+  global _np
+  if _np is _UNLOADED:
+    try:
+      import numpy
+    except ImportError:
+      numpy = None
+    _np = numpy
+  return _np
+
+def is_binary_ledger(path: Path) -> bool:
+  try:
+    with open(path, "rb") as handle:
+      return handle.read(len(BINARY_MAGIC)) == BINARY_MAGIC
+  except OSError:
+    return False
+
+def write_ledger_file(path: Path, transactions: Iterable[Transaction]) -> int:
+  # Replaces ``path`` atomically; returns the number of records.  Amounts
+  # are stored as whole cents, so finer amounts raise ValueError.
+  strings: dict[str, int] = {}
+  category_ids: list[int] = []
+  memos: list[str] = []
+  dates = array("i")
+  cents = array("q")
+  for tx in transactions:
+    cents.append(to_cents(tx.amount))
+    dates.append(tx.date.toordinal())
+    category_ids.append(strings.setdefault(tx.category, len(strings)))
+    memos.append(tx.memo)
+  category_count = len(strings)
+  # A memo equal to a category shares its string, so ids stay dense.
+  memo_ids = [strings.setdefault(memo, len(strings)) for memo in memos]
+
+  count = len(cents)
+  records = bytearray(count * _RECORD.size)
+  for row in range(count):
+    _RECORD.pack_into(records, row * _RECORD.size, dates[row], category_ids[row], memo_ids[row], cents[row])
+  index = array("I", sorted(range(count), key=dates.__getitem__))
+
+  encoded = [text.encode("utf-8") for text in strings]
+  offsets = array("I", [0])
+  for blob in encoded:
+    offsets.append(offsets[-1] + len(blob))
+
+  records_offset = _HEADER.size
+  index_offset = records_offset + len(records)
+  strings_offset = index_offset + 4 * count
+  header = _HEADER.pack(
+    BINARY_MAGIC,
+    BINARY_VERSION,
+    0,
+    count,
+    sum(value for value in cents if value >= 0),
+    sum(value for value in cents if value < 0),
+    min(dates) if count else 0,
+    max(dates) if count else 0,
+    category_count,
+    len(encoded),
+    records_offset,
+    index_offset,
+    strings_offset,
+  )
+  with atomic_write(path, "wb") as handle:
+    handle.write(header)
+    handle.write(records)
+    handle.write(_little_endian(index))
+    handle.write(_little_endian(offsets))
+    handle.write(b"".join(encoded))
+  return count
+
+def _little_endian(values: array) -> bytes:
+  if struct.pack("=I", 1) != struct.pack("<I", 1):
+    values = array(values.typecode, values)
+    values.byteswap()
+  return values.tobytes()
+
+class MappedLedger:
+  # Read-only view of a binary ledger file through mmap.  Counts and
+  # totals come from the header, date ranges are found by binary search
+  # over the date index, and only the rows (and strings) a caller asks for
+  # are decoded.  With NumPy installed, range totals run over a zero-copy
+  # view of the records.
+  def __init__(self, path: Path) -> None:
+    self.path = path
+    with open(path, "rb") as handle:
+      size = handle.seek(0, 2)
+      if size < _HEADER.size:
+        raise ValueError(f"{path} is not a budget-app ledger file.")
+      self._map = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+    try:
+      (
+        magic,
+        version,
+        _flags,
+        self._count,
+        income,
+        expenses,
+        first,
+        last,
+        self._category_count,
+        self._string_count,
+        self._records_offset,
+        self._index_offset,
+        self._strings_offset,
+      ) = _HEADER.unpack_from(self._map, 0)
+      if magic != BINARY_MAGIC:
+        raise ValueError(f"{path} is not a budget-app ledger file.")
+      if version != BINARY_VERSION:
+        raise ValueError(f"{path} uses ledger format version {version}; this version reads {BINARY_VERSION}.")
+      self._blob_offset = self._strings_offset + 4 * (self._string_count + 1)
+      if (
+        self._index_offset != self._records_offset + self._count * _RECORD.size
+        or self._strings_offset != self._index_offset + 4 * self._count
+        or self._blob_offset > size
+      ):
+        raise ValueError(f"{path} is truncated or damaged.")
+    except BaseException:
+      self._map.close()
+      raise
+    self.income = from_cents(income)
+    self.expenses = from_cents(expenses)
+    self.first_date = date.fromordinal(first) if self._count else None
+    self.last_date = date.fromordinal(last) if self._count else None
+    self._strings: dict[int, str] = {}
+
+  def __enter__(self) -> MappedLedger:
+    return self
+
+  def __exit__(self, *exc_info: object) -> None:
+    self.close()
+
+  def __len__(self) -> int:
+    return self._count
+
+  def __getitem__(self, row: int) -> Transaction:
+    if not 0 <= row < self._count:
+      raise IndexError(row)
+    return self._transaction(*_RECORD.unpack_from(self._map, self._records_offset + row * _RECORD.size))
+
+  def close(self) -> None:
+    try:
+      self._map.close()
+    except BufferError:
+      # A NumPy view is still alive; the map goes when it does.
+      pass
+
+  @property
+  def categories(self) -> list[str]:
+    return [self._string(string_id) for string_id in range(self._category_count)]
+
+  def iter_batches(self, batch_size: int) -> Iterator[list[Transaction]]:
+    # Every row in ledger order.
+    strings = [self._string(string_id) for string_id in range(self._string_count)]
+    records = memoryview(self._map)[self._records_offset:self._index_offset]
+    try:
+      batch: list[Transaction] = []
+      for ordinal, category, memo, cents in _RECORD.iter_unpack(records):
+        batch.append(
+          Transaction(
+            date=date.fromordinal(ordinal),
+            category=strings[category],
+            memo=strings[memo],
+            amount=from_cents(cents),
+          )
+        )
+        if len(batch) >= batch_size:
+          yield batch
+          batch = []
+      if batch:
+        yield batch
+    finally:
+      records.release()
+
+  def count(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> int:
+    low, high = self._index_range(start, end)
+    if category is None:
+      return high - low
+    return len(self._rows(low, high, category))
+
+  def totals(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> tuple[Decimal, Decimal]:
+    # (income, expenses), like SQLiteTransactionRepository.totals().
+    if start is None and end is None and category is None:
+      return self.income, self.expenses
+    low, high = self._index_range(start, end)
+    if _numpy() is not None:
+      cents = self._records()["cents"][self._rows(low, high, category)]
+      return from_cents(int(cents[cents >= 0].sum())), from_cents(int(cents[cents < 0].sum()))
+    income = expenses = 0
+    for row in self._rows(low, high, category):
+      value = self._cents(row)
+      if value >= 0:
+        income += value
+      else:
+        expenses += value
+    return from_cents(income), from_cents(expenses)
+
+  def iter_transactions(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> Iterator[Transaction]:
+    # Matching rows ordered by date, then ledger order.
+    low, high = self._index_range(start, end)
+    for row in self._rows(low, high, category):
+      yield self[int(row)]
+
+  def _index_range(self, start: date | None, end: date | None) -> tuple[int, int]:
+    low = 0 if start is None else self._bisect(start.toordinal(), after=False)
+    high = self._count if end is None else self._bisect(end.toordinal(), after=True)
+    return low, max(low, high)
+
+  def _bisect(self, ordinal: int, *, after: bool) -> int:
+    # First index position whose date is >= ``ordinal`` (> with ``after``).
+    low, high = 0, self._count
+    while low < high:
+      middle = (low + high) // 2
+      day = self._date(self._row_at(middle))
+      if day < ordinal or (after and day == ordinal):
+        low = middle + 1
+      else:
+        high = middle
+    return low
+
+  def _rows(self, low: int, high: int, category: str | None) -> Any:
+    # Row numbers at index positions [low, high), optionally of one category.
+    code = None if category is None else self._category_id(category)
+    np = _numpy()
+    if np is not None:
+      rows = np.frombuffer(self._map, dtype="<u4", count=high - low, offset=self._index_offset + 4 * low)
+      rows = rows.astype(np.intp)
+      if code is not None:
+        rows = rows[self._records()["category"][rows] == code]
+      return rows
+    rows = [self._row_at(position) for position in range(low, high)]
+    if code is None:
+      return rows
+    return [row for row in rows if self._category_at(row) == code]
+
+  def _records(self) -> Any:
+    np = _numpy()
+    return np.frombuffer(self._map, dtype=np.dtype(_RECORD_FIELDS), count=self._count, offset=self._records_offset)
+
+  def _category_id(self, category: str) -> int:
+    for string_id in range(self._category_count):
+      if self._string(string_id) == category:
+        return string_id
+    return -1
+
+  def _row_at(self, position: int) -> int:
+    return _OFFSET.unpack_from(self._map, self._index_offset + 4 * position)[0]
+
+  def _date(self, row: int) -> int:
+    return struct.unpack_from("<i", self._map, self._records_offset + row * _RECORD.size)[0]
+
+  def _category_at(self, row: int) -> int:
+    return _OFFSET.unpack_from(self._map, self._records_offset + row * _RECORD.size + 4)[0]
+
+  def _cents(self, row: int) -> int:
+    return struct.unpack_from("<q", self._map, self._records_offset + row * _RECORD.size + 12)[0]
+
+  def _transaction(self, ordinal: int, category: int, memo: int, cents: int) -> Transaction:
+    return Transaction(
+      date=date.fromordinal(ordinal),
+      category=self._string(category),
+      memo=self._string(memo),
+      amount=from_cents(cents),
+    )
+
+  def _string(self, string_id: int) -> str:
+    text = self._strings.get(string_id)
+    if text is None:
+      start, end = struct.unpack_from("<II", self._map, self._strings_offset + 4 * string_id)
+      text = self._map[self._blob_offset + start:self._blob_offset + end].decode("utf-8")
+      self._strings[string_id] = text
+    return text
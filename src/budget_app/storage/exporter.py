@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import csv
+import gzip
+import io
+from datetime import date
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from budget_app.models.columnar import ColumnarStore
+from budget_app.models.ledger import Ledger
+from budget_app.models.transaction import Transaction
+from budget_app.storage.atomic import atomic_write
+from budget_app.storage.sqlite_repository import SQLiteTransactionRepository
+
+CSV_HEADER = ("date", "category", "memo", "amount")
+
+def select_transactions(
+  source: Ledger | ColumnarStore | SQLiteTransactionRepository,
+  *,
+  start: date | None = None,
+  end: date | None = None,
+  category: str | None = None,
+) -> Iterator[Transaction]:
+  # Filters are answered by the source's own indexes, ordered by date.
+  if isinstance(source, SQLiteTransactionRepository):
+    yield from source.iter_transactions(start=start, end=end, category=category)
+    return
+  if isinstance(source, ColumnarStore):
+    categories = None if category is None else [category]
+    yield from source.iter_transactions(source.select(start=start, end=end, categories=categories, by_date=True))
+    return
+  for tx_id in source.query(start=start, end=end, category=category):
+    yield source.get(tx_id)
+
+def export_csv(
+  transactions: Iterable[Transaction],
+  path: Path,
+  *,
+  compress: bool | None = None,
+) -> int:
+  # Streams rows through csv.writer into a temp file that replaces ``path``
+  # when complete, so memory stays flat however long the ledger is.
+  # ``compress`` defaults to whether ``path`` ends in .gz.  Returns the
+  # number of rows written.
+  if compress is None:
+    compress = path.suffix.lower() == ".gz"
+  count = 0
+
+  def rows() -> Iterator[tuple[str, str, str, str]]:
+    nonlocal count
+    for tx in transactions:
+      count += 1
+      yield (tx.date.isoformat(), tx.category, tx.memo, f"{tx.amount:.2f}")
+
+  with atomic_write(path, "wb") as raw:
+    stream = gzip.GzipFile(filename=path.stem, mode="wb", fileobj=raw, compresslevel=6) if compress else raw
+    text = io.TextIOWrapper(stream, encoding="utf-8", newline="")
+    try:
+      writer = csv.writer(text)
+      writer.writerow(CSV_HEADER)
+      writer.writerows(rows())
+      text.flush()
+    finally:
+      # Leave ``raw`` open for atomic_write to fsync and rename.
+      text.detach()
+    if compress:
+      stream.close()
+  return count
@@ -0,0 +1,184 @@
+from __future__ import annotations
+
+import csv
+import io
+import os
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+from budget_app.models.transaction import Transaction
+from budget_app.storage.repository import DEFAULT_BATCH_SIZE
+from budget_app.utils.validators import TransactionValidator
+
+DEFAULT_CATEGORY = "Imported"
+MAX_REPORTED_ERRORS = 20
+
+_CSV_COLUMNS = {
+  "date": ("date", "posted", "transaction date", "posting date"),
+  "category": ("category",),
+  "memo": ("memo", "description", "payee", "name", "details", "note", "notes"),
+  "amount": ("amount", "value"),
+  "kind": ("kind", "type"),
+}
+# Bank exports often use the type column for codes like POS or ATM;
+# anything that is not an income/expense marker falls back to the sign.
+_VALIDATOR = TransactionValidator(
+  kinds={
+    "income": "income",
+    "credit": "income",
+    "expense": "expense",
+    "debit": "expense",
+  },
+  infer_unknown_kinds=True,
+  thousands_separator=",",
+)
+_OFX_TAG = re.compile(r"<(/?)([A-Za-z0-9.]+)>([^<\r\n]*)")
+
+@dataclass(slots=True)
+class ImportReport:
+  rows: int = 0
+  imported: int = 0
+  duplicates: int = 0
+  invalid: int = 0
+  bytes_read: int = 0
+  bytes_total: int = 0
+  errors: list[tuple[int, str]] = field(default_factory=list)
+
+  def reject(self, row: int, message: str) -> None:
+    self.invalid += 1
+    if len(self.errors) < MAX_REPORTED_ERRORS:
+      self.errors.append((row, message))
+
+# (line, date, category, memo, amount, kind) as read from the file; ``kind``
+# is None when the file only has a signed amount.
+RawRow = tuple[int, str, str, str, str, "str | None"]
+
+def iter_import_batches(
+  path: Path,
+  existing: Iterable[Transaction] = (),
+  *,
+  batch_size: int = DEFAULT_BATCH_SIZE,
+  report: ImportReport | None = None,
+  on_progress: Callable[[ImportReport], None] | None = None,
+  default_category: str = DEFAULT_CATEGORY,
+) -> Iterator[list[Transaction]]:
+  # Streams a CSV or OFX/QFX file (chosen by suffix) and yields batches of
+  # new transactions.  Rows are checked with Transaction.from_input's rules,
+  # so they obey the same constraints as the form.  ``existing`` seeds a
+  # multiset of the rows already in the ledger: a row matching one of those
+  # is counted as a duplicate once per existing copy, so re-importing a
+  # statement adds nothing while genuinely repeated rows within a new file
+  # are kept.
+  report = ImportReport() if report is None else report
+  seen = Counter(existing)
+  report.bytes_total = os.path.getsize(path)
+
+  with open(path, "rb") as raw:
+    text = io.TextIOWrapper(raw, encoding="utf-8-sig", errors="replace", newline="")
+    if path.suffix.lower() in {".ofx", ".qfx"}:
+      rows = _iter_ofx_rows(text, default_category)
+    else:
+      rows = _iter_csv_rows(text, default_category)
+
+    chunk: list[RawRow] = []
+    for row in rows:
+      chunk.append(row)
+      if len(chunk) < batch_size:
+        continue
+      batch = _validate_rows(chunk, seen, report)
+      chunk = []
+      report.bytes_read = raw.tell()
+      if on_progress is not None:
+        on_progress(report)
+      if batch:
+        yield batch
+
+    batch = _validate_rows(chunk, seen, report)
+    report.bytes_read = report.bytes_total
+    if on_progress is not None:
+      on_progress(report)
+    if batch:
+      yield batch
+
+def _validate_rows(rows: list[RawRow], seen: Counter[Transaction], report: ImportReport) -> list[Transaction]:
+  # Transaction.from_input's rules and messages, applied to the batch's
+  # columns at once.
+  report.rows += len(rows)
+  if not rows:
+    return []
+  lines, dates, categories, memos, amounts, kinds = zip(*rows)
+  checked = _VALIDATOR.validate(dates, categories, memos, amounts, kinds)
+  for error in checked.errors:
+    report.reject(lines[error.row], error.message)
+  batch: list[Transaction] = []
+  for tx in checked.transactions:
+    if seen and seen[tx] > 0:
+      seen[tx] -= 1
+      report.duplicates += 1
+      continue
+    batch.append(tx)
+  report.imported += len(batch)
+  return batch
+
+def _iter_csv_rows(handle: io.TextIOBase, default_category: str) -> Iterator[RawRow]:
+  reader = csv.reader(handle)
+  header = next(reader, None)
+  if header is None:
+    return
+  columns: dict[str, int] = {}
+  for index, name in enumerate(header):
+    name = name.strip().lower()
+    for column, aliases in _CSV_COLUMNS.items():
+      if name in aliases and column not in columns:
+        columns[column] = index
+  if "date" not in columns or "amount" not in columns:
+    raise ValueError("The CSV file needs a header row with date and amount columns.")
+
+  date_at = columns["date"]
+  amount_at = columns["amount"]
+  category_at = columns.get("category")
+  memo_at = columns.get("memo")
+  kind_at = columns.get("kind")
+  width = max(columns.values()) + 1
+  for values in reader:
+    if not values:
+      continue
+    if len(values) < width:
+      values = values + [""] * (width - len(values))
+    category = values[category_at] if category_at is not None else ""
+    yield (
+      reader.line_num,
+      values[date_at],
+      category if category.strip() else default_category,
+      values[memo_at] if memo_at is not None else "",
+      values[amount_at],
+      values[kind_at] if kind_at is not None else None,
+    )
+
+def _iter_ofx_rows(handle: io.TextIOBase, default_category: str) -> Iterator[RawRow]:
+  # OFX 1.x is SGML with optional closing tags and 2.x is XML; both put one
+  # element per line in practice, so a line-oriented tag scan covers them
+  # without holding the document in memory.
+  fields: dict[str, str] | None = None
+  start = 0
+  for line_number, line in enumerate(handle, start=1):
+    for closing, tag, value in _OFX_TAG.findall(line):
+      tag = tag.upper()
+      if tag == "STMTTRN":
+        if closing and fields is not None:
+          yield _ofx_row(start, fields, default_category)
+          fields = None
+        elif not closing:
+          fields = {}
+          start = line_number
+      elif fields is not None and not closing and value.strip():
+        fields[tag] = value.strip()
+
+def _ofx_row(row: int, fields: dict[str, str], default_category: str) -> RawRow:
+  posted = fields.get("DTPOSTED", "")
+  day = f"{posted[:4]}-{posted[4:6]}-{posted[6:8]}" if len(posted) >= 8 else posted
+  memo = " ".join(value for value in (fields.get("NAME"), fields.get("MEMO")) if value)
+  return (row, day, default_category, memo, fields.get("TRNAMT", ""), None)
@@ -0,0 +1,611 @@
+from __future__ import annotations
+
+import json
+import os
+import re
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from decimal import InvalidOperation
+from pathlib import Path
+from typing import Any, BinaryIO, Callable, Iterable, Iterator
+
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+from budget_app.storage.atomic import atomic_write
+from budget_app.storage.locking import FileLock, LedgerConflictError
+from budget_app.storage.repository import (
+  DEFAULT_BATCH_SIZE,
+  LoadReport,
+  file_size,
+  iter_ledger_file,
+  iter_transaction_batches,
+  lock_path,
+  transaction_from_record,
+  transaction_to_record,
+)
+from budget_app.storage.streaming import iter_json_array
+from budget_app.storage.summary_cache import read_summary, summary_path, write_summary
+from budget_app.storage.watcher import FileStamp, file_stamp
+from budget_app.utils import trace
+
+DEFAULT_DATA_PATH = Path.home() / ".budget_app" / "transactions.json"
+SNAPSHOT_FORMAT = "budget-app-snapshot"
+SNAPSHOT_VERSION = 1
+
+# Snapshots are written with "seq" ahead of the transactions, so it can be
+# read from the first bytes without parsing the rest.
+_SNAPSHOT_SEQ = re.compile(rb'"seq"\s*:\s*(\d+)')
+
+# (snapshot, journal, legacy file, segment names) as last seen on disk.
+DiskStamp = tuple[FileStamp | None, FileStamp | None, FileStamp | None, tuple[str, ...]]
+_NOTHING_ON_DISK: DiskStamp = (None, None, None, ())
+
+@dataclass(frozen=True, slots=True)
+class JournalEntry:
+  seq: int
+  op: str
+  index: int | None = None
+  tx: Transaction | None = None
+
+  @classmethod
+  def from_record(cls, record: Any) -> JournalEntry:
+    op = record["op"]
+    seq = int(record["seq"])
+    if op == "add":
+      return cls(seq, op, tx=transaction_from_record(record["tx"]))
+    if op == "update":
+      return cls(seq, op, index=int(record["index"]), tx=transaction_from_record(record["tx"]))
+    if op == "delete":
+      return cls(seq, op, index=int(record["index"]))
+    raise ValueError(f"Unknown journal operation {op!r}.")
+
+  def apply(self, state: list[Transaction]) -> None:
+    if self.op == "add":
+      assert self.tx is not None
+      state.append(self.tx)
+      return
+    assert self.index is not None
+    if not 0 <= self.index < len(state):
+      raise IndexError(self.index)
+    if self.op == "update":
+      assert self.tx is not None
+      state[self.index] = self.tx
+    else:
+      del state[self.index]
+
+@dataclass(slots=True)
+class JournalLoadReport(LoadReport):
+  # Journal entries newer than the snapshot, in order.  Batches only carry
+  # the snapshot rows; consumers apply these on top once the batches end.
+  entries: list[JournalEntry] = field(default_factory=list)
+
+class JournalRepository:
+  # Every journal record carries a sequence number and the snapshot stores the
+  # last one it covers, so replay skips records already folded in and an
+  # interrupted compaction never applies a record twice.  The legacy JSON file
+  # at ``path`` is the base state until the first snapshot is written.
+  #
+  # Several processes may share the files.  Reads hold the ledger's lock
+  # shared and writes hold it exclusively; before writing, the records other
+  # processes appended are read and applied (see refresh()), and sequence
+  # numbers tell whether that is still possible or a full reload is needed.
+
+  def __init__(self, path: Path, *, compact_threshold: int = 1000) -> None:
+    self._path = path
+    self._file_lock = FileLock(lock_path(path))
+    self._summary_path = summary_path(path)
+    self._snapshot_path = path.with_suffix(".snapshot.json")
+    self._journal_path = path.with_suffix(".journal")
+    self._compact_threshold = compact_threshold
+
+    self._state: list[Transaction] = []
+    self._seq = 0
+    self._journal_records = 0
+    self._journal: BinaryIO | None = None
+    self._journal_size = 0
+    self._pending: list[dict[str, Any]] | None = None
+    self._undo: list[Callable[[], None]] = []
+
+    self._stamp: DiskStamp = _NOTHING_ON_DISK
+    self._external: list[JournalEntry] = []
+    self._reload_needed = False
+
+    self._load_error: str | None = None
+    self.last_report = JournalLoadReport()
+
+    self._lock = threading.Lock()
+    self._compaction: threading.Thread | None = None
+    self._compaction_error: OSError | None = None
+
+  @property
+  def needs_compaction(self) -> bool:
+    return self._journal_records >= self._compact_threshold
+
+  def load(self) -> list[Transaction]:
+    report = JournalLoadReport()
+    for _ in self.iter_batches(report=report):
+      pass
+    return list(self._state)
+
+  def iter_batches(
+    self,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report: JournalLoadReport | None = None,
+  ) -> Iterator[list[Transaction]]:
+    report = JournalLoadReport() if report is None else report
+    self.last_report = report
+    self.wait_for_compaction()
+    self._close_journal()
+    self._state = []
+    self._seq = 0
+    self._journal_records = 0
+    self._journal_size = 0
+    self._load_error = None
+    self._stamp = _NOTHING_ON_DISK
+    self._external = []
+    self._reload_needed = False
+    # The span includes the time the caller spends on each batch.
+    with self._file_lock.shared(), trace.span("journal.load") as span:
+      yield from self._read_files(batch_size, report)
+      if trace.active() is not None:
+        span.set(rows=len(self._state), entries=len(report.entries), bytes=sum(map(file_size, self._data_paths())))
+
+  def _read_files(self, batch_size: int, report: JournalLoadReport) -> Iterator[list[Transaction]]:
+    snapshot_seq = 0
+    if self._snapshot_path.exists():
+      members: dict[str, Any] = {}
+      try:
+        with open(self._snapshot_path, encoding="utf-8") as handle:
+          items = iter_json_array(handle, member="transactions", on_member=members.__setitem__)
+          for batch in iter_transaction_batches(items, batch_size, report):
+            self._state.extend(batch)
+            yield batch
+        snapshot_seq = int(members.get("seq", 0))
+      except (OSError, ValueError) as exc:
+        report.error = report.error or str(exc)
+    else:
+      for batch in iter_ledger_file(self._path, batch_size, report):
+        self._state.extend(batch)
+        yield batch
+
+    if report.error is not None:
+      # Replaying positional records onto a partial snapshot, or appending
+      # after it, could lose data; keep the files untouched instead.
+      self._load_error = report.error
+      return
+
+    self._seq = snapshot_seq
+    for segment in self._segment_paths():
+      self._replay(segment, snapshot_seq, report.entries)
+    self._journal_size = self._replay(self._journal_path, snapshot_seq, report.entries)
+    self._stamp = self._disk_stamp()
+
+  def save(self, transactions: Iterable[Transaction]) -> None:
+    # The new snapshot gets a sequence number of its own, so processes that
+    # still hold the old state see it is newer and reload.
+    self.wait_for_compaction()
+    transactions = list(transactions)
+    with self._file_lock.exclusive(), trace.span("journal.save", rows=len(transactions)):
+      if self._load_error is None:
+        self._catch_up_for_write()
+      self._state = transactions
+      self._close_journal()
+      self._seq = max(self._seq, _snapshot_seq(self._snapshot_path) or 0) + 1
+      self._write_snapshot(self._snapshot_path, self._state, self._seq)
+      self._discard_journal(self._seq, include_active=True)
+      self._load_error = None
+      self._stamp = self._disk_stamp()
+    try:
+      self.save_summary(SummaryAggregates(self._state))
+    except OSError:
+      pass
+
+  def cached_summary(self) -> SummaryAggregates | None:
+    # Valid only while the snapshot (or legacy file) and every journal file
+    # are exactly as they were when the summary was saved.
+    return read_summary(self._summary_path, self._data_paths())
+
+  def save_summary(self, summary: SummaryAggregates) -> None:
+    # ``summary`` must match what a fresh load would produce, so callers
+    # save it once their writes are flushed; the sidecar is fingerprinted
+    # against the files as they are at that moment.
+    # Skipped while the files hold changes the caller has not merged, as
+    # ``summary`` cannot include them.
+    if self._load_error is not None:
+      return
+    self.wait_for_compaction()
+    with self._file_lock.shared():
+      if not self._catch_up(exclusive=False):
+        self._reload_needed = True
+      if self._reload_needed or self._external:
+        return
+      write_summary(self._summary_path, self._data_paths(), summary)
+
+  def refresh(self) -> list[JournalEntry] | None:
+    # The changes other processes have written since we last looked, already
+    # applied to our state; the caller applies them to its copy in order.
+    # None when they cannot be replayed and the ledger has to be reloaded.
+    if self._load_error is not None:
+      return []
+    with self._file_lock.shared():
+      if not self._catch_up(exclusive=False):
+        self._reload_needed = True
+    if self._reload_needed:
+      return None
+    entries, self._external = self._external, []
+    return entries
+
+  def watched_paths(self) -> list[Path]:
+    # Every file another process may change, for a FileWatcher.
+    return [self._snapshot_path, self._journal_path, self._path, *self._segment_paths()]
+
+  @contextmanager
+  def batch(self) -> Iterator[None]:
+    # add/update/delete calls inside the block are written as one journal
+    # append with a single fsync, under the ledger's exclusive lock.  Records
+    # are positional, so if other processes have changed the ledger and the
+    # caller has not taken those changes with refresh() yet, the block raises
+    # LedgerConflictError before it runs.  If the write fails, the in-memory
+    # state is rolled back to where the block started.
+    if self._pending is not None:
+      yield
+      return
+    if self._load_error is not None:
+      raise OSError(f"The ledger could not be read ({self._load_error}), so changes are not being saved.")
+    with self._file_lock.exclusive():
+      self._catch_up_for_write()
+      self._pending = []
+      try:
+        yield
+        records, self._pending = self._pending, None
+        if records:
+          self._append(records)
+      except BaseException:
+        for undo in reversed(self._undo):
+          undo()
+        raise
+      finally:
+        self._pending = None
+        self._undo = []
+    self._maybe_compact()
+
+  def add(self, tx: Transaction) -> None:
+    with self.batch():
+      self._record([{"op": "add", "tx": transaction_to_record(tx)}], self._state.pop)
+      self._state.append(tx)
+
+  def add_many(self, transactions: Iterable[Transaction]) -> None:
+    # One append and one fsync for the whole set, e.g. a bulk import.
+    transactions = list(transactions)
+    if not transactions:
+      return
+    count = len(transactions)
+
+    def undo() -> None:
+      del self._state[-count:]
+
+    with self.batch():
+      self._record([{"op": "add", "tx": transaction_to_record(tx)} for tx in transactions], undo)
+      self._state.extend(transactions)
+
+  def update(self, index: int, tx: Transaction) -> None:
+    with self.batch():
+      self._check_index(index)
+      previous = self._state[index]
+      self._record(
+        [{"op": "update", "index": index, "tx": transaction_to_record(tx)}],
+        lambda: self._state.__setitem__(index, previous),
+      )
+      self._state[index] = tx
+
+  def delete(self, indexes: Iterable[int]) -> None:
+    # Indexes are applied in the given order, so callers removing several
+    # rows pass them highest first, exactly as they pop them from their list.
+    indexes = list(indexes)
+    with self.batch():
+      remaining = len(self._state)
+      for index in indexes:
+        if not 0 <= index < remaining:
+          raise IndexError(f"Transaction index {index} out of range.")
+        remaining -= 1
+      removed: list[tuple[int, Transaction]] = []
+
+      def undo() -> None:
+        for index, tx in reversed(removed):
+          self._state.insert(index, tx)
+
+      self._record([{"op": "delete", "index": index} for index in indexes], undo)
+      for index in indexes:
+        removed.append((index, self._state.pop(index)))
+
+  def compact(self, *, wait: bool = False) -> None:
+    if self._load_error is not None:
+      return
+    with self._lock:
+      if self._compaction is not None and self._compaction.is_alive():
+        return
+      with self._file_lock.exclusive():
+        # The journal is shared; everything in it must be in our state
+        # before it is folded into a snapshot of that state.
+        if not self._catch_up(exclusive=True):
+          self._reload_needed = True
+          return
+        self._close_journal()
+        seq = self._seq
+        if self._journal_size > 0:
+          with open(self._journal_path, "r+b") as handle:
+            handle.truncate(self._journal_size)
+          os.replace(self._journal_path, self._segment_path(seq))
+        else:
+          self._journal_path.unlink(missing_ok=True)
+        self._journal_size = 0
+        self._journal_records = 0
+        self._stamp = self._disk_stamp()
+      snapshot = list(self._state)
+      self._compaction_error = None
+      self._compaction = threading.Thread(
+        target=self._run_compaction,
+        args=(snapshot, seq),
+        name="journal-compaction",
+        daemon=True,
+      )
+      self._compaction.start()
+    if wait:
+      self.wait_for_compaction()
+
+  def wait_for_compaction(self) -> None:
+    thread = self._compaction
+    if thread is not None:
+      thread.join()
+    error, self._compaction_error = self._compaction_error, None
+    if error is not None:
+      raise error
+
+  def close(self) -> None:
+    self.wait_for_compaction()
+    self._close_journal()
+
+  def _maybe_compact(self) -> None:
+    if self._pending is None and self.needs_compaction:
+      self.compact()
+
+  def _check_index(self, index: int) -> None:
+    if not 0 <= index < len(self._state):
+      raise IndexError(f"Transaction index {index} out of range.")
+
+  def _record(self, records: list[dict[str, Any]], undo: Callable[[], None]) -> None:
+    assert self._pending is not None
+    self._pending.extend(records)
+    self._undo.append(undo)
+
+  def _append(self, records: list[dict[str, Any]]) -> None:
+    if self._load_error is not None:
+      raise OSError(f"The ledger could not be read ({self._load_error}), so changes are not being saved.")
+    lines = []
+    seq = self._seq
+    for record in records:
+      seq += 1
+      lines.append(json.dumps({"seq": seq, **record}, separators=(",", ":")) + "\n")
+    payload = "".join(lines).encode("utf-8")
+
+    if self._journal is None:
+      self._open_journal()
+    assert self._journal is not None
+    try:
+      with trace.span("journal.append", records=len(records), bytes=len(payload)):
+        self._journal.write(payload)
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+    except OSError:
+      # Drop the handle so the next append truncates whatever part of this
+      # write reached the disk before retrying.
+      self._close_journal()
+      raise
+
+    trace.count("journal.bytes_written", len(payload))
+    self._journal_size += len(payload)
+    self._journal_records += len(records)
+    self._seq = seq
+    self._stamp = self._disk_stamp()
+
+  def _open_journal(self) -> None:
+    self._journal_path.parent.mkdir(parents=True, exist_ok=True)
+    handle = open(self._journal_path, "ab")
+    try:
+      handle.truncate(self._journal_size)
+    except OSError:
+      handle.close()
+      raise
+    self._journal = handle
+
+  def _close_journal(self) -> None:
+    if self._journal is not None:
+      try:
+        self._journal.close()
+      except OSError:
+        pass
+      self._journal = None
+
+  def _replay(self, path: Path, snapshot_seq: int, entries: list[JournalEntry]) -> int:
+    # Returns the byte length of the intact prefix.  A record that cannot be
+    # decoded or applied can only come from a torn write at the tail, so
+    # replay stops there; the next write to the active journal cuts the tail
+    # off, under the exclusive lock that loads do not take.
+    if not path.exists():
+      return 0
+    valid = 0
+    with open(path, "rb") as handle:
+      for raw in handle:
+        if not raw.endswith(b"\n"):
+          break
+        try:
+          record = json.loads(raw)
+          if int(record["seq"]) > snapshot_seq:
+            entry = JournalEntry.from_record(record)
+            if entry.seq != self._seq + 1:
+              break
+            entry.apply(self._state)
+            entries.append(entry)
+            self._seq = entry.seq
+            self._journal_records += 1
+        except (KeyError, TypeError, ValueError, IndexError, InvalidOperation):
+          break
+        valid += len(raw)
+    return valid
+
+  def _catch_up_for_write(self) -> None:
+    # Call with the exclusive lock held.
+    if not self._catch_up(exclusive=True):
+      self._reload_needed = True
+    if self._reload_needed:
+      raise LedgerConflictError("Another program replaced the ledger; reload it before making changes.")
+    if self._external:
+      raise LedgerConflictError(
+        f"Another program changed the ledger ({len(self._external)} change(s) not merged yet)."
+      )
+
+  def _catch_up(self, *, exclusive: bool) -> bool:
+    # Call with the file lock held.  Applies the records other processes
+    # have written since we last looked to our state and queues them for
+    # refresh().  False when they cannot be replayed here: they were folded
+    # into a snapshot we have not read, or the ledger was saved over.
+    stamp = self._disk_stamp()
+    if stamp == self._stamp:
+      return True
+    snapshot, journal, legacy, _ = stamp
+    known_snapshot, known_journal, known_legacy, _ = self._stamp
+    if snapshot is None and (known_snapshot is not None or legacy != known_legacy):
+      return False
+
+    entries: list[JournalEntry] = []
+    for segment in self._segment_paths():
+      if self._scan(segment, 0, entries) is None:
+        return False
+    same_journal = journal is not None and known_journal is not None and journal[0] == known_journal[0]
+    start = self._journal_size if same_journal and journal[1] >= self._journal_size else 0
+    scanned = self._scan(self._journal_path, start, entries)
+    if scanned is None:
+      return False
+    if snapshot is not None and snapshot != known_snapshot:
+      folded = _snapshot_seq(self._snapshot_path)
+      if folded is None or folded > (entries[-1].seq if entries else self._seq):
+        return False
+
+    for entry in entries:
+      try:
+        entry.apply(self._state)
+      except IndexError:
+        return False
+      self._seq = entry.seq
+      self._external.append(entry)
+
+    valid, records = scanned
+    if not same_journal:
+      self._close_journal()
+    self._journal_records = self._journal_records + records if start else records
+    self._journal_size = valid
+    if exclusive and journal is not None and valid < journal[1]:
+      with open(self._journal_path, "r+b") as handle:
+        handle.truncate(valid)
+    self._stamp = self._disk_stamp()
+    return True
+
+  def _scan(self, path: Path, start: int, entries: list[JournalEntry]) -> tuple[int, int] | None:
+    # Collects the records of ``path`` from byte ``start`` on that are newer
+    # than ``entries`` (or our state).  Returns the end of the intact prefix
+    # and the number of records in it, or None on a gap in the sequence.
+    expected = entries[-1].seq + 1 if entries else self._seq + 1
+    valid, records = start, 0
+    try:
+      handle = open(path, "rb")
+    except FileNotFoundError:
+      return 0, 0
+    with handle:
+      handle.seek(start)
+      for raw in handle:
+        if not raw.endswith(b"\n"):
+          break
+        try:
+          record = json.loads(raw)
+          seq = int(record["seq"])
+          if seq > expected:
+            return None
+          if seq == expected:
+            entries.append(JournalEntry.from_record(record))
+            expected += 1
+        except (KeyError, TypeError, ValueError, InvalidOperation):
+          break
+        valid += len(raw)
+        records += 1
+    return valid, records
+
+  def _run_compaction(self, snapshot: list[Transaction], seq: int) -> None:
+    # The slow part, writing the snapshot, happens outside the lock into a
+    # file of our own; it only replaces the shared snapshot if another
+    # process has not written a newer one meanwhile.
+    staged = self._snapshot_path.with_name(f"{self._snapshot_path.name}.{os.getpid()}.new")
+    try:
+      with trace.span("journal.compact", rows=len(snapshot)):
+        self._write_snapshot(staged, snapshot, seq)
+      with self._file_lock.exclusive():
+        current = _snapshot_seq(self._snapshot_path)
+        if current is None or current < seq:
+          os.replace(staged, self._snapshot_path)
+        self._discard_journal(seq, include_active=False)
+    except OSError as exc:
+      self._compaction_error = exc
+    finally:
+      staged.unlink(missing_ok=True)
+
+  def _write_snapshot(self, path: Path, transactions: list[Transaction], seq: int) -> None:
+    payload = {
+      "format": SNAPSHOT_FORMAT,
+      "version": SNAPSHOT_VERSION,
+      "seq": seq,
+      "transactions": [transaction_to_record(tx) for tx in transactions],
+    }
+    with atomic_write(path) as handle:
+      json.dump(payload, handle, separators=(",", ":"))
+
+  def _discard_journal(self, seq: int, *, include_active: bool) -> None:
+    for segment in self._segment_paths():
+      if int(segment.suffix[1:]) <= seq:
+        segment.unlink(missing_ok=True)
+    if include_active:
+      self._journal_path.unlink(missing_ok=True)
+      self._journal_size = 0
+      self._journal_records = 0
+
+  def _disk_stamp(self) -> DiskStamp:
+    return (
+      file_stamp(self._snapshot_path),
+      file_stamp(self._journal_path),
+      file_stamp(self._path),
+      tuple(segment.name for segment in self._segment_paths()),
+    )
+
+  def _data_paths(self) -> list[Path]:
+    base = self._snapshot_path if self._snapshot_path.exists() else self._path
+    return [base, self._journal_path, *self._segment_paths()]
+
+  def _segment_path(self, seq: int) -> Path:
+    return self._journal_path.with_name(f"{self._journal_path.name}.{seq}")
+
+  def _segment_paths(self) -> list[Path]:
+    prefix = self._journal_path.name + "."
+    segments = [
+      path
+      for path in self._journal_path.parent.glob(prefix + "*")
+      if path.name[len(prefix):].isdigit()
+    ]
+    return sorted(segments, key=lambda path: int(path.suffix[1:]))
+
+def _snapshot_seq(path: Path) -> int | None:
+  try:
+    with open(path, "rb") as handle:
+      head = handle.read(4096)
+  except OSError:
+    return None
+  match = _SNAPSHOT_SEQ.search(head)
+  return int(match.group(1)) if match else None
@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+try:
+  import fcntl as _fcntl
+except ImportError:
+  _fcntl = None
+
+try:
+  import msvcrt as _msvcrt
+except ImportError:
+  _msvcrt = None
+
+class LedgerConflictError(Exception):
+  # Another process changed the ledger since this one last read it, so
+  # writing now would overwrite or misplace its changes.
+  pass
+
+class FileLock:
+  # Advisory lock shared by every process that opens the ledger.  It lives
+  # on a separate ``.lock`` file so the data files themselves can be
+  # replaced atomically while it is held.  Every acquisition opens its own
+  # descriptor, so two repositories in one process exclude each other just
+  # as two processes do.  Without fcntl (Windows) shared locks are taken
+  # exclusively.
+  def __init__(self, path: Path) -> None:
+    self.path = path
+
+  @contextmanager
+  def shared(self) -> Iterator[None]:
+    # Nothing can be written into a directory that does not exist yet, so a
+    # reader has nothing to exclude there.
+    if not self.path.parent.exists():
+      yield
+      return
+    with self._locked(exclusive=False):
+      yield
+
+  @contextmanager
+  def exclusive(self) -> Iterator[None]:
+    self.path.parent.mkdir(parents=True, exist_ok=True)
+    with self._locked(exclusive=True):
+      yield
+
+  @contextmanager
+  def _locked(self, *, exclusive: bool) -> Iterator[None]:
+    with open(self.path, "a+b") as handle:
+      fd = handle.fileno()
+      if _fcntl is not None:
+        _fcntl.flock(fd, _fcntl.LOCK_EX if exclusive else _fcntl.LOCK_SH)
+      elif _msvcrt is not None:
+        handle.seek(0)
+        while True:
+          try:
+            _msvcrt.locking(fd, _msvcrt.LK_LOCK, 1)
+            break
+          except OSError:
+            # LK_LOCK gives up after about ten seconds; keep waiting.
+            continue
+      try:
+        yield
+      finally:
+        if _fcntl is not None:
+          _fcntl.flock(fd, _fcntl.LOCK_UN)
+        elif _msvcrt is not None:
+          handle.seek(0)
+          _msvcrt.locking(fd, _msvcrt.LK_UNLCK, 1)
@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import calendar
+import gzip
+import json
+import os
+import re
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from budget_app.models.summary import Subtotal, SummaryAggregates, month_key
+from budget_app.models.transaction import Transaction
+from budget_app.storage.atomic import atomic_write
+from budget_app.storage.locking import FileLock
+from budget_app.storage.repository import (
+  DEFAULT_BATCH_SIZE,
+  LoadReport,
+  TransactionRepository,
+  iter_transaction_batches,
+  transaction_to_record,
+)
+from budget_app.storage.streaming import iter_json_array
+from budget_app.storage.summary_cache import decode_cells, encode_cells
+from budget_app.storage.watcher import FileStamp, file_stamp
+
+DEFAULT_ACCOUNT = "main"
+PERIODS = ("year", "month")
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = "budget-app-partitions"
+MANIFEST_VERSION = 1
+ACTIVE_SUFFIX = ".json"
+ARCHIVE_SUFFIX = ".json.gz"
+DEFAULT_CACHED_PARTITIONS = 8
+
+_PARTITION_FILE = re.compile(r"^(\d{4}(?:-\d{2})?)(\.json(?:\.gz)?)$")
+_UNREAD = object()
+
+class ArchivedPartitionError(Exception):
+  # A write would change a partition that has been archived; unarchive() it
+  # first.
+  pass
+
+def period_key(day: date, period: str) -> str:
+  return f"{day.year:04d}" if period == "year" else f"{day.year:04d}-{day.month:02d}"
+
+def period_bounds(key: str) -> tuple[date, date]:
+  # First and last day of a "YYYY" or "YYYY-MM" period.
+  year = int(key[:4])
+  if len(key) == 4:
+    return date(year, 1, 1), date(year, 12, 31)
+  month = int(key[5:7])
+  return date(year, month, 1), date(year, month, calendar.monthrange(year, month)[1])
+
+@dataclass(slots=True)
+class Partition:
+  # One account's transactions for one period.  ``summary`` is its
+  # (month, category) aggregate, kept in the manifest so totals need not
+  # read the file; ``stamp`` is the file's stamp when it was taken.
+  account: str
+  key: str
+  archived: bool
+  summary: SummaryAggregates
+  stamp: FileStamp | None = None
+
+  @property
+  def first(self) -> date:
+    return period_bounds(self.key)[0]
+
+  @property
+  def last(self) -> date:
+    return period_bounds(self.key)[1]
+
+  @property
+  def file_name(self) -> str:
+    return self.key + (ARCHIVE_SUFFIX if self.archived else ACTIVE_SUFFIX)
+
+def partition_ledger(
+  source: Path,
+  root: Path,
+  *,
+  account: str = DEFAULT_ACCOUNT,
+  period: str | None = None,
+) -> int:
+  # Adds a ledger file, in either single-file format, to the partitioned
+  # store at ``root``; returns the number of transactions added.
+  reader = TransactionRepository(source)
+  transactions = reader.load()
+  if reader.last_report.error is not None:
+    raise OSError(f"Could not read {source}: {reader.last_report.error}")
+  PartitionedRepository(root, period=period).add_many(transactions, account=account)
+  return len(transactions)
+
+class PartitionedRepository:
+  # The ledger split by account and by period (year or month), one JSON
+  # file per partition under ``root/<account>/``, plus a small manifest that
+  # lists the partitions with their cached aggregates.  Reads open only the
+  # partitions that overlap the requested window, and at most
+  # ``cached_partitions`` of them stay in memory, so memory and load time
+  # follow the window rather than the whole history.  Totals come from the
+  # manifest's aggregates; a partition is only read for the months a window
+  # cuts through.
+  #
+  # archive() gzips old partitions into read-only archives: they are still
+  # read like any other, but writes that would change them raise
+  # ArchivedPartitionError.
+  #
+  # Every operation holds the manifest's lock and re-reads the manifest if
+  # another process replaced it, so several programs can share a store.
+  def __init__(
+    self,
+    root: Path,
+    *,
+    period: str | None = None,
+    cached_partitions: int = DEFAULT_CACHED_PARTITIONS,
+  ) -> None:
+    # ``period`` defaults to the store's own, or "year" for a new store.
+    if period is not None and period not in PERIODS:
+      raise ValueError(f"Unknown partition period {period!r}; use one of {', '.join(PERIODS)}.")
+    self.root = root
+    self._requested_period = period
+    self._period = period or "year"
+    self._manifest_path = root / MANIFEST_NAME
+    self._file_lock = FileLock(root / "manifest.lock")
+    self._manifest_stamp: Any = _UNREAD
+    self._partitions: dict[tuple[str, str], Partition] = {}
+    self._cache: OrderedDict[tuple[str, str], list[Transaction]] = OrderedDict()
+    self._cached_partitions = max(1, cached_partitions)
+
+  @property
+  def period(self) -> str:
+    with self._file_lock.shared():
+      self._sync()
+    return self._period
+
+  def accounts(self) -> list[str]:
+    with self._file_lock.shared():
+      self._sync()
+      return sorted({account for account, _ in self._partitions})
+
+  def partitions(self, account: str | None = None) -> list[Partition]:
+    with self._file_lock.shared():
+      self._sync()
+      return self._overlapping(account, None, None)
+
+  def load(
+    self,
+    *,
+    account: str = DEFAULT_ACCOUNT,
+    start: date | None = None,
+    end: date | None = None,
+  ) -> list[Transaction]:
+    # Every transaction of the partitions that overlap [start, end], oldest
+    # partition first: whole partitions, which is what save() writes back.
+    with self._file_lock.shared():
+      self._sync()
+      return [tx for part in self._overlapping(account, start, end) for tx in self._transactions(part)]
+
+  def iter_transactions(
+    self,
+    *,
+    account: str | None = DEFAULT_ACCOUNT,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> Iterator[Transaction]:
+    # Matching transactions ordered by date, then account, then position in
+    # their partition; ``account=None`` reads every account.
+    with self._file_lock.shared():
+      self._sync()
+      by_period: dict[str, list[Partition]] = {}
+      for part in self._overlapping(account, start, end):
+        by_period.setdefault(part.key, []).append(part)
+      for key in sorted(by_period):
+        matches = [
+          tx
+          for part in by_period[key]
+          for tx in self._transactions(part)
+          if (start is None or tx.date >= start)
+          and (end is None or tx.date <= end)
+          and (category is None or tx.category == category)
+        ]
+        yield from sorted(matches, key=lambda tx: tx.date)
+
+  def count(
+    self,
+    *,
+    account: str | None = DEFAULT_ACCOUNT,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> int:
+    with self._file_lock.shared():
+      self._sync()
+      return self._aggregate(account, start, end, category).count
+
+  def totals(
+    self,
+    *,
+    account: str | None = DEFAULT_ACCOUNT,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> tuple[Decimal, Decimal]:
+    # (income, expenses), like SQLiteTransactionRepository.totals().
+    with self._file_lock.shared():
+      self._sync()
+      total = self._aggregate(account, start, end, category)
+      return total.income, total.expenses
+
+  def add_many(self, transactions: Iterable[Transaction], *, account: str = DEFAULT_ACCOUNT) -> None:
+    _check_account(account)
+    transactions = list(transactions)
+    with self._file_lock.exclusive():
+      self._sync()
+      groups = self._group(transactions)
+      parts = []
+      for key in sorted(groups):
+        part = self._partitions.get((account, key))
+        if part is None:
+          part = Partition(account, key, False, SummaryAggregates())
+        elif part.archived:
+          raise ArchivedPartitionError(f"{account}/{key} is archived.")
+        parts.append(part)
+      for part in parts:
+        existing = self._transactions(part) if (account, part.key) in self._partitions else []
+        self._write(part, existing + groups[part.key])
+      if parts:
+        self._write_manifest()
+
+  def save(
+    self,
+    transactions: Iterable[Transaction],
+    *,
+    account: str = DEFAULT_ACCOUNT,
+    start: date | None = None,
+    end: date | None = None,
+  ) -> None:
+    # Writes back what load() returned for the same window: the partitions
+    # overlapping [start, end] are replaced by ``transactions`` (and removed
+    # if none are left), and new partitions are created as needed.  Only the
+    # partitions whose contents changed are rewritten.  A transaction that
+    # belongs to an existing partition outside the window raises ValueError,
+    # since writing it would drop the rest of that partition.
+    _check_account(account)
+    transactions = list(transactions)
+    with self._file_lock.exclusive():
+      self._sync()
+      groups = self._group(transactions)
+      window = {part.key: part for part in self._overlapping(account, start, end)}
+      for key in groups:
+        if key not in window and (account, key) in self._partitions:
+          raise ValueError(f"Transactions in {account}/{key} fall outside the window being saved.")
+      changes = []
+      for key in sorted(window.keys() | groups.keys()):
+        replacement = groups.get(key, [])
+        part = window.get(key)
+        if part is None:
+          part = Partition(account, key, False, SummaryAggregates())
+        elif self._transactions(part) == replacement:
+          continue
+        elif part.archived:
+          raise ArchivedPartitionError(f"{account}/{key} is archived.")
+        changes.append((part, replacement))
+      for part, replacement in changes:
+        if replacement:
+          self._write(part, replacement)
+        else:
+          self._drop(part)
+      if changes:
+        self._write_manifest()
+
+  def archive(self, *, before: date, account: str | None = None) -> list[Partition]:
+    # Compresses every active partition whose period ends before ``before``
+    # into a read-only archive; returns the partitions archived.
+    with self._file_lock.exclusive():
+      self._sync()
+      archived = [part for part in self._overlapping(account, None, None) if not part.archived and part.last < before]
+      self._set_archived(archived, True)
+      return archived
+
+  def unarchive(self, account: str, key: str) -> None:
+    with self._file_lock.exclusive():
+      self._sync()
+      part = self._partitions.get((account, key))
+      if part is None:
+        raise KeyError(f"{account}/{key}")
+      if part.archived:
+        self._set_archived([part], False)
+
+  def _overlapping(self, account: str | None, start: date | None, end: date | None) -> list[Partition]:
+    # In (key, account) order, i.e. oldest first.
+    parts = [
+      part
+      for part in self._partitions.values()
+      if (account is None or part.account == account)
+      and (start is None or part.last >= start)
+      and (end is None or part.first <= end)
+    ]
+    return sorted(parts, key=lambda part: (part.key, part.account))
+
+  def _aggregate(
+    self,
+    account: str | None,
+    start: date | None,
+    end: date | None,
+    category: str | None,
+  ) -> Subtotal:
+    total = Subtotal()
+    for part in self._overlapping(account, start, end):
+      edge_months = set()
+      for (month, cell_category), cell in self._summary(part).cells.items():
+        if category is not None and cell_category != category:
+          continue
+        first, last = period_bounds(month)
+        if (start is not None and last < start) or (end is not None and first > end):
+          continue
+        if (start is None or start <= first) and (end is None or last <= end):
+          total.income += cell.income
+          total.expenses += cell.expenses
+          total.count += cell.count
+        else:
+          edge_months.add(month)
+      if not edge_months:
+        continue
+      # The window starts or ends inside these months, so their cells
+      # cannot be used whole.
+      for tx in self._transactions(part):
+        if (
+          month_key(tx) in edge_months
+          and (start is None or tx.date >= start)
+          and (end is None or tx.date <= end)
+          and (category is None or tx.category == category)
+        ):
+          total.apply(tx.amount, 1)
+    return total
+
+  def _group(self, transactions: Iterable[Transaction]) -> dict[str, list[Transaction]]:
+    groups: dict[str, list[Transaction]] = {}
+    for tx in transactions:
+      groups.setdefault(period_key(tx.date, self._period), []).append(tx)
+    return groups
+
+  def _path(self, part: Partition) -> Path:
+    return self.root / part.account / part.file_name
+
+  def _summary(self, part: Partition) -> SummaryAggregates:
+    # The cached aggregate, re-derived if the file was changed behind the
+    # manifest's back.
+    if file_stamp(self._path(part)) != part.stamp:
+      self._cache.pop((part.account, part.key), None)
+      part.summary = SummaryAggregates(self._transactions(part))
+      part.stamp = file_stamp(self._path(part))
+    return part.summary
+
+  def _transactions(self, part: Partition) -> list[Transaction]:
+    # The partition's rows, from the cache or its file.  Callers must not
+    # mutate the list.
+    ident = (part.account, part.key)
+    transactions = self._cache.get(ident)
+    if transactions is not None:
+      self._cache.move_to_end(ident)
+      return transactions
+    transactions = _read_partition(self._path(part), archived=part.archived)
+    self._remember(ident, transactions)
+    return transactions
+
+  def _remember(self, ident: tuple[str, str], transactions: list[Transaction]) -> None:
+    self._cache[ident] = transactions
+    self._cache.move_to_end(ident)
+    while len(self._cache) > self._cached_partitions:
+      self._cache.popitem(last=False)
+
+  def _write(self, part: Partition, transactions: list[Transaction]) -> None:
+    path = self._path(part)
+    records = [transaction_to_record(tx) for tx in transactions]
+    if part.archived:
+      with atomic_write(path, "wb") as raw:
+        with gzip.GzipFile(filename=part.key + ACTIVE_SUFFIX, mode="wb", fileobj=raw, mtime=0) as stream:
+          stream.write(json.dumps(records, separators=(",", ":")).encode("utf-8"))
+    else:
+      with atomic_write(path) as handle:
+        handle.write(json.dumps(records, indent=2))
+    part.summary = SummaryAggregates(transactions)
+    part.stamp = file_stamp(path)
+    ident = (part.account, part.key)
+    self._partitions[ident] = part
+    self._remember(ident, list(transactions))
+
+  def _drop(self, part: Partition) -> None:
+    ident = (part.account, part.key)
+    self._partitions.pop(ident, None)
+    self._cache.pop(ident, None)
+    self._path(part).unlink(missing_ok=True)
+
+  def _set_archived(self, parts: list[Partition], archived: bool) -> None:
+    # The new file and then the manifest are written before the old file
+    # goes, so a crash at any point leaves the manifest naming a complete
+    # file.
+    old_paths = []
+    for part in parts:
+      transactions = self._transactions(part)
+      old_paths.append(self._path(part))
+      part.archived = archived
+      self._write(part, transactions)
+    if parts:
+      self._write_manifest()
+    for path in old_paths:
+      path.unlink(missing_ok=True)
+
+  def _sync(self) -> None:
+    # Re-reads the manifest if it changed since this process last read or
+    # wrote it.  Callers hold the lock.
+    stamp = file_stamp(self._manifest_path)
+    if stamp == self._manifest_stamp:
+      return
+    partitions = _read_manifest(self._manifest_path)
+    if partitions is None:
+      partitions = self._scan()
+    else:
+      period, partitions = partitions
+      self._period = period
+    if self._requested_period is not None and partitions and self._requested_period != self._period:
+      raise ValueError(f"{self.root} is partitioned by {self._period}, not {self._requested_period}.")
+    for ident in list(self._cache):
+      old, new = self._partitions.get(ident), partitions.get(ident)
+      if old is None or new is None or old.stamp != new.stamp or old.archived != new.archived:
+        del self._cache[ident]
+    self._partitions = partitions
+    self._manifest_stamp = stamp
+
+  def _scan(self) -> dict[tuple[str, str], Partition]:
+    # Rebuilds the partition list from the files when the manifest is
+    # missing or unreadable.
+    partitions: dict[tuple[str, str], Partition] = {}
+    if not self.root.is_dir():
+      return partitions
+    newest: dict[tuple[str, str], int] = {}
+    for directory in sorted(self.root.iterdir()):
+      if not directory.is_dir() or directory.name.startswith("."):
+        continue
+      for path in sorted(directory.iterdir()):
+        match = _PARTITION_FILE.match(path.name)
+        if match is None:
+          continue
+        key, suffix = match.groups()
+        ident = (directory.name, key)
+        mtime = path.stat().st_mtime_ns
+        # An interrupted archive() or unarchive() can leave both files; the
+        # newer one was written from the older.
+        if newest.get(ident, -1) >= mtime:
+          continue
+        newest[ident] = mtime
+        part = Partition(directory.name, key, suffix == ARCHIVE_SUFFIX, SummaryAggregates())
+        part.summary = SummaryAggregates(_read_partition(path, archived=part.archived))
+        part.stamp = file_stamp(path)
+        partitions[ident] = part
+        self._period = "year" if len(key) == 4 else "month"
+    return partitions
+
+  def _write_manifest(self) -> None:
+    payload = {
+      "format": MANIFEST_FORMAT,
+      "version": MANIFEST_VERSION,
+      "period": self._period,
+      "partitions": [
+        {
+          "account": part.account,
+          "key": part.key,
+          "archived": part.archived,
+          "stamp": part.stamp,
+          "count": part.summary.count,
+          "cells": encode_cells(part.summary),
+        }
+        for part in self._overlapping(None, None, None)
+      ],
+    }
+    with atomic_write(self._manifest_path) as handle:
+      json.dump(payload, handle, separators=(",", ":"))
+    self._manifest_stamp = file_stamp(self._manifest_path)
+
+def _read_manifest(path: Path) -> tuple[str, dict[tuple[str, str], Partition]] | None:
+  try:
+    with open(path, encoding="utf-8") as handle:
+      payload = json.load(handle)
+    if payload.get("format") != MANIFEST_FORMAT or payload.get("version") != MANIFEST_VERSION:
+      return None
+    period = payload["period"]
+    if period not in PERIODS:
+      return None
+    partitions = {}
+    for item in payload["partitions"]:
+      stamp = item["stamp"]
+      part = Partition(
+        account=item["account"],
+        key=item["key"],
+        archived=bool(item["archived"]),
+        summary=decode_cells(item["cells"]),
+        stamp=None if stamp is None else tuple(stamp),
+      )
+      if part.summary.count != item["count"]:
+        return None
+      partitions[(part.account, part.key)] = part
+  except (OSError, ValueError, KeyError, TypeError, InvalidOperation):
+    return None
+  return period, partitions
+
+def _read_partition(path: Path, *, archived: bool) -> list[Transaction]:
+  report = LoadReport()
+  with gzip.open(path, "rt", encoding="utf-8") if archived else open(path, encoding="utf-8") as handle:
+    transactions = [
+      tx
+      for batch in iter_transaction_batches(iter_json_array(handle), DEFAULT_BATCH_SIZE, report)
+      for tx in batch
+    ]
+  if report.error is not None:
+    raise OSError(f"Could not read {path}: {report.error}")
+  return transactions
+
+def _check_account(account: str) -> None:
+  # Accounts are directory names under the store's root.
+  if not account or account.startswith(".") or any(sep in account for sep in ("/", "\\", os.sep)):
+    raise ValueError(f"{account!r} is not a valid account name.")
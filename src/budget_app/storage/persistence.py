@@ -0,0 +1,118 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from typing import Callable
+
+from budget_app.storage.journal import JournalRepository
+
+Write = Callable[[], None]
+Undo = Callable[[], None]
+
+class PersistenceWorker:
+  # Runs repository writes on a background thread so callers never wait on
+  # the disk.  Writes submitted while the worker is busy, or within ``delay``
+  # of each other, are coalesced into one journal batch and one fsync.
+  #
+  # Callers apply each change to their own state first and submit an undo
+  # with it.  When a batch fails, ``on_error`` is called from the worker
+  # thread and every later write is held back as failed too, because its
+  # row positions assume the failed ones reached the disk.  The caller then
+  # takes the failed undos with ``take_failed`` and runs them newest first.
+  # A LedgerConflictError means another process wrote first; nothing of the
+  # batch was written, and the caller merges their changes before retrying.
+  # Any other exception fails the batch the same way rather than ending
+  # the thread, which would leave flush() waiting forever.
+
+  def __init__(
+    self,
+    repository: JournalRepository,
+    *,
+    on_error: Callable[[Exception], None],
+    delay: float = 0.05,
+  ) -> None:
+    self._repository = repository
+    self._on_error = on_error
+    self._delay = delay
+    self._queue: queue.Queue[tuple[Write, Undo] | None] = queue.Queue()
+    self._lock = threading.Lock()
+    self._failed: list[tuple[Write, Undo]] = []
+    self._failing = False
+    self._closed = False
+    self._thread = threading.Thread(target=self._run, name="ledger-writer", daemon=True)
+    self._thread.start()
+
+  @property
+  def failing(self) -> bool:
+    with self._lock:
+      return self._failing
+
+  def submit(self, write: Write, undo: Undo) -> None:
+    if self._closed:
+      raise RuntimeError("PersistenceWorker is closed.")
+    self._queue.put((write, undo))
+
+  def flush(self) -> None:
+    # Blocks until every submitted write has been written or marked failed.
+    self._queue.join()
+
+  def take_failed(self) -> list[Undo]:
+    # Undos for the failed writes in submission order; afterwards the worker
+    # accepts writes again.
+    self.flush()
+    with self._lock:
+      failed, self._failed = self._failed, []
+      self._failing = False
+    return [undo for _, undo in failed]
+
+  def close(self) -> None:
+    # Writes out everything still queued, stops the thread and closes the
+    # repository.  Errors from closing the repository propagate.
+    if not self._closed:
+      self._closed = True
+      self._queue.put(None)
+      self._thread.join()
+    self._repository.close()
+
+  def _run(self) -> None:
+    stopping = False
+    while not stopping:
+      item = self._queue.get()
+      if item is None:
+        self._queue.task_done()
+        break
+      if self._delay:
+        time.sleep(self._delay)
+      items = [item]
+      while True:
+        try:
+          item = self._queue.get_nowait()
+        except queue.Empty:
+          break
+        if item is None:
+          self._queue.task_done()
+          stopping = True
+          break
+        items.append(item)
+
+      try:
+        self._write(items)
+      finally:
+        for _ in items:
+          self._queue.task_done()
+
+  def _write(self, items: list[tuple[Write, Undo]]) -> None:
+    with self._lock:
+      if self._failing:
+        self._failed.extend(items)
+        return
+    try:
+      with self._repository.batch():
+        for write, _ in items:
+          write()
+    except Exception as exc:
+      with self._lock:
+        self._failing = True
+        self._failed.extend(items)
+      self._on_error(exc)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Iterable
+
+from budget_app.models.recurring import RecurringRule
+from budget_app.storage.atomic import atomic_write
+from budget_app.storage.locking import FileLock
+from budget_app.storage.repository import lock_path
+
+RULES_FORMAT = "budget-app-recurring"
+RULES_VERSION = 1
+
+def recurring_path(path: Path) -> Path:
+  # The rules for the ledger at ``path`` live next to it.
+  return path.with_suffix(".recurring.json")
+
+def rule_to_record(rule: RecurringRule) -> dict[str, Any]:
+  record: dict[str, Any] = {
+    "category": rule.category,
+    "memo": rule.memo,
+    "amount": format(rule.amount, "f"),
+    "start": rule.start.isoformat(),
+    "frequency": rule.frequency,
+    "interval": rule.interval,
+  }
+  if rule.end is not None:
+    record["end"] = rule.end.isoformat()
+  return record
+
+def rule_from_record(item: Any) -> RecurringRule:
+  end = item.get("end")
+  return RecurringRule(
+    category=item["category"],
+    memo=item.get("memo", ""),
+    amount=Decimal(item["amount"]),
+    start=date.fromisoformat(item["start"]),
+    frequency=item.get("frequency", "month"),
+    interval=int(item.get("interval", 1)),
+    end=None if end is None else date.fromisoformat(end),
+  )
+
+class RecurringRepository:
+  # The recurring rules of one ledger, in a small JSON file beside it (see
+  # recurring_path).  Rules are few, so the file is read and rewritten
+  # whole, under the ledger's own lock file so that two programs adding
+  # rules at once do not lose one.
+  def __init__(self, ledger_path: Path) -> None:
+    self.path = recurring_path(ledger_path)
+    self._lock = FileLock(lock_path(ledger_path))
+
+  def load(self) -> list[RecurringRule]:
+    with self._lock.shared():
+      return self._read()
+
+  def save(self, rules: Iterable[RecurringRule]) -> None:
+    with self._lock.exclusive():
+      self._write(list(rules))
+
+  def add(self, rule: RecurringRule) -> int:
+    # Appends ``rule`` and returns its position.
+    with self._lock.exclusive():
+      rules = self._read()
+      rules.append(rule)
+      self._write(rules)
+    return len(rules) - 1
+
+  def remove(self, position: int) -> RecurringRule:
+    with self._lock.exclusive():
+      rules = self._read()
+      if not 0 <= position < len(rules):
+        raise IndexError(f"There is no recurring rule {position}.")
+      removed = rules.pop(position)
+      self._write(rules)
+    return removed
+
+  def _read(self) -> list[RecurringRule]:
+    # A malformed file is an error rather than an empty list, so that a
+    # later write does not silently replace it.
+    try:
+      with open(self.path, encoding="utf-8") as handle:
+        payload = json.load(handle)
+      if payload.get("format") != RULES_FORMAT or payload.get("version") != RULES_VERSION:
+        raise ValueError("unsupported format")
+      return [rule_from_record(item) for item in payload["rules"]]
+    except FileNotFoundError:
+      return []
+    except (AttributeError, KeyError, TypeError, ValueError, InvalidOperation) as exc:
+      raise ValueError(f"{self.path} is not a valid recurring rules file: {exc}") from None
+
+  def _write(self, rules: list[RecurringRule]) -> None:
+    payload = {
+      "format": RULES_FORMAT,
+      "version": RULES_VERSION,
+      "rules": [rule_to_record(rule) for rule in rules],
+    }
+    with atomic_write(self.path) as handle:
+      json.dump(payload, handle, indent=2)
@@ -1,49 +1,253 @@
 from __future__ import annotations
 
 import json
+from dataclasses import dataclass
 from datetime import date
 from decimal import Decimal, InvalidOperation
 from pathlib import Path
-from typing import Iterable
+from typing import Any, Iterable, Iterator
 
+from budget_app.models.summary import SummaryAggregates
 from budget_app.models.transaction import Transaction
+from budget_app.storage.atomic import atomic_write
+from budget_app.storage.binary import BINARY_SUFFIX, MappedLedger, is_binary_ledger, write_ledger_file
+from budget_app.storage.locking import FileLock, LedgerConflictError
+from budget_app.storage.streaming import iter_json_array
+from budget_app.storage.summary_cache import read_summary, summary_path, write_summary
+from budget_app.storage.watcher import FileStamp, file_stamp
+from budget_app.utils import trace
+
+DEFAULT_BATCH_SIZE = 2000
+
+@dataclass(slots=True)
+class LoadReport:
+  loaded: int = 0
+  skipped: int = 0
+  error: str | None = None
+
+def transaction_to_record(tx: Transaction) -> dict[str, str]:
+  return {
+    "date": tx.date.isoformat(),
+    "category": tx.category,
+    "memo": tx.memo,
+    "amount": format(tx.amount, "f"),
+  }
+
+def transaction_from_record(item: Any) -> Transaction:
+  return Transaction(
+    date=date.fromisoformat(item["date"]),
+    category=item["category"],
+    memo=item.get("memo", ""),
+    amount=Decimal(item["amount"]),
+  )
+
+def iter_transaction_batches(
+  items: Iterable[Any],
+  batch_size: int,
+  report: LoadReport,
+) -> Iterator[list[Transaction]]:
+  # Turns decoded records into Transaction batches, counting the records
+  # that are not valid transactions instead of silently dropping them.  A
+  # read or parse error ends the stream after the rows decoded before it.
+  batch: list[Transaction] = []
+  records = iter(items)
+  while True:
+    try:
+      item = next(records)
+    except StopIteration:
+      break
+    except (OSError, ValueError) as exc:
+      report.error = str(exc)
+      break
+    try:
+      batch.append(transaction_from_record(item))
+    except (KeyError, TypeError, ValueError, InvalidOperation, AttributeError):
+      report.skipped += 1
+      continue
+    if len(batch) >= batch_size:
+      report.loaded += len(batch)
+      yield batch
+      batch = []
+  if batch:
+    report.loaded += len(batch)
+    yield batch
+
+def iter_ledger_file(path: Path, batch_size: int, report: LoadReport) -> Iterator[list[Transaction]]:
+  # A JSON array or a binary ledger file, told apart by the binary magic;
+  # callers hold the ledger's lock.
+  if not path.exists():
+    return
+  if is_binary_ledger(path):
+    try:
+      with MappedLedger(path) as ledger:
+        for batch in ledger.iter_batches(batch_size):
+          report.loaded += len(batch)
+          yield batch
+    except (OSError, ValueError) as exc:
+      report.error = str(exc)
+    return
+  try:
+    with open(path, encoding="utf-8") as handle:
+      yield from iter_transaction_batches(iter_json_array(handle), batch_size, report)
+  except (OSError, ValueError) as exc:
+    report.error = str(exc)
+
+def convert_ledger(source: Path, output: Path, *, binary: bool) -> int:
+  # Rewrites ``source``, in either format, as ``output`` in the chosen one;
+  # returns the number of transactions written.
+  reader = TransactionRepository(source)
+  transactions = reader.load()
+  if reader.last_report.error is not None:
+    raise OSError(f"Could not read {source}: {reader.last_report.error}")
+  TransactionRepository(output, binary=binary).save(transactions)
+  return len(transactions)
+
+def lock_path(path: Path) -> Path:
+  return path.with_suffix(".lock")
+
+def file_size(path: Path) -> int:
+  try:
+    return path.stat().st_size
+  except OSError:
+    return 0
 
 class TransactionRepository:
-  def __init__(self, path: Path) -> None:
+  # Next to the ledger file it keeps a summary sidecar (see summary_cache),
+  # so totals can be shown before, or without, parsing the ledger.  Saves
+  # are optimistic: the file's stamp is remembered at load and save() raises
+  # LedgerConflictError instead of overwriting a file another process has
+  # rewritten since.
+  #
+  # The file is either the JSON array or the binary format (see binary).
+  # ``binary`` picks the format save() writes; by default an existing file
+  # keeps its format and a new one is binary if it is named ``*.ledger``.
+  # count(), totals() and iter_transactions() answer like the SQLite
+  # repository's, straight from the mapped file when it is binary.
+  def __init__(self, path: Path, *, binary: bool | None = None) -> None:
     self._path = path
+    self._binary = binary
+    self._summary_path = summary_path(path)
+    self._file_lock = FileLock(lock_path(path))
+    self._loaded = False
+    self._stamp: FileStamp | None = None
+    self.last_report = LoadReport()
+
+  def cached_summary(self) -> SummaryAggregates | None:
+    return read_summary(self._summary_path, [self._path])
+
+  def save_summary(self, summary: SummaryAggregates) -> None:
+    write_summary(self._summary_path, [self._path], summary)
 
   def load(self) -> list[Transaction]:
-    if not self._path.exists():
-      return []
-    try:
-      payload = json.loads(self._path.read_text(encoding="utf-8"))
-    except (OSError, json.JSONDecodeError):
-      return []
-    
+    report = LoadReport()
     transactions: list[Transaction] = []
-    for item in payload:
-      try:
-        transactions.append(
-          Transaction(
-            date=date.fromisoformat(item["date"]),
-            category=item["category"],
-            memo=item.get("memo", ""),
-            amount=Decimal(item["amount"]),
-          )
-        )
-      except (KeyError, ValueError, InvalidOperation):
-        continue
+    with trace.span("repository.load") as span:
+      for batch in self.iter_batches(report=report):
+        transactions.extend(batch)
+      if trace.active() is not None:
+        span.set(rows=len(transactions), bytes=file_size(self._path))
+    self.last_report = report
     return transactions
-  
+
+  def iter_batches(
+    self,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    report: LoadReport | None = None,
+  ) -> Iterator[list[Transaction]]:
+    report = LoadReport() if report is None else report
+    with self._file_lock.shared():
+      self._loaded = True
+      self._stamp = file_stamp(self._path)
+      yield from iter_ledger_file(self._path, batch_size, report)
+
   def save(self, transactions: Iterable[Transaction]) -> None:
-    serializable = [
-      {
-        "date": tx.date.isoformat(),
-        "category": tx.category,
-        "memo": tx.memo,
-        "amount": format(tx.amount, "f"),
-      }
-      for tx in transactions
+    # Saving without a load first replaces whatever is there, as before.
+    transactions = list(transactions)
+    with self._file_lock.exclusive(), trace.span("repository.save", rows=len(transactions)) as span:
+      if self._loaded and file_stamp(self._path) != self._stamp:
+        raise LedgerConflictError(f"{self._path} was changed by another program since it was loaded.")
+      if self._writes_binary():
+        write_ledger_file(self._path, transactions)
+      else:
+        serializable = [transaction_to_record(tx) for tx in transactions]
+        with atomic_write(self._path) as handle:
+          handle.write(json.dumps(serializable, indent=2))
+      self._loaded = True
+      self._stamp = file_stamp(self._path)
+      if trace.active() is not None:
+        written = file_size(self._path)
+        span.set(bytes=written)
+        trace.count("repository.bytes_written", written)
+    self._refresh_summary(transactions)
+
+  def count(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> int:
+    with self._file_lock.shared():
+      if is_binary_ledger(self._path):
+        with MappedLedger(self._path) as ledger:
+          return ledger.count(start=start, end=end, category=category)
+      return len(self._select(start, end, category))
+
+  def totals(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> tuple[Decimal, Decimal]:
+    with self._file_lock.shared():
+      if is_binary_ledger(self._path):
+        with MappedLedger(self._path) as ledger:
+          return ledger.totals(start=start, end=end, category=category)
+      summary = SummaryAggregates(self._select(start, end, category))
+      return summary.income, summary.expenses
+
+  def iter_transactions(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> Iterator[Transaction]:
+    # Matching transactions ordered by date, then by position in the file.
+    with self._file_lock.shared():
+      if is_binary_ledger(self._path):
+        with MappedLedger(self._path) as ledger:
+          yield from ledger.iter_transactions(start=start, end=end, category=category)
+        return
+      yield from self._select(start, end, category)
+
+  def _select(self, start: date | None, end: date | None, category: str | None) -> list[Transaction]:
+    # The JSON format has no index, so it is read whole.
+    report = LoadReport()
+    selected = [
+      tx
+      for batch in iter_ledger_file(self._path, DEFAULT_BATCH_SIZE, report)
+      for tx in batch
+      if (start is None or tx.date >= start)
+      and (end is None or tx.date <= end)
+      and (category is None or tx.category == category)
     ]
-    self._path.parent.mkdir(parents=True, exist_ok=True)
-    self._path.write_text(json.dumps(serializable, indent=2), encoding="utf-8")
\ No newline at end of file
+    if report.error is not None:
+      raise OSError(f"Could not read {self._path}: {report.error}")
+    return sorted(selected, key=lambda tx: tx.date)
+
+  def _writes_binary(self) -> bool:
+    if self._binary is not None:
+      return self._binary
+    if self._path.exists():
+      return is_binary_ledger(self._path)
+    return self._path.suffix == BINARY_SUFFIX
+
+  def _refresh_summary(self, transactions: list[Transaction]) -> None:
+    # The sidecar is only a cache: if it cannot be written, the old one no
+    # longer matches the ledger's fingerprint and is ignored on the next load.
+    try:
+      self.save_summary(SummaryAggregates(transactions))
+    except OSError:
+      pass
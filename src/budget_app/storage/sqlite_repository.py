@@ -0,0 +1,198 @@
+from __future__ import annotations
+
+import sqlite3
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+from budget_app.models.money import from_cents, to_cents
+from budget_app.models.transaction import Transaction
+
+SQLITE_SUFFIX = ".sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS transactions (
+  id INTEGER PRIMARY KEY,
+  date TEXT NOT NULL,
+  category TEXT NOT NULL,
+  memo TEXT NOT NULL DEFAULT '',
+  amount_cents INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions (date);
+CREATE INDEX IF NOT EXISTS idx_transactions_category ON transactions (category, date);
+"""
+
+class SQLiteTransactionRepository:
+  # Filters, pages and counts in SQL, so callers such as BudgetController
+  # can answer from here without loading the ledger.
+  answers_queries = True
+
+  def __init__(self, path: Path) -> None:
+    self._path = path
+    self._connection: sqlite3.Connection | None = None
+
+  @property
+  def connection(self) -> sqlite3.Connection:
+    if self._connection is None:
+      self._path.parent.mkdir(parents=True, exist_ok=True)
+      connection = sqlite3.connect(self._path)
+      connection.execute("PRAGMA journal_mode=WAL")
+      connection.execute("PRAGMA synchronous=NORMAL")
+      connection.executescript(_SCHEMA)
+      self._connection = connection
+    return self._connection
+
+  def close(self) -> None:
+    if self._connection is not None:
+      self._connection.close()
+      self._connection = None
+
+  def load(self) -> list[Transaction]:
+    rows = self.connection.execute(
+      "SELECT date, category, memo, amount_cents FROM transactions ORDER BY id"
+    )
+    return [_row_to_transaction(row) for row in rows]
+
+  def save(self, transactions: Iterable[Transaction]) -> None:
+    rows = [_transaction_to_row(tx) for tx in transactions]
+    with self.connection:
+      self.connection.execute("DELETE FROM transactions")
+      self.connection.executemany(
+        "INSERT INTO transactions (date, category, memo, amount_cents) VALUES (?, ?, ?, ?)",
+        rows,
+      )
+
+  def insert(self, tx: Transaction) -> int:
+    with self.connection:
+      cursor = self.connection.execute(
+        "INSERT INTO transactions (date, category, memo, amount_cents) VALUES (?, ?, ?, ?)",
+        _transaction_to_row(tx),
+      )
+    return int(cursor.lastrowid)
+
+  def insert_many(self, transactions: Iterable[Transaction]) -> None:
+    rows = [_transaction_to_row(tx) for tx in transactions]
+    with self.connection:
+      self.connection.executemany(
+        "INSERT INTO transactions (date, category, memo, amount_cents) VALUES (?, ?, ?, ?)",
+        rows,
+      )
+
+  def update(self, row_id: int, tx: Transaction) -> None:
+    with self.connection:
+      cursor = self.connection.execute(
+        "UPDATE transactions SET date = ?, category = ?, memo = ?, amount_cents = ? WHERE id = ?",
+        (*_transaction_to_row(tx), row_id),
+      )
+    if cursor.rowcount == 0:
+      raise KeyError(row_id)
+
+  def delete(self, row_id: int) -> None:
+    with self.connection:
+      cursor = self.connection.execute("DELETE FROM transactions WHERE id = ?", (row_id,))
+    if cursor.rowcount == 0:
+      raise KeyError(row_id)
+
+  def get(self, row_id: int) -> Transaction:
+    row = self.connection.execute(
+      "SELECT date, category, memo, amount_cents FROM transactions WHERE id = ?",
+      (row_id,),
+    ).fetchone()
+    if row is None:
+      raise KeyError(row_id)
+    return _row_to_transaction(row)
+
+  def query(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+  ) -> list[tuple[int, Transaction]]:
+    where, params = _filters(start, end, category)
+    sql = f"SELECT id, date, category, memo, amount_cents FROM transactions{where} ORDER BY date, id"
+    if limit is not None:
+      sql += " LIMIT ? OFFSET ?"
+      params += [limit, offset]
+    elif offset:
+      sql += " LIMIT -1 OFFSET ?"
+      params.append(offset)
+    return [(row[0], _row_to_transaction(row[1:])) for row in self.connection.execute(sql, params)]
+
+  def iter_transactions(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> Iterator[Transaction]:
+    # Same filters and order as query(), streamed from the cursor instead of
+    # collected into a list.
+    where, params = _filters(start, end, category)
+    cursor = self.connection.execute(
+      f"SELECT date, category, memo, amount_cents FROM transactions{where} ORDER BY date, id",
+      params,
+    )
+    for row in cursor:
+      yield _row_to_transaction(row)
+
+  def count(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> int:
+    where, params = _filters(start, end, category)
+    (count,) = self.connection.execute(f"SELECT COUNT(*) FROM transactions{where}", params).fetchone()
+    return int(count)
+
+  def totals(
+    self,
+    *,
+    start: date | None = None,
+    end: date | None = None,
+    category: str | None = None,
+  ) -> tuple[Decimal, Decimal]:
+    where, params = _filters(start, end, category)
+    income, expenses = self.connection.execute(
+      "SELECT"
+      " COALESCE(SUM(CASE WHEN amount_cents >= 0 THEN amount_cents END), 0),"
+      " COALESCE(SUM(CASE WHEN amount_cents < 0 THEN amount_cents END), 0)"
+      f" FROM transactions{where}",
+      params,
+    ).fetchone()
+    return from_cents(income), from_cents(expenses)
+
+  def categories(self) -> list[str]:
+    rows = self.connection.execute("SELECT DISTINCT category FROM transactions ORDER BY category")
+    return [row[0] for row in rows]
+
+def _filters(start: date | None, end: date | None, category: str | None) -> tuple[str, list[Any]]:
+  clauses: list[str] = []
+  params: list[Any] = []
+  if start is not None:
+    clauses.append("date >= ?")
+    params.append(start.isoformat())
+  if end is not None:
+    clauses.append("date <= ?")
+    params.append(end.isoformat())
+  if category is not None:
+    clauses.append("category = ?")
+    params.append(category)
+  where = f" WHERE {' AND '.join(clauses)}" if clauses else ""
+  return where, params
+
+def _transaction_to_row(tx: Transaction) -> tuple[str, str, str, int]:
+  return (tx.date.isoformat(), tx.category, tx.memo, to_cents(tx.amount))
+
+def _row_to_transaction(row: Any) -> Transaction:
+  return Transaction(
+    date=date.fromisoformat(row[0]),
+    category=row[1],
+    memo=row[2],
+    amount=from_cents(row[3]),
+  )
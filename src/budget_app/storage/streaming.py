@@ -0,0 +1,120 @@
+from __future__ import annotations
+
+import json
+from typing import Any, Callable, Iterator, TextIO
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+# No single record comes anywhere near this; past it the data is malformed
+# rather than merely split across chunks.
+_MAX_VALUE_SIZE = 1 << 24
+
+class _Scanner:
+  def __init__(self, handle: TextIO, chunk_size: int) -> None:
+    self._handle = handle
+    self._chunk_size = chunk_size
+    self._buffer = ""
+    self._pos = 0
+    self._eof = False
+
+  def _fill(self) -> bool:
+    if self._eof:
+      return False
+    chunk = self._handle.read(self._chunk_size)
+    if not chunk:
+      self._eof = True
+      return False
+    self._buffer = self._buffer[self._pos:] + chunk
+    self._pos = 0
+    return True
+
+  def peek(self) -> str:
+    while True:
+      while self._pos < len(self._buffer) and self._buffer[self._pos] in _WHITESPACE:
+        self._pos += 1
+      if self._pos < len(self._buffer):
+        return self._buffer[self._pos]
+      if not self._fill():
+        return ""
+
+  def expect(self, token: str) -> None:
+    found = self.peek()
+    if found != token:
+      raise ValueError(f"Expected {token!r} but found {found or 'end of file'!r}.")
+    self._pos += 1
+
+  def decode(self) -> Any:
+    self.peek()
+    while True:
+      try:
+        value, end = _DECODER.raw_decode(self._buffer, self._pos)
+      except json.JSONDecodeError:
+        if len(self._buffer) - self._pos < _MAX_VALUE_SIZE and self._fill():
+          continue
+        raise
+      # A number running into the end of the buffer may continue in the next
+      # chunk, so only accept a value that ends before the data does.
+      if end == len(self._buffer) and self._fill():
+        continue
+      self._pos = end
+      return value
+
+def iter_json_array(
+  handle: TextIO,
+  *,
+  member: str | None = None,
+  on_member: Callable[[str, Any], None] | None = None,
+  chunk_size: int = 1 << 16,
+) -> Iterator[Any]:
+  # Yields the elements of a top-level JSON array one at a time, reading the
+  # file in chunks.  With ``member`` the document is an object and the array
+  # is the value of that key; every other member is decoded whole and handed
+  # to ``on_member``.  Malformed input raises ValueError.
+  scanner = _Scanner(handle, chunk_size)
+  if member is None:
+    yield from _iter_array(scanner)
+    _expect_end(scanner)
+    return
+
+  scanner.expect("{")
+  if scanner.peek() == "}":
+    raise ValueError(f"Missing {member!r} member.")
+  found = False
+  while True:
+    key = scanner.decode()
+    if not isinstance(key, str):
+      raise ValueError("Object keys must be strings.")
+    scanner.expect(":")
+    if key == member:
+      found = True
+      yield from _iter_array(scanner)
+    else:
+      value = scanner.decode()
+      if on_member is not None:
+        on_member(key, value)
+    if scanner.peek() == ",":
+      scanner.expect(",")
+      continue
+    scanner.expect("}")
+    break
+  if not found:
+    raise ValueError(f"Missing {member!r} member.")
+  _expect_end(scanner)
+
+def _iter_array(scanner: _Scanner) -> Iterator[Any]:
+  scanner.expect("[")
+  if scanner.peek() == "]":
+    scanner.expect("]")
+    return
+  while True:
+    yield scanner.decode()
+    if scanner.peek() == ",":
+      scanner.expect(",")
+      continue
+    scanner.expect("]")
+    return
+
+def _expect_end(scanner: _Scanner) -> None:
+  trailing = scanner.peek()
+  if trailing:
+    raise ValueError(f"Unexpected trailing data {trailing!r}.")
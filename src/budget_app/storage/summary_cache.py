@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import Any, Sequence
+
+from budget_app.models.summary import Subtotal, SummaryAggregates
+from budget_app.storage.atomic import atomic_write
+
+SUMMARY_FORMAT = "budget-app-summary"
+SUMMARY_VERSION = 1
+
+_CHUNK = 1 << 20
+
+# [size, mtime_ns, digest], or None for a file that does not exist.
+Fingerprint = list[Any] | None
+
+def summary_path(path: Path) -> Path:
+  return path.with_suffix(".summary.json")
+
+def file_fingerprint(path: Path) -> Fingerprint:
+  try:
+    stat = os.stat(path)
+  except FileNotFoundError:
+    return None
+  digest = hashlib.blake2b(digest_size=16)
+  with open(path, "rb") as handle:
+    while chunk := handle.read(_CHUNK):
+      digest.update(chunk)
+  return [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+
+def encode_cells(summary: SummaryAggregates) -> list[list[Any]]:
+  return [
+    [month, category, format(cell.income, "f"), format(cell.expenses, "f"), cell.count]
+    for (month, category), cell in sorted(summary.cells.items())
+  ]
+
+def decode_cells(rows: list[list[Any]]) -> SummaryAggregates:
+  # Raises ValueError, TypeError or InvalidOperation on malformed rows.
+  return SummaryAggregates.from_cells(
+    {
+      (month, category): Subtotal(Decimal(income), Decimal(expenses), int(count))
+      for month, category, income, expenses, count in rows
+    }
+  )
+
+def read_summary(sidecar: Path, paths: Sequence[Path]) -> SummaryAggregates | None:
+  # The cached summary of ``paths``, or None when there is no sidecar, it is
+  # unreadable, or any of the files changed since it was written.  Size and
+  # mtime are compared first so a stale sidecar is rejected without reading
+  # the data; the content hash then catches same-size rewrites within the
+  # filesystem's mtime resolution.
+  try:
+    with open(sidecar, encoding="utf-8") as handle:
+      payload = json.load(handle)
+    if payload.get("format") != SUMMARY_FORMAT or payload.get("version") != SUMMARY_VERSION:
+      return None
+    files = payload["files"]
+    if sorted(files) != sorted(path.name for path in paths):
+      return None
+    for path in paths:
+      expected = files[path.name]
+      try:
+        stat = os.stat(path)
+      except FileNotFoundError:
+        if expected is not None:
+          return None
+        continue
+      if expected is None or expected[:2] != [stat.st_size, stat.st_mtime_ns]:
+        return None
+    if any(files[path.name] != file_fingerprint(path) for path in paths):
+      return None
+    summary = decode_cells(payload["cells"])
+  except (OSError, ValueError, KeyError, TypeError, InvalidOperation):
+    return None
+  if summary.count != payload.get("count"):
+    return None
+  return summary
+
+def write_summary(sidecar: Path, paths: Sequence[Path], summary: SummaryAggregates) -> None:
+  # ``summary`` must describe the files exactly as they are on disk now.
+  payload = {
+    "format": SUMMARY_FORMAT,
+    "version": SUMMARY_VERSION,
+    "files": {path.name: file_fingerprint(path) for path in paths},
+    "count": summary.count,
+    "income": format(summary.income, "f"),
+    "expenses": format(summary.expenses, "f"),
+    "cells": encode_cells(summary),
+  }
+  with atomic_write(sidecar) as handle:
+    json.dump(payload, handle, separators=(",", ":"))
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+import os
+import threading
+from pathlib import Path
+from typing import Callable, Iterable
+
+# (inode, size, mtime_ns); any of them changes when a file is appended to,
+# rewritten in place or replaced by a rename.
+FileStamp = tuple[int, int, int]
+
+def file_stamp(path: Path) -> FileStamp | None:
+  try:
+    stat = os.stat(path)
+  except FileNotFoundError:
+    return None
+  return (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+class FileWatcher:
+  # Polls the stamps of ``paths()`` every ``interval`` seconds and calls
+  # ``on_change`` from its own thread when a file appears, disappears or
+  # changes.  A tick costs a few stat() calls, and polling behaves the same
+  # on every platform and filesystem, network shares included, where
+  # inotify-style notifications do not.  ``paths`` is re-evaluated each
+  # tick so files that come and go (journal segments) are picked up.
+  def __init__(
+    self,
+    paths: Callable[[], Iterable[Path]],
+    on_change: Callable[[], None],
+    *,
+    interval: float = 1.0,
+  ) -> None:
+    self._paths = paths
+    self._on_change = on_change
+    self._interval = interval
+    self._stopped = threading.Event()
+    self._stamps = self._snapshot()
+    self._thread = threading.Thread(target=self._run, name="ledger-watcher", daemon=True)
+
+  def start(self) -> None:
+    self._thread.start()
+
+  def stop(self) -> None:
+    self._stopped.set()
+    if self._thread.is_alive():
+      self._thread.join()
+
+  def poll(self) -> bool:
+    # One check, as the thread does it; True (after calling on_change) if
+    # anything changed since the previous check.
+    stamps = self._snapshot()
+    if stamps == self._stamps:
+      return False
+    self._stamps = stamps
+    self._on_change()
+    return True
+
+  def _snapshot(self) -> dict[Path, FileStamp | None]:
+    return {path: file_stamp(path) for path in self._paths()}
+
+  def _run(self) -> None:
+    while not self._stopped.wait(self._interval):
+      try:
+        self.poll()
+      except OSError:
+        # The directory may be mid-rename; the next tick looks again.
+        continue
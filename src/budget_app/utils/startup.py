@@ -0,0 +1,34 @@
+import sys
+import time
+from typing import TextIO
+
+
+class StartupProfile:
+    # Wall-clock marks for the phases of a cold start.  Each mark closes the
+    # phase that began at the previous one, so the report reads as a
+    # breakdown of where the time to a usable window went.
+
+    def __init__(self) -> None:
+        self._start = time.perf_counter()
+        self._marks: list[tuple[str, float]] = []
+
+    def mark(self, phase: str) -> None:
+        self._marks.append((phase, time.perf_counter()))
+
+    def phases(self) -> list[tuple[str, float, float]]:
+        # (phase, seconds spent in it, seconds since the profile started)
+        phases = []
+        previous = self._start
+        for phase, at in self._marks:
+            phases.append((phase, at - previous, at - self._start))
+            previous = at
+        return phases
+
+    def format(self) -> str:
+        lines = [f"{'phase':<24}{'ms':>10}{'total ms':>12}"]
+        for phase, spent, elapsed in self.phases():
+            lines.append(f"{phase:<24}{spent * 1000:>10.1f}{elapsed * 1000:>12.1f}")
+        return "\n".join(lines)
+
+    def report(self, stream: TextIO | None = None) -> None:
+        print(self.format(), file=stream or sys.stderr, flush=True)
@@ -0,0 +1,250 @@
+import cProfile
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Collection, Mapping, TextIO
+
+TRACE_ENV = "BUDGET_APP_TRACE"
+PROFILE_ENV = "BUDGET_APP_PROFILE_ACTION"
+
+
+class Span:
+    # One timed region.  Fields set while it is open (row counts, bytes)
+    # are written with its duration.
+
+    __slots__ = ("_tracer", "name", "fields", "_start")
+
+    def __init__(self, tracer: "Tracer", name: str, fields: dict[str, Any]) -> None:
+        self._tracer = tracer
+        self.name = name
+        self.fields = fields
+        self._start = 0
+
+    def set(self, **fields: Any) -> None:
+        self.fields.update(fields)
+
+    def __enter__(self) -> "Span":
+        self._start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._tracer.record(self.name, self._start, time.perf_counter_ns() - self._start, self.fields)
+
+
+class _NullSpan:
+    # What span() returns while tracing is off: one shared object whose
+    # methods do nothing, so an instrumented call site costs a global lookup
+    # and two no-op calls.
+
+    __slots__ = ()
+
+    def set(self, **fields: Any) -> None:
+        pass
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    # Writes spans and counters to ``path`` as JSON lines, or in the Chrome
+    # trace-event format (chrome://tracing, Perfetto) when ``chrome`` is set,
+    # which by default it is for a ``.json`` path.  Actions named in
+    # ``profile_actions`` ("*" for all) are also run under cProfile, each
+    # capture saved as a .prof file in ``profile_dir`` for pstats or
+    # snakeviz.  Safe to use from any thread.
+
+    def __init__(
+        self,
+        path: Path | None,
+        *,
+        chrome: bool | None = None,
+        profile_actions: Collection[str] = (),
+        profile_dir: Path | None = None,
+    ) -> None:
+        self.path = path
+        self.chrome = path is not None and (path.suffix == ".json" if chrome is None else chrome)
+        self._profile_actions = frozenset(profile_actions)
+        self._profile_dir = profile_dir or (path.parent if path is not None else Path.cwd())
+        self._profiles = 0
+        self._profiling = False
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+        self._pid = os.getpid()
+        self._counters: dict[str, float] = {}
+        self._events = 0
+        self._handle: TextIO | None = None
+        if path is not None:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            self._handle = open(path, "w", encoding="utf-8")
+            if self.chrome:
+                self._handle.write("[\n")
+
+    @property
+    def counters(self) -> Mapping[str, float]:
+        return dict(self._counters)
+
+    def span(self, name: str, fields: dict[str, Any]) -> Span:
+        return Span(self, name, fields)
+
+    def count(self, name: str, value: float) -> None:
+        with self._lock:
+            total = self._counters[name] = self._counters.get(name, 0) + value
+            if self.chrome:
+                event = {"name": name, "ph": "C", "ts": self._us(time.perf_counter_ns()), "pid": self._pid, "args": {name: total}}
+            else:
+                event = {"type": "counter", "name": name, "ts": self._us(time.perf_counter_ns()), "value": value, "total": total}
+            self._write(event)
+
+    def record(self, name: str, start_ns: int, duration_ns: int, fields: Mapping[str, Any]) -> None:
+        if self.chrome:
+            event = {
+                "name": name,
+                "ph": "X",
+                "ts": self._us(start_ns),
+                "dur": duration_ns / 1000,
+                "pid": self._pid,
+                "tid": threading.get_ident(),
+                "args": dict(fields),
+            }
+        else:
+            event = {
+                "type": "span",
+                "name": name,
+                "ts": self._us(start_ns),
+                "ms": duration_ns / 1e6,
+                "thread": threading.current_thread().name,
+                **fields,
+            }
+        with self._lock:
+            self._write(event)
+
+    def action(self, name: str) -> "_Action":
+        return _Action(self, name)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._handle is None:
+                return
+            if self.chrome:
+                self._handle.write("\n]\n")
+            self._handle.close()
+            self._handle = None
+
+    def _profiles_action(self, name: str) -> bool:
+        # Profiles do not nest: an action inside a profiled one is already
+        # part of its capture.
+        return not self._profiling and (name in self._profile_actions or "*" in self._profile_actions)
+
+    def _save_profile(self, name: str, profiler: cProfile.Profile) -> Path:
+        with self._lock:
+            self._profiles += 1
+            number = self._profiles
+        path = self._profile_dir / f"{name}.{number}.prof"
+        self._profile_dir.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(path)
+        return path
+
+    def _us(self, ns: int) -> float:
+        return (ns - self._origin) / 1000
+
+    def _write(self, event: dict[str, Any]) -> None:
+        # Callers hold the lock.
+        if self._handle is None:
+            return
+        if self.chrome and self._events:
+            self._handle.write(",\n")
+        self._handle.write(json.dumps(event, default=str, separators=(",", ":")))
+        if not self.chrome:
+            self._handle.write("\n")
+        self._events += 1
+
+
+class _Action:
+    # A span around one user action (a GUI event handler), run under cProfile
+    # when the tracer was asked to profile it.
+
+    __slots__ = ("_tracer", "_span", "_profiler")
+
+    def __init__(self, tracer: Tracer, name: str) -> None:
+        self._tracer = tracer
+        self._span = tracer.span(name, {})
+        self._profiler: cProfile.Profile | None = None
+
+    def __enter__(self) -> Span:
+        if self._tracer._profiles_action(self._span.name):
+            self._tracer._profiling = True
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+        return self._span.__enter__()
+
+    def __exit__(self, *exc_info: object) -> None:
+        # The duration excludes writing the profile out.
+        end = time.perf_counter_ns()
+        span = self._span
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._tracer._profiling = False
+            span.set(profile=str(self._tracer._save_profile(span.name, self._profiler)))
+        self._tracer.record(span.name, span._start, end - span._start, span.fields)
+
+
+_tracer: Tracer | None = None
+
+
+def install(tracer: Tracer | None) -> Tracer | None:
+    # Makes ``tracer`` the process's tracer (None turns tracing off) and
+    # returns the previous one, which the caller closes.
+    global _tracer
+    previous, _tracer = _tracer, tracer
+    return previous
+
+
+def active() -> Tracer | None:
+    return _tracer
+
+
+def from_environment(
+    environ: Mapping[str, str] = os.environ,
+    *,
+    path: Path | None = None,
+    profile_actions: Collection[str] = (),
+) -> Tracer | None:
+    # A tracer for the --trace / --profile-action flags, falling back to
+    # BUDGET_APP_TRACE (output path) and BUDGET_APP_PROFILE_ACTION (comma-
+    # separated action names); None when neither asks for anything.
+    if path is None and environ.get(TRACE_ENV):
+        path = Path(environ[TRACE_ENV])
+    if not profile_actions and environ.get(PROFILE_ENV):
+        profile_actions = [name.strip() for name in environ[PROFILE_ENV].split(",") if name.strip()]
+    if path is None and not profile_actions:
+        return None
+    return Tracer(path, profile_actions=profile_actions)
+
+
+def span(name: str, **fields: Any) -> Span | _NullSpan:
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.span(name, fields)
+
+
+def action(name: str) -> "_Action | _NullSpan":
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return tracer.action(name)
+
+
+def count(name: str, value: float = 1) -> None:
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, value)
+
@@ -1,21 +1,242 @@
-def is_valid_amount(amount):
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import TYPE_CHECKING, Any, Callable, Iterable, Mapping, Sequence
+
+if TYPE_CHECKING:
+    from budget_app.models.transaction import Transaction
+
+CATEGORY_REQUIRED = "Category cannot be empty."
+KIND_REQUIRED = "Select Income or Expense."
+DATE_FORMAT = "Use YYYY-MM-DD format."
+AMOUNT_INVALID = "Enter a valid numeric amount."
+
+FORM_KINDS: Mapping[str, str] = {"income": "income", "expense": "expense"}
+
+
+class FieldError(ValueError):
+    # A rule failed; ``field`` is "category", "kind", "date" or "amount".
+    def __init__(self, field: str, message: str) -> None:
+        super().__init__(message)
+        self.field = field
+
+
+@dataclass(frozen=True, slots=True)
+class RowError:
+    row: int
+    field: str
+    message: str
+
+
+@dataclass(slots=True)
+class ValidationReport:
+    # The valid rows as transactions, ``rows`` giving the input position of
+    # each, and the first problem found in every other row.
+    transactions: list[Transaction] = field(default_factory=list)
+    rows: list[int] = field(default_factory=list)
+    errors: list[RowError] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return not self.errors
+
+
+def parse_date(text: str) -> date:
     try:
-        amount = float(amount)
-        return amount > 0
+        return date.fromisoformat(text.strip())
     except ValueError:
+        raise FieldError("date", DATE_FORMAT) from None
+
+
+def parse_magnitude(text: str) -> Decimal:
+    # The amount's absolute value; the kind decides the sign.  NaN and
+    # infinities parse as Decimals but are not amounts.
+    try:
+        amount = Decimal(text.strip())
+    except (InvalidOperation, ValueError):
+        raise FieldError("amount", AMOUNT_INVALID) from None
+    if not amount.is_finite():
+        raise FieldError("amount", AMOUNT_INVALID)
+    return amount.copy_abs()
+
+
+class TransactionValidator:
+    # The rules a transaction's raw strings must pass, for one row (the form)
+    # or for columns of them (imports, pasted sheets, API batches).  Both
+    # apply the same per-field rules in the same order, so they accept and
+    # reject exactly the same input with the same messages.  A batch runs
+    # each rule once per distinct value in its column rather than once per
+    # row: statements repeat a few hundred dates, a handful of categories
+    # and kinds, and many amounts, so most rows cost a dict lookup.
+    #
+    # ``kinds`` maps lowercased kind strings to "income" or "expense".  A
+    # missing kind (None) is read from the amount's sign, as is an unknown
+    # one with ``infer_unknown_kinds``; otherwise it is an error.
+    # ``categories``, when given, is the set of allowed categories.  With
+    # ``thousands_separator`` an amount may group its digits in threes, as
+    # in "1,234.50"; the separator anywhere else, as in the decimal comma of
+    # "12,50", makes the amount invalid.
+    def __init__(
+        self,
+        *,
+        kinds: Mapping[str, str] = FORM_KINDS,
+        infer_unknown_kinds: bool = False,
+        thousands_separator: str | None = None,
+        categories: Iterable[str] | None = None,
+    ) -> None:
+        self._kinds = dict(kinds)
+        self._infer_unknown_kinds = infer_unknown_kinds
+        self._thousands_separator = thousands_separator
+        self._grouped: re.Pattern[str] | None = None
+        if thousands_separator:
+            separator = re.escape(thousands_separator)
+            self._grouped = re.compile(rf"[+-]?\d{{1,3}}({separator}\d{{3}})*(\.\d+)?")
+        self._categories = None if categories is None else frozenset(categories)
+
+    def fields(
+        self,
+        *,
+        raw_date: str,
+        raw_category: str,
+        raw_memo: str,
+        raw_amount: str,
+        raw_kind: str | None,
+    ) -> tuple[date, str, str, Decimal]:
+        # (date, category, memo, signed amount), or FieldError for the first
+        # rule the row breaks.
+        category = self._category(raw_category)
+        kind = None if raw_kind is None else self._kind(raw_kind)
+        day = parse_date(raw_date)
+        return day, category, raw_memo.strip(), _signed(self._amount(raw_amount), kind)
+
+    def validate(
+        self,
+        dates: Sequence[str],
+        categories: Sequence[str],
+        memos: Sequence[str],
+        amounts: Sequence[str],
+        kinds: Sequence[str | None] | None = None,
+    ) -> ValidationReport:
+        # Imported here: transaction.py imports this module for from_input.
+        from budget_app.models.transaction import Transaction
+
+        count = len(dates)
+        if any(len(column) != count for column in (categories, memos, amounts)) or (
+            kinds is not None and len(kinds) != count
+        ):
+            raise ValueError("Every column must have one value per row.")
+        report = ValidationReport()
+        checked = [
+            _each(self._category, categories),
+            _each(self._kind, kinds, skip_none=True) if kinds is not None else ([None] * count, False),
+            _each(parse_date, dates),
+            _each(self._amount, amounts),
+        ]
+        columns = [values for values, _ in checked]
+        rows: Sequence[int] = range(count)
+        if any(failed for _, failed in checked):
+            rows = [row for row in rows if not _rejected(row, columns, report)]
+            columns = [[values[row] for row in rows] for values in columns]
+            memos = [memos[row] for row in rows]
+        categories, kinds, days, parsed = columns
+        signed = list(map(_signed, parsed, kinds))
+        memos, _ = _each(str.strip, memos)
+        report.transactions = list(map(Transaction, days, categories, memos, signed))
+        report.rows = list(rows)
+        return report
+
+    def _category(self, raw: str) -> str:
+        category = raw.strip()
+        if not category:
+            raise FieldError("category", CATEGORY_REQUIRED)
+        if self._categories is not None and category not in self._categories:
+            raise FieldError("category", f"Unknown category {category!r}.")
+        return category
+
+    def _kind(self, raw: str) -> str | None:
+        # None when the amount's sign decides.
+        kind = self._kinds.get(raw.strip().lower())
+        if kind is None and not self._infer_unknown_kinds:
+            raise FieldError("kind", KIND_REQUIRED)
+        return kind
+
+    def _amount(self, raw: str) -> tuple[Decimal, Decimal, bool]:
+        # (magnitude, negated magnitude, written with a minus sign)
+        text = raw.strip()
+        separator = self._thousands_separator
+        if self._grouped is not None and separator in text:
+            if not self._grouped.fullmatch(text):
+                raise FieldError("amount", AMOUNT_INVALID)
+            text = text.replace(separator, "")
+        magnitude = parse_magnitude(text)
+        return magnitude, -magnitude, text.startswith("-")
+
+
+def _each(
+    rule: Callable[[Any], Any],
+    column: Sequence[Any],
+    *,
+    skip_none: bool = False,
+) -> tuple[list[Any], bool]:
+    # ``rule`` applied to every value of ``column``, once per distinct value,
+    # and whether it rejected any; a rejected value maps to its FieldError.
+    results: dict[Any, Any] = {}
+    failed = False
+    for raw in dict.fromkeys(column):
+        if raw is None and skip_none:
+            results[raw] = None
+            continue
+        try:
+            results[raw] = rule(raw)
+        except FieldError as exc:
+            results[raw] = exc
+            failed = True
+    return list(map(results.__getitem__, column)), failed
+
+
+def _rejected(row: int, columns: list[list[Any]], report: ValidationReport) -> bool:
+    # Reports the row's first failed field, in the order the form checks.
+    for column in columns:
+        value = column[row]
+        if isinstance(value, FieldError):
+            report.errors.append(RowError(row, value.field, str(value)))
+            return True
+    return False
+
+
+def _signed(parsed: tuple[Decimal, Decimal, bool], kind: str | None) -> Decimal:
+    magnitude, negated, minus = parsed
+    if kind is None:
+        return negated if minus else magnitude
+    return magnitude if kind == "income" else negated
+
+
+FORM_VALIDATOR = TransactionValidator()
+
+
+def is_valid_amount(amount):
+    try:
+        amount = Decimal(str(amount).strip())
+    except (InvalidOperation, ValueError):
         return False
+    return amount.is_finite() and amount > 0
+
 
 def is_valid_date(date_str):
-    from datetime import datetime
     try:
-        datetime.strptime(date_str, '%Y-%m-%d')
+        parse_date(date_str)
         return True
     except ValueError:
         return False
 
+
 def is_valid_category(category, valid_categories):
     return category in valid_categories
 
+
 def validate_transaction(amount, date, category, valid_categories):
     if not is_valid_amount(amount):
         return False, "Invalid amount. It must be a positive number."
@@ -23,4 +244,4 @@ def validate_transaction(amount, date, category, valid_categories):
         return False, "Invalid date. It must be in YYYY-MM-DD format."
     if not is_valid_category(category, valid_categories):
         return False, f"Invalid category. Valid categories are: {', '.join(valid_categories)}."
-    return True, "Transaction is valid."
\ No newline at end of file
+    return True, "Transaction is valid."
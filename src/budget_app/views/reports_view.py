@@ -0,0 +1,116 @@
+from __future__ import annotations
+
+import tkinter as tk
+from datetime import date
+from decimal import Decimal
+from tkinter import ttk
+from typing import Callable
+
+from budget_app.models.reports import ReportCube, month_window
+
+PERIODS = {"Last 12 months": 12, "Last 36 months": 36, "All time": None}
+FIELDS = {"Expenses": "expenses", "Income": "income", "Net": "balance"}
+
+
+def _format(value: Decimal | None) -> str:
+    return "" if value is None else f"{value:,.2f}"
+
+
+class ReportsWindow:
+    # Category-by-month table drawn straight from a ReportCube.  Rendering
+    # reads cube cells only, so it costs months x categories whatever the
+    # ledger size and refresh() is cheap enough to call after every edit.
+
+    def __init__(
+        self,
+        parent: tk.Misc,
+        cube: ReportCube,
+        *,
+        today: Callable[[], date] = date.today,
+    ) -> None:
+        self._cube = cube
+        self._today = today
+        self.window = tk.Toplevel(parent)
+        self.window.title("Reports")
+        self.window.geometry("900x420")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        self._period_var = tk.StringVar(value="Last 12 months")
+        self._field_var = tk.StringVar(value="Expenses")
+
+        container = ttk.Frame(self.window, padding=12)
+        container.pack(fill="both", expand=True)
+
+        controls = ttk.Frame(container)
+        controls.pack(fill="x", pady=(0, 8))
+        ttk.Label(controls, text="Show").pack(side="left")
+        field_box = ttk.Combobox(controls, textvariable=self._field_var, values=tuple(FIELDS), state="readonly", width=10)
+        field_box.pack(side="left", padx=(6, 12))
+        ttk.Label(controls, text="for").pack(side="left")
+        period_box = ttk.Combobox(controls, textvariable=self._period_var, values=tuple(PERIODS), state="readonly", width=16)
+        period_box.pack(side="left", padx=(6, 0))
+        for box in (field_box, period_box):
+            box.bind("<<ComboboxSelected>>", lambda _event: self.refresh())
+
+        table = ttk.Frame(container)
+        table.pack(fill="both", expand=True)
+        self._tree = ttk.Treeview(table, show="headings")
+        y_scroll = ttk.Scrollbar(table, orient="vertical", command=self._tree.yview)
+        x_scroll = ttk.Scrollbar(table, orient="horizontal", command=self._tree.xview)
+        self._tree.configure(yscrollcommand=y_scroll.set, xscrollcommand=x_scroll.set)
+        self._tree.grid(row=0, column=0, sticky="nsew")
+        y_scroll.grid(row=0, column=1, sticky="ns")
+        x_scroll.grid(row=1, column=0, sticky="ew")
+        table.rowconfigure(0, weight=1)
+        table.columnconfigure(0, weight=1)
+        self._tree.tag_configure("total", font=("Helvetica Neue", 12, "bold"))
+
+        self.refresh()
+
+    @property
+    def is_open(self) -> bool:
+        return self.window is not None
+
+    def lift(self) -> None:
+        if self.window is not None:
+            self.window.deiconify()
+            self.window.lift()
+
+    def close(self) -> None:
+        if self.window is not None:
+            self.window.destroy()
+            self.window = None
+
+    def refresh(self) -> None:
+        if self.window is None:
+            return
+        months_back = PERIODS[self._period_var.get()]
+        field = FIELDS[self._field_var.get()]
+        start = end = None
+        if months_back is not None:
+            start, end = month_window(self._today(), months_back)
+        months, rows = self._cube.table(start, end, field=field)
+
+        columns = ("category", *months, "total")
+        self._tree.delete(*self._tree.get_children())
+        self._tree.configure(columns=columns)
+        self._tree.heading("category", text="Category")
+        self._tree.column("category", width=140, minwidth=100, stretch=False)
+        for month in months:
+            self._tree.heading(month, text=month)
+            self._tree.column(month, width=84, minwidth=60, anchor="e", stretch=False)
+        self._tree.heading("total", text="Total")
+        self._tree.column("total", width=100, minwidth=80, anchor="e", stretch=False)
+
+        for category, values, total in rows:
+            self._tree.insert("", "end", values=(category, *map(_format, values), _format(total)))
+
+        by_month = self._cube.totals_by_month(start, end)
+        month_totals = [getattr(by_month[month], field) if month in by_month else None for month in months]
+        grand_total = sum((value for value in month_totals if value is not None), Decimal(0))
+        self._tree.insert(
+            "",
+            "end",
+            values=("All categories", *map(_format, month_totals), _format(grand_total)),
+            tags=("total",),
+        )
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Any, Callable, Iterable, Sequence
+
+from budget_app.utils import trace
+
+_SHIFT_MASK = 0x0001
+_CONTROL_MASK = 0x0004
+
+
+class VirtualTreeview:
+    # Keeps only the rows in view plus a small buffer as Treeview items.  Rows
+    # are addressed by their position in the row source; scrolling recycles
+    # items instead of creating new ones, and a single-row change touches one
+    # item plus the index text of the items after it in the window.
+
+    def __init__(
+        self,
+        tree: Any,
+        scrollbar: Any,
+        *,
+        row_count: Callable[[], int],
+        row_key: Callable[[int], str],
+        row_values: Callable[[int], Sequence[str]],
+        row_height: int = 28,
+        visible_rows: int = 10,
+        buffer: int = 8,
+    ) -> None:
+        self._tree = tree
+        self._scrollbar = scrollbar
+        self._row_count = row_count
+        self._row_key = row_key
+        self._row_values = row_values
+        self._row_height = row_height
+        self._visible = visible_rows
+        self._buffer = buffer
+
+        self._offset = 0
+        self._items: list[str] = []
+        self._selected: set[int] = set()
+
+        scrollbar.configure(command=self._on_scrollbar)
+        tree.configure(yscrollcommand=self._on_tree_yview)
+        tree.bind("<Configure>", self._on_configure, add="+")
+        tree.bind("<ButtonPress-1>", self._on_click, add="+")
+        tree.bind("<MouseWheel>", self._on_mousewheel)
+        tree.bind("<Button-4>", lambda _event: self._scroll_units(-3))
+        tree.bind("<Button-5>", lambda _event: self._scroll_units(3))
+
+    @property
+    def offset(self) -> int:
+        return self._offset
+
+    @property
+    def materialized(self) -> int:
+        return len(self._items)
+
+    def reset(self) -> None:
+        self._render(self._offset, stale=range(len(self._items)))
+
+    def row_of(self, item_id: str) -> int | None:
+        try:
+            return self._offset + self._items.index(item_id)
+        except ValueError:
+            return None
+
+    def selected_rows(self) -> list[int]:
+        self._capture_selection()
+        return sorted(self._selected)
+
+    def row_inserted(self, row: int) -> None:
+        self._capture_selection()
+        self._selected = {index + 1 if index >= row else index for index in self._selected}
+        position = row - self._offset
+        if position < 0:
+            self._offset += 1
+            self._relabel(0)
+        elif position < len(self._items) or (
+            position == len(self._items) and len(self._items) < self._capacity
+        ):
+            if len(self._items) >= self._capacity:
+                self._tree.delete(self._items.pop())
+            self._items.insert(position, self._tree.insert("", position))
+            self._fill(position)
+            self._relabel(position + 1)
+            self._restore_selection()
+        self._update_scrollbar()
+
+    def row_updated(self, row: int) -> None:
+        position = row - self._offset
+        if 0 <= position < len(self._items):
+            self._fill(position)
+
+    def row_deleted(self, row: int) -> None:
+        self.rows_deleted([row])
+
+    def rows_deleted(self, rows: Iterable[int]) -> None:
+        # Rows are positions before any of them were removed; the row source
+        # already reflects the removal of all of them.
+        self._capture_selection()
+        deleted = sorted(set(rows))
+        gone = set(deleted)
+        self._selected = {row - bisect_left(deleted, row) for row in self._selected if row not in gone}
+
+        changed = len(self._items)
+        for row in reversed(deleted):
+            position = row - self._offset
+            if 0 <= position < len(self._items):
+                self._tree.delete(self._items.pop(position))
+                changed = min(changed, position)
+        above = bisect_left(deleted, self._offset)
+        if above:
+            self._offset -= above
+            changed = 0
+
+        count = self._row_count()
+        while len(self._items) < self._capacity and self._offset + len(self._items) < count:
+            # Pull the rows below the window up into it.
+            self._items.append(self._tree.insert("", "end"))
+            self._fill(len(self._items) - 1)
+        while self._offset > 0 and len(self._items) < self._visible:
+            # At the bottom of the ledger: reveal the rows above instead.
+            self._offset -= 1
+            self._items.insert(0, self._tree.insert("", 0))
+            self._fill(0)
+            changed += 1
+        self._relabel(changed)
+        self._update_scrollbar()
+
+    @property
+    def _capacity(self) -> int:
+        return self._visible + self._buffer
+
+    def _render(self, offset: int, *, stale: Sequence[int] = ()) -> None:
+        self._capture_selection()
+        count = self._row_count()
+        self._selected.intersection_update(range(count))
+        offset = max(0, min(offset, count - self._visible))
+        wanted = max(0, min(self._capacity, count - offset))
+        shift = offset - self._offset
+        self._offset = offset
+
+        # Items that keep their row need no work; recycled items are moved to
+        # the other end of the window and refilled.
+        refill = set(stale)
+        current = len(self._items)
+        if 0 < shift < current:
+            recycled = self._items[:shift]
+            del self._items[:shift]
+            for iid in recycled:
+                self._tree.move(iid, "", "end")
+            self._items.extend(recycled)
+            refill.update(range(current - shift, current))
+        elif 0 < -shift < current:
+            recycled = self._items[shift:]
+            del self._items[shift:]
+            for position, iid in enumerate(recycled):
+                self._tree.move(iid, "", position)
+            self._items[:0] = recycled
+            refill.update(range(-shift))
+        elif shift:
+            refill.update(range(current))
+
+        while len(self._items) > wanted:
+            self._tree.delete(self._items.pop())
+        while len(self._items) < wanted:
+            self._items.append(self._tree.insert("", "end"))
+            refill.add(len(self._items) - 1)
+        filled = 0
+        for position in sorted(refill):
+            if position < len(self._items):
+                self._fill(position)
+                filled += 1
+        trace.count("tree.rows_filled", filled)
+
+        self._tree.yview_moveto(0)
+        self._restore_selection()
+        self._update_scrollbar()
+
+    def _fill(self, position: int) -> None:
+        row = self._offset + position
+        self._tree.item(
+            self._items[position],
+            text=self._row_key(row),
+            values=tuple(self._row_values(row)),
+            tags=(_stripe(row),),
+        )
+
+    def _relabel(self, start: int) -> None:
+        # Rows after a structural change keep their values but move to a new
+        # position, so only their index text and stripe need refreshing.
+        for position in range(start, len(self._items)):
+            row = self._offset + position
+            self._tree.item(self._items[position], text=self._row_key(row), tags=(_stripe(row),))
+
+    def _capture_selection(self) -> None:
+        if not self._items:
+            return
+        self._selected.difference_update(range(self._offset, self._offset + len(self._items)))
+        for item_id in self._tree.selection():
+            row = self.row_of(item_id)
+            if row is not None:
+                self._selected.add(row)
+
+    def _restore_selection(self) -> None:
+        wanted = [
+            self._items[row - self._offset]
+            for row in sorted(self._selected)
+            if 0 <= row - self._offset < len(self._items)
+        ]
+        if set(self._tree.selection()) != set(wanted):
+            self._tree.selection_set(wanted)
+
+    def _update_scrollbar(self) -> None:
+        count = self._row_count()
+        if count <= self._visible:
+            self._scrollbar.set(0.0, 1.0)
+            return
+        first = self._offset / count
+        last = min(1.0, (self._offset + self._visible) / count)
+        self._scrollbar.set(first, last)
+
+    def _scroll_units(self, units: int) -> str:
+        self._render(self._offset + units)
+        return "break"
+
+    def _on_scrollbar(self, action: str, *args: str) -> None:
+        if action == "moveto":
+            self._render(round(float(args[0]) * self._row_count()))
+        elif action == "scroll":
+            step = self._visible if args[1] == "pages" else 1
+            self._render(self._offset + int(args[0]) * step)
+
+    def _on_tree_yview(self, first: str, _last: str) -> None:
+        # Keyboard navigation into the buffer scrolls the Treeview itself;
+        # fold that into the window offset and put the widget back at its top.
+        fraction = float(first)
+        if fraction > 0 and self._items:
+            self._render(self._offset + round(fraction * len(self._items)))
+
+    def _on_mousewheel(self, event: Any) -> str:
+        delta = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_units(-3 * delta)
+
+    def _on_click(self, event: Any) -> None:
+        # A plain click replaces the selection, including rows scrolled out of
+        # the window; shift and control clicks extend it.
+        if not event.state & (_SHIFT_MASK | _CONTROL_MASK):
+            self._selected.clear()
+
+    def _on_configure(self, event: Any) -> None:
+        # One row's worth of height goes to the column headings.
+        visible = max(1, event.height // self._row_height - 1)
+        if visible != self._visible:
+            self._visible = visible
+            self._render(self._offset)
+
+
+def _stripe(row: int) -> str:
+    return "evenrow" if row % 2 == 0 else "oddrow"
@@ -0,0 +1,138 @@
+import tempfile
+import unittest
+from datetime import date
+from pathlib import Path
+
+from budget_app import api
+from budget_app.api import LedgerService, RequestError
+from budget_app.storage.journal import JournalRepository
+
+RECORDS = [
+    {"date": "2024-05-01", "category": "Salary", "amount": "3500.00", "kind": "income"},
+    {"date": "2024-05-02", "category": "Rent", "amount": "-1200.00"},
+    {"date": "2024-06-03", "category": "Food", "memo": "Market", "amount": "45.10", "kind": "expense"},
+]
+
+
+class ServiceTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmpdir.name) / "transactions.json"
+        self.service = LedgerService.open(self.path)
+        self.service.add_many(RECORDS)
+
+    def tearDown(self) -> None:
+        self.service.close()
+        self._tmpdir.cleanup()
+
+
+class TestLedgerService(ServiceTestCase):
+    def test_listing_pages_and_filters(self) -> None:
+        page = self.service.list_transactions(offset=1, limit=1)
+        self.assertEqual(page["total"], 3)
+        self.assertEqual([item["category"] for item in page["items"]], ["Rent"])
+        self.assertEqual(page["items"][0]["amount"], "-1200.00")
+
+        june = self.service.list_transactions(start=date(2024, 6, 1))
+        self.assertEqual([item["memo"] for item in june["items"]], ["Market"])
+        with self.assertRaises(RequestError):
+            self.service.list_transactions(limit=0)
+
+    def test_rollups(self) -> None:
+        self.assertEqual(self.service.summary()["balance"], "2254.90")
+        categories = self.service.categories(end=date(2024, 5, 31))["categories"]
+        self.assertEqual(sorted(categories), ["Rent", "Salary"])
+        self.assertEqual(self.service.categories()["categories"]["Food"]["expenses"], "-45.10")
+        partial = self.service.categories(start=date(2024, 5, 2), end=date(2024, 6, 3))["categories"]
+        self.assertEqual(sorted(partial), ["Food", "Rent"])
+
+    def test_bulk_insert_is_all_or_nothing(self) -> None:
+        with self.assertRaises(RequestError) as caught:
+            self.service.add_many([RECORDS[0], {"date": "May 1", "category": "Food", "amount": "1"}])
+        self.assertEqual(caught.exception.rows, [{"index": 1, "error": "Use YYYY-MM-DD format."}])
+        self.assertEqual(self.service.summary()["count"], 3)
+
+        self.service.close()
+        reopened = JournalRepository(self.path)
+        self.assertEqual(len(reopened.load()), 3)
+        reopened.close()
+
+    def test_etags_differ_between_services(self) -> None:
+        # A restarted server starts counting versions from 0 again; its
+        # tags must not match the ones clients kept from the previous run.
+        first = LedgerService.open(self.path)
+        second = LedgerService.open(self.path)
+        try:
+            self.assertEqual(first.version, second.version)
+            self.assertNotEqual(first.etag, second.etag)
+            self.assertNotEqual(first.render("/api/summary", first.summary)[0], second.etag)
+        finally:
+            first.close()
+            second.close()
+
+    def test_writes_bump_version_and_clear_cache(self) -> None:
+        etag, first = self.service.render("/api/summary", self.service.summary)
+        calls = []
+        self.assertEqual(self.service.render("/api/summary", lambda: calls.append(1))[1], first)
+        self.assertEqual(calls, [])
+
+        self.service.add_many([{"date": "2024-06-04", "category": "Fuel", "amount": "-60"}])
+        new_etag, body = self.service.render("/api/summary", self.service.summary)
+        self.assertNotEqual(new_etag, etag)
+        self.assertNotEqual(body, first)
+
+    def test_changes_from_other_processes_are_merged(self) -> None:
+        etag, _ = self.service.render("/api/summary", self.service.summary)
+        other = JournalRepository(self.path)
+        other.load()
+        other.delete([0])
+        other.close()
+
+        new_etag, body = self.service.render("/api/summary", self.service.summary)
+        self.assertNotEqual(new_etag, etag)
+        self.assertIn(b'"count":2', body)
+        # The bulk insert lands after the other process's change.
+        self.service.add_many([RECORDS[0]])
+        self.assertEqual(self.service.summary()["count"], 3)
+        self.assertEqual(len(JournalRepository(self.path).load()), 3)
+
+
+@unittest.skipIf(api._flask is None, "Flask is not installed")
+class TestApiRoutes(ServiceTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.client = api.create_app(self.service).test_client()
+
+    def test_etag_round_trip(self) -> None:
+        response = self.client.get("/api/transactions?limit=2&category=Rent")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["total"], 1)
+        etag = response.headers["ETag"]
+
+        cached = self.client.get("/api/transactions?limit=2&category=Rent", headers={"If-None-Match": etag})
+        self.assertEqual(cached.status_code, 304)
+
+        posted = self.client.post("/api/transactions", json=[{"date": "2024-06-05", "category": "Rent", "amount": "-5"}])
+        self.assertEqual(posted.status_code, 201)
+        fresh = self.client.get("/api/transactions?limit=2&category=Rent", headers={"If-None-Match": etag})
+        self.assertEqual(fresh.status_code, 200)
+        self.assertEqual(fresh.get_json()["total"], 2)
+
+    def test_bad_requests(self) -> None:
+        self.assertEqual(self.client.get("/api/transactions?from=yesterday").status_code, 400)
+        self.assertEqual(self.client.get("/api/transactions?limit=5000").status_code, 400)
+        response = self.client.post("/api/transactions", json={"transactions": [{"category": ""}]})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.get_json()["rows"][0]["index"], 0)
+        self.assertEqual(self.client.get("/api/summary").get_json()["count"], 3)
+
+    def test_bad_pages_are_rejected_before_the_etag_check(self) -> None:
+        current = {"If-None-Match": self.service.etag}
+        self.assertEqual(self.client.get("/api/transactions", headers=current).status_code, 304)
+        for query in ("offset=-1&limit=0", "limit=0", "offset=-1", "limit=5000"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.get(f"/api/transactions?{query}", headers=current).status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,30 @@
+import unittest
+
+from benchmarks.harness import compare_results, run_benchmarks
+
+class TestBenchmarkHarness(unittest.TestCase):
+  def test_run_reports_every_case_and_size(self) -> None:
+    results = run_benchmarks([20, 40], repeat=1)
+    cases = {row["case"] for row in results["results"]}
+    self.assertIn("treeview.refresh", cases)
+    self.assertEqual(len(results["results"]), 2 * len(cases))
+    for row in results["results"]:
+      self.assertGreater(row["ops"], 0)
+      self.assertEqual(row["best"], min(row["runs"]))
+
+  def test_unknown_case_is_rejected(self) -> None:
+    with self.assertRaises(ValueError):
+      run_benchmarks([10], cases=["no.such.case"])
+
+  def test_compare_flags_regressions_beyond_tolerance(self) -> None:
+    baseline = {"results": [
+      {"case": "a", "size": 10, "best": 1.0},
+      {"case": "b", "size": 10, "best": 1.0},
+    ]}
+    current = {"results": [
+      {"case": "a", "size": 10, "best": 1.1},
+      {"case": "b", "size": 10, "best": 1.3},
+      {"case": "c", "size": 10, "best": 9.0},
+    ]}
+    rows = compare_results(baseline, current, tolerance=0.2)
+    self.assertEqual([(row["case"], row["regressed"]) for row in rows], [("a", False), ("b", True)])
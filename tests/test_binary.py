@@ -0,0 +1,137 @@
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+from budget_app.storage import binary
+from budget_app.storage.binary import MappedLedger, is_binary_ledger, write_ledger_file
+from budget_app.storage.repository import TransactionRepository, convert_ledger
+
+def make_ledger(count: int, seed: int = 3) -> list[Transaction]:
+  rng = random.Random(seed)
+  categories = ["Food", "Rent", "Salary", "Café"]
+  start = date(2023, 1, 1)
+  return [
+    Transaction(
+      date=start + timedelta(days=rng.randrange(400)),
+      category=rng.choice(categories),
+      memo=rng.choice(["", "Food", f"memo {index}"]),
+      amount=Decimal(rng.randrange(-90000, 90000)).scaleb(-2),
+    )
+    for index in range(count)
+  ]
+
+class MappedLedgerMixin:
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.path = Path(self._tmpdir.name) / "transactions.ledger"
+    self.transactions = make_ledger(1500)
+    write_ledger_file(self.path, self.transactions)
+    self.ledger = MappedLedger(self.path)
+
+  def tearDown(self) -> None:
+    self.ledger.close()
+    self._tmpdir.cleanup()
+
+  def test_rows_round_trip_in_ledger_order(self) -> None:
+    self.assertTrue(is_binary_ledger(self.path))
+    self.assertEqual([tx for batch in self.ledger.iter_batches(400) for tx in batch], self.transactions)
+    self.assertEqual(self.ledger[42], self.transactions[42])
+    self.assertEqual(sorted(self.ledger.categories), ["Café", "Food", "Rent", "Salary"])
+
+  def test_header_answers_whole_ledger_queries(self) -> None:
+    summary = SummaryAggregates(self.transactions)
+    self.assertEqual(len(self.ledger), 1500)
+    self.assertEqual(self.ledger.count(), 1500)
+    self.assertEqual(self.ledger.totals(), (summary.income, summary.expenses))
+    self.assertEqual(self.ledger.first_date, min(tx.date for tx in self.transactions))
+
+  def test_date_ranges_match_a_full_scan(self) -> None:
+    start, end = date(2023, 3, 15), date(2023, 9, 30)
+    for category in (None, "Food", "Unknown"):
+      with self.subTest(category=category):
+        expected = sorted(
+          (
+            tx
+            for tx in self.transactions
+            if start <= tx.date <= end and category in (None, tx.category)
+          ),
+          key=lambda tx: tx.date,
+        )
+        summary = SummaryAggregates(expected)
+        self.assertEqual(list(self.ledger.iter_transactions(start=start, end=end, category=category)), expected)
+        self.assertEqual(self.ledger.count(start=start, end=end, category=category), len(expected))
+        self.assertEqual(
+          self.ledger.totals(start=start, end=end, category=category),
+          (summary.income, summary.expenses),
+        )
+    self.assertEqual(self.ledger.count(start=end, end=start), 0)
+
+class TestMappedLedgerPurePython(MappedLedgerMixin, unittest.TestCase):
+  def setUp(self) -> None:
+    patcher = mock.patch.object(binary, "_np", None)
+    patcher.start()
+    self.addCleanup(patcher.stop)
+    super().setUp()
+
+@unittest.skipIf(binary._numpy() is None, "NumPy is not installed")
+class TestMappedLedgerNumPy(MappedLedgerMixin, unittest.TestCase):
+  pass
+
+class TestBinaryRepository(unittest.TestCase):
+  def test_conversion_round_trip(self) -> None:
+    transactions = make_ledger(300)
+    with tempfile.TemporaryDirectory() as tmpdir:
+      source = Path(tmpdir) / "transactions.json"
+      TransactionRepository(source).save(transactions)
+      packed = Path(tmpdir) / "transactions.ledger"
+      back = Path(tmpdir) / "back.json"
+
+      self.assertEqual(convert_ledger(source, packed, binary=True), 300)
+      self.assertEqual(convert_ledger(packed, back, binary=False), 300)
+
+      self.assertLess(packed.stat().st_size * 3, source.stat().st_size)
+      self.assertEqual(TransactionRepository(packed).load(), transactions)
+      self.assertEqual(back.read_text(encoding="utf-8"), source.read_text(encoding="utf-8"))
+
+  def test_repository_keeps_binary_format_and_answers_queries(self) -> None:
+    transactions = make_ledger(50)
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.ledger"
+      repo = TransactionRepository(path)
+      repo.save(transactions)
+      repo.save(repo.load()[:40])
+
+      self.assertTrue(is_binary_ledger(path))
+      self.assertEqual(repo.count(), 40)
+      self.assertEqual(repo.count(category="Rent"), sum(tx.category == "Rent" for tx in transactions[:40]))
+      json_repo = TransactionRepository(Path(tmpdir) / "transactions.json")
+      json_repo.save(transactions[:40])
+      self.assertEqual(repo.totals(end=date(2023, 6, 30)), json_repo.totals(end=date(2023, 6, 30)))
+      self.assertEqual(
+        list(repo.iter_transactions(start=date(2023, 6, 1))),
+        list(json_repo.iter_transactions(start=date(2023, 6, 1))),
+      )
+
+  def test_rejects_damaged_files_and_sub_cent_amounts(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.ledger"
+      write_ledger_file(path, make_ledger(10))
+      path.write_bytes(path.read_bytes()[:-200])
+      with self.assertRaises(ValueError):
+        MappedLedger(path)
+      repo = TransactionRepository(path)
+      self.assertEqual(repo.load(), [])
+      self.assertIsNotNone(repo.last_report.error)
+
+      fine = Transaction(date=date(2024, 1, 1), category="Fuel", memo="", amount=Decimal("1.005"))
+      with self.assertRaises(ValueError):
+        write_ledger_file(Path(tmpdir) / "other.ledger", [fine])
+
+if __name__ == "__main__":
+  unittest.main()
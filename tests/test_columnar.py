@@ -0,0 +1,88 @@
+import random
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from budget_app.models import columnar
+from budget_app.models.columnar import ColumnarStore
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+
+
+def make_ledger(count: int, seed: int = 7) -> list[Transaction]:
+    rng = random.Random(seed)
+    categories = ["Food", "Rent", "Salary", "Fuel", "Fun, Games"]
+    start = date(2021, 1, 1)
+    return [
+        Transaction(
+            date=start + timedelta(days=rng.randrange(1100)),
+            category=rng.choice(categories),
+            memo=f"memo {index}",
+            amount=Decimal(rng.randrange(-500000, 500000)).scaleb(-2),
+        )
+        for index in range(count)
+    ]
+
+
+class ColumnarStoreMixin:
+    def setUp(self) -> None:
+        self.transactions = make_ledger(2000)
+        self.store = ColumnarStore(self.transactions)
+
+    def test_views_round_trip(self) -> None:
+        self.assertEqual(list(self.store), self.transactions)
+        self.assertEqual(self.store[17], self.transactions[17])
+
+    def test_totals_match_decimal_path(self) -> None:
+        summary = SummaryAggregates(self.transactions)
+        self.assertEqual(self.store.totals(), (summary.income, summary.expenses))
+        self.assertEqual(
+            self.store.category_totals(),
+            {name: subtotal.balance for name, subtotal in summary.by_category.items()},
+        )
+        self.assertEqual(
+            self.store.month_totals(),
+            {name: subtotal.balance for name, subtotal in summary.by_month.items()},
+        )
+
+    def test_filters_match_decimal_path(self) -> None:
+        start, end = date(2021, 6, 1), date(2022, 3, 31)
+        expected = [
+            tx
+            for tx in self.transactions
+            if start <= tx.date <= end and tx.category in {"Food", "Fun, Games"}
+        ]
+        rows = self.store.select(start=start, end=end, categories=["Food", "Fun, Games", "Unknown"])
+        self.assertEqual(list(self.store.iter_transactions(rows)), expected)
+
+        summary = SummaryAggregates(expected)
+        self.assertEqual(self.store.totals(rows), (summary.income, summary.expenses))
+
+        rows = self.store.select(start=start, end=end, categories=["Food", "Fun, Games"], by_date=True)
+        self.assertEqual(list(self.store.iter_transactions(rows)), sorted(expected, key=lambda tx: tx.date))
+
+    def test_mutations(self) -> None:
+        replacement = make_ledger(1, seed=99)[0]
+        self.store.replace(3, replacement)
+        self.store.delete(0)
+        self.assertEqual(self.store[2], replacement)
+        self.assertEqual(len(self.store), 1999)
+
+    def test_rejects_sub_cent_amounts(self) -> None:
+        tx = Transaction(date=date(2024, 1, 1), category="Fuel", memo="", amount=Decimal("1.005"))
+        with self.assertRaises(ValueError):
+            self.store.append(tx)
+
+
+class TestColumnarStorePurePython(ColumnarStoreMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(columnar, "_np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+@unittest.skipIf(columnar._np is None, "NumPy is not installed")
+class TestColumnarStoreNumPy(ColumnarStoreMixin, unittest.TestCase):
+    pass
@@ -0,0 +1,196 @@
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from budget_app import cli
+from budget_app.models import forecast
+from budget_app.models.forecast import CashFlowForecast
+from budget_app.models.recurring import RecurringRule
+from budget_app.models.transaction import Transaction
+from budget_app.storage.recurring import RecurringRepository, recurring_path
+from budget_app.storage.repository import TransactionRepository
+
+
+def make_rules(count: int, seed: int = 11) -> list[RecurringRule]:
+    rng = random.Random(seed)
+    rules = []
+    for _ in range(count):
+        start = date(2023, 1, 1) + timedelta(days=rng.randrange(900))
+        rules.append(
+            RecurringRule(
+                category=rng.choice(["Rent", "Salary", "Gym"]),
+                amount=Decimal(rng.randrange(-90000, 90000)).scaleb(-2),
+                start=start,
+                frequency=rng.choice(["day", "week", "month"]),
+                interval=rng.randrange(1, 5),
+                end=None if rng.random() < 0.5 else start + timedelta(days=rng.randrange(800)),
+            )
+        )
+    return rules
+
+
+def scan_balances(rules: list[RecurringRule], start: date, days: int, opening: Decimal) -> list[int]:
+    deltas = [0] * days
+    for rule in rules:
+        for day in rule.occurrences(start, start + timedelta(days=days - 1)):
+            deltas[(day - start).days] += int(rule.amount * 100)
+    balances, running = [], int(opening * 100)
+    for delta in deltas:
+        running += delta
+        balances.append(running)
+    return balances
+
+
+class TestRecurringRule(unittest.TestCase):
+    def test_monthly_rules_keep_their_day(self) -> None:
+        rent = RecurringRule("Rent", Decimal("-1200"), date(2024, 1, 31))
+        self.assertEqual(
+            list(rent.occurrences(end=date(2024, 5, 1))),
+            [date(2024, 1, 31), date(2024, 2, 29), date(2024, 3, 31), date(2024, 4, 30)],
+        )
+        quarterly = RecurringRule("Tax", Decimal("-300"), date(2024, 1, 15), interval=3, end=date(2024, 12, 31))
+        self.assertEqual(
+            list(quarterly.occurrences(start=date(2024, 2, 1))),
+            [date(2024, 4, 15), date(2024, 7, 15), date(2024, 10, 15)],
+        )
+
+    def test_fixed_intervals_and_validation(self) -> None:
+        salary = RecurringRule("Salary", Decimal("1500"), date(2024, 1, 5), frequency="week", interval=2)
+        days = salary.occurrences(start=date(2024, 1, 20))
+        self.assertEqual([next(days) for _ in range(3)], [date(2024, 2, 2), date(2024, 2, 16), date(2024, 3, 1)])
+        self.assertEqual(salary.transaction(date(2024, 2, 2)), Transaction(date(2024, 2, 2), "Salary", "", Decimal("1500")))
+        for bad in (
+            {"frequency": "year"},
+            {"interval": 0},
+            {"end": date(2023, 1, 1)},
+            {"amount": Decimal("1.005")},
+            {"category": " "},
+        ):
+            with self.subTest(bad=bad), self.assertRaises(ValueError):
+                RecurringRule(**{"category": "Gym", "amount": Decimal("-30"), "start": date(2024, 1, 1), **bad})
+
+
+class ForecastMixin:
+    def test_matches_a_plain_expansion(self) -> None:
+        rules = make_rules(200)
+        start = date(2024, 2, 10)
+        engine = CashFlowForecast(rules, start=start, days=900, opening=Decimal("250.75"))
+        self.assertEqual(list(engine.balance_cents()), scan_balances(rules, start, 900, Decimal("250.75")))
+
+        day, lowest = engine.lowest()
+        balances = scan_balances(rules, start, 900, Decimal("250.75"))
+        self.assertEqual(lowest, Decimal(min(balances)).scaleb(-2))
+        self.assertEqual(day, start + timedelta(days=balances.index(min(balances))))
+        month_ends = engine.month_ends()
+        self.assertEqual(next(iter(month_ends)), "2024-02")
+        self.assertEqual(month_ends["2024-03"], engine.balance_on(date(2024, 3, 31)))
+        self.assertEqual(list(month_ends.values())[-1], engine.balance_on(engine.end))
+        with self.assertRaises(ValueError):
+            engine.balance_on(start - timedelta(days=1))
+
+    def test_changes_resum_only_the_segments_they_touch(self) -> None:
+        rules = make_rules(50)
+        start = date(2024, 1, 1)
+        engine = CashFlowForecast(rules, start=start, days=730)
+        first = engine.balance_cents()
+        self.assertIs(engine.balance_cents(), first)
+
+        bonus = RecurringRule("Bonus", Decimal("500"), date(2024, 12, 20), end=date(2024, 12, 31))
+        rule_id = engine.add(bonus)
+        self.assertEqual(list(engine.balance_cents()), scan_balances(rules + [bonus], start, 730, Decimal(0)))
+
+        # Taking the old occurrence back dirties its segment only; the new
+        # one is expanded on the next read.
+        moved = RecurringRule("Bonus", Decimal("750"), date(2025, 6, 1), end=date(2025, 6, 30))
+        engine.update(rule_id, moved)
+        self.assertEqual(engine._dirty, {(date(2024, 12, 20) - start).days // forecast.SEGMENT_DAYS})
+        engine.remove(3)
+        rules = rules[:3] + rules[4:] + [moved]
+        self.assertEqual(list(engine.balance_cents()), scan_balances(rules, start, 730, Decimal(0)))
+
+        engine.opening = Decimal("10")
+        self.assertEqual(engine.balance_on(start), Decimal(scan_balances(rules, start, 1, Decimal("10"))[0]).scaleb(-2))
+
+
+class TestForecastPurePython(ForecastMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(forecast, "_np", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+@unittest.skipIf(forecast._np is None, "NumPy is not installed")
+class TestForecastNumPy(ForecastMixin, unittest.TestCase):
+    pass
+
+
+class TestRecurringRepository(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.data = Path(self._tmpdir.name) / "transactions.json"
+
+    def tearDown(self) -> None:
+        self._tmpdir.cleanup()
+
+    def test_rules_round_trip_next_to_the_ledger(self) -> None:
+        rules = make_rules(20)
+        repository = RecurringRepository(self.data)
+        self.assertEqual(repository.load(), [])
+        repository.save(rules)
+        self.assertEqual(repository.path, recurring_path(self.data))
+        self.assertEqual(repository.path.name, "transactions.recurring.json")
+        self.assertEqual(RecurringRepository(self.data).load(), rules)
+        self.assertEqual(repository.remove(0), rules[0])
+        self.assertEqual(repository.add(rules[0]), 19)
+        self.assertEqual(repository.load(), rules[1:] + rules[:1])
+
+        repository.path.write_text("[]", encoding="utf-8")
+        with self.assertRaises(ValueError):
+            repository.load()
+
+    def test_cli_recurring_and_forecast(self) -> None:
+        TransactionRepository(self.data).save(
+            [
+                Transaction(date(2024, 1, 2), "Salary", "", Decimal("3000")),
+                Transaction(date(2024, 3, 1), "Food", "", Decimal("-40")),
+            ]
+        )
+        data = ["--data", str(self.data)]
+        with mock.patch("builtins.print") as output:
+            self.assertEqual(cli.main([*data, "recurring", "add", "Rent", "-1200", "--start", "2024-01-31"]), 0)
+            self.assertEqual(cli.main([*data, "recurring", "add", "Gym", "-25", "--start", "2024-02-01", "--unit", "week"]), 0)
+            self.assertEqual(cli.main([*data, "recurring", "remove", "2"]), 0)
+            self.assertEqual(cli.main([*data, "recurring", "list"]), 0)
+            self.assertEqual(cli.main([*data, "forecast", "--from", "2024-02-01", "--days", "60"]), 0)
+            self.assertEqual(cli.main([*data, "recurring", "add", "Gym", "-25", "--start", "2024-02-01", "--every", "0"]), 1)
+        for amount in ("abc", "NaN", "Infinity"):
+            with self.subTest(amount=amount), mock.patch("sys.stderr") as stderr, self.assertRaises(SystemExit) as caught:
+                cli.main([*data, "recurring", "add", "Rent", amount, "--start", "2024-01-01"])
+            self.assertEqual(caught.exception.code, 2)
+            self.assertIn("Enter a valid numeric amount.", "".join(call.args[0] for call in stderr.write.call_args_list))
+        lines = [" ".join(str(call.args[0]).split()) for call in output.call_args_list if call.args]
+        self.assertIn("1. Rent -1200.00 every month from 2024-01-31", lines)
+        # The opening balance is the ledger up to the day before.
+        self.assertIn("2024-02 1800.00", lines)
+        self.assertIn("2024-03 600.00", lines)
+        self.assertIn("Lowest: 600.00 on 2024-03-31", lines)
+
+    def test_cli_forecast_with_sub_cent_amounts(self) -> None:
+        TransactionRepository(self.data).save(
+            [
+                Transaction(date(2024, 1, 2), "Salary", "", Decimal("3000")),
+                Transaction(date(2024, 1, 3), "Fuel", "", Decimal("-1.239")),
+            ]
+        )
+        with mock.patch("builtins.print") as output:
+            self.assertEqual(cli.main(["--data", str(self.data), "forecast", "--from", "2024-02-01", "--days", "10"]), 0)
+        lines = [" ".join(str(call.args[0]).split()) for call in output.call_args_list if call.args]
+        self.assertIn("Lowest: 2998.76 on 2024-02-01", lines)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from budget_app.models.transaction import Transaction
+from budget_app.storage.importer import ImportReport, iter_import_batches
+
+OFX = """OFXHEADER:100
+DATA:OFXSGML
+
+<OFX>
+<BANKMSGSRSV1><STMTTRNRS><STMTRS><BANKTRANLIST>
+<STMTTRN>
+<TRNTYPE>DEBIT
+<DTPOSTED>20240105120000[-5:EST]
+<TRNAMT>-42.50
+<NAME>Grocer
+<MEMO>Card 1234
+</STMTTRN>
+<STMTTRN>
+<TRNTYPE>CREDIT
+<DTPOSTED>20240110
+<TRNAMT>1500.00
+<NAME>Payroll
+</STMTTRN>
+</BANKTRANLIST></STMTRS></STMTTRNRS></BANKMSGSRSV1>
+</OFX>
+"""
+
+class TestImporter(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.dir = Path(self._tmpdir.name)
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def write(self, name: str, text: str) -> Path:
+    path = self.dir / name
+    path.write_text(text, encoding="utf-8")
+    return path
+
+  def test_csv_with_signed_amounts_and_invalid_rows(self) -> None:
+    path = self.write(
+      "bank.csv",
+      "Date,Description,Category,Amount\n"
+      "2024-01-02,Coffee,Dining,-3.50\n"
+      "2024-01-03,\"Salary, January\",,\"2,000.00\"\n"
+      "01/04/2024,Bad date,Dining,-1.00\n"
+      "2024-01-05,Bad amount,Dining,abc\n"
+      "2024-01-06,Decimal comma,Dining,\"-12,50\"\n",
+    )
+    report = ImportReport()
+    batches = list(iter_import_batches(path, report=report))
+
+    self.assertEqual(
+      [tx for batch in batches for tx in batch],
+      [
+        Transaction(date=date(2024, 1, 2), category="Dining", memo="Coffee", amount=Decimal("-3.50")),
+        Transaction.from_input(
+          raw_date="2024-01-03",
+          raw_category="Imported",
+          raw_memo="Salary, January",
+          raw_amount="2000.00",
+          raw_kind="income",
+        ),
+      ],
+    )
+    self.assertEqual((report.rows, report.imported, report.invalid), (5, 2, 3))
+    self.assertEqual(
+      report.errors,
+      [(4, "Use YYYY-MM-DD format."), (5, "Enter a valid numeric amount."), (6, "Enter a valid numeric amount.")],
+    )
+
+  def test_kind_column_and_missing_header(self) -> None:
+    path = self.write("kinds.csv", "date,amount,type,memo\n2024-02-01,12.00,debit,Fee\n2024-02-02,-5,POS,Card\n")
+    batches = list(iter_import_batches(path))
+    self.assertEqual([tx.amount for tx in batches[0]], [Decimal("-12.00"), Decimal("-5")])
+
+    with self.assertRaises(ValueError):
+      list(iter_import_batches(self.write("bad.csv", "when,how much\n2024-01-01,1\n")))
+
+  def test_duplicates_are_matched_once_per_existing_row(self) -> None:
+    path = self.write("dupes.csv", "date,category,memo,amount\n" + "2024-03-01,Food,Lunch,-8.00\n" * 3)
+    existing = [Transaction.from_input(
+      raw_date="2024-03-01", raw_category="Food", raw_memo="Lunch", raw_amount="8.00", raw_kind="expense",
+    )]
+    report = ImportReport()
+    imported = [tx for batch in iter_import_batches(path, existing, report=report) for tx in batch]
+    self.assertEqual(len(imported), 2)
+    self.assertEqual(report.duplicates, 1)
+
+  def test_ofx_statement(self) -> None:
+    path = self.write("statement.ofx", OFX)
+    imported = [tx for batch in iter_import_batches(path, default_category="Bank") for tx in batch]
+    self.assertEqual([(tx.date.isoformat(), tx.memo, tx.amount) for tx in imported], [
+      ("2024-01-05", "Grocer Card 1234", Decimal("-42.50")),
+      ("2024-01-10", "Payroll", Decimal("1500.00")),
+    ])
+    self.assertEqual({tx.category for tx in imported}, {"Bank"})
+
+  def test_batches_and_progress(self) -> None:
+    rows = "".join(f"2024-04-{day:02d},Food,,-{day}.00\n" for day in range(1, 11))
+    path = self.write("many.csv", "date,category,memo,amount\n" + rows)
+    progress: list[int] = []
+    batches = list(iter_import_batches(
+      path,
+      batch_size=4,
+      on_progress=lambda report: progress.append(report.bytes_read),
+    ))
+    self.assertEqual([len(batch) for batch in batches], [4, 4, 2])
+    self.assertEqual(progress[-1], path.stat().st_size)
+    self.assertEqual(progress, sorted(progress))
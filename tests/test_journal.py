@@ -0,0 +1,219 @@
+import json
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from budget_app.models.transaction import Transaction
+from budget_app.storage.journal import JournalLoadReport, JournalRepository
+from budget_app.storage.locking import LedgerConflictError
+from budget_app.storage.repository import TransactionRepository
+
+def make_tx(day: int, category: str, amount: str, kind: str = "expense") -> Transaction:
+  return Transaction.from_input(
+    raw_date=f"2024-05-{day:02d}",
+    raw_category=category,
+    raw_memo=f"{category} memo",
+    raw_amount=amount,
+    raw_kind=kind,
+  )
+
+class TestJournalRepository(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.path = Path(self._tmpdir.name) / "transactions.json"
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def test_replays_operations_on_load(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    salary = make_tx(1, "Salary", "3500.00", "income")
+    rent = make_tx(2, "Rent", "1200.00")
+    food = make_tx(3, "Food", "45.10")
+    repo.add(salary)
+    repo.add(rent)
+    repo.add(food)
+    repo.update(1, make_tx(2, "Rent", "1250.00"))
+    repo.delete([2, 0])
+    repo.close()
+
+    self.assertEqual(JournalRepository(self.path).load(), [make_tx(2, "Rent", "1250.00")])
+    self.assertFalse(self.path.with_suffix(".snapshot.json").exists())
+
+  def test_migrates_legacy_json_file(self) -> None:
+    legacy = [make_tx(1, "Salary", "3500.00", "income")]
+    TransactionRepository(self.path).save(legacy)
+
+    repo = JournalRepository(self.path)
+    self.assertEqual(repo.load(), legacy)
+    repo.add(make_tx(2, "Rent", "1200.00"))
+    repo.close()
+
+    self.assertEqual(len(JournalRepository(self.path).load()), 2)
+
+  def test_compaction_folds_journal_into_snapshot(self) -> None:
+    repo = JournalRepository(self.path, compact_threshold=3)
+    repo.load()
+    expected = [make_tx(day, "Food", f"{day}.00") for day in range(1, 8)]
+    for tx in expected:
+      repo.add(tx)
+      repo.wait_for_compaction()
+    repo.close()
+
+    snapshot = json.loads(self.path.with_suffix(".snapshot.json").read_text(encoding="utf-8"))
+    self.assertEqual(snapshot["seq"], 6)
+    self.assertEqual(JournalRepository(self.path).load(), expected)
+
+  def test_interrupted_compaction_does_not_replay_twice(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    repo.add(make_tx(1, "Food", "1.00"))
+    repo.add(make_tx(2, "Food", "2.00"))
+    repo.close()
+    journal = self.path.with_suffix(".journal").read_bytes()
+
+    repo = JournalRepository(self.path)
+    expected = repo.load()
+    repo.compact(wait=True)
+    # Simulate a crash between writing the snapshot and removing the segment.
+    self.path.with_suffix(".journal.2").write_bytes(journal)
+
+    self.assertEqual(JournalRepository(self.path).load(), expected)
+
+  def test_torn_tail_is_discarded(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    repo.add(make_tx(1, "Food", "1.00"))
+    repo.close()
+    with open(self.path.with_suffix(".journal"), "ab") as handle:
+      handle.write(b'{"seq":2,"op":"add","tx":{"date":"2024-05')
+
+    repo = JournalRepository(self.path)
+    self.assertEqual(len(repo.load()), 1)
+    repo.add(make_tx(3, "Food", "3.00"))
+    repo.close()
+
+    self.assertEqual(len(JournalRepository(self.path).load()), 2)
+
+  def test_iter_batches_streams_snapshot_and_returns_entries(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    for day in range(1, 6):
+      repo.add(make_tx(day, "Food", f"{day}.00"))
+    repo.compact(wait=True)
+    repo.update(0, make_tx(9, "Rent", "9.00"))
+    repo.delete([4])
+    repo.close()
+
+    repo = JournalRepository(self.path)
+    report = JournalLoadReport()
+    batches = list(repo.iter_batches(batch_size=2, report=report))
+    self.assertEqual([len(batch) for batch in batches], [2, 2, 1])
+    self.assertEqual([entry.op for entry in report.entries], ["update", "delete"])
+
+    state = [tx for batch in batches for tx in batch]
+    for entry in report.entries:
+      entry.apply(state)
+    self.assertEqual(state, repo.load())
+    self.assertEqual(len(state), 4)
+
+  def test_unreadable_snapshot_blocks_writes(self) -> None:
+    self.path.with_suffix(".snapshot.json").write_text('{"seq": 1, "transactions": [', encoding="utf-8")
+    repo = JournalRepository(self.path)
+    self.assertEqual(repo.load(), [])
+    self.assertIsNotNone(repo.last_report.error)
+    with self.assertRaises(OSError):
+      repo.add(make_tx(1, "Food", "1.00"))
+
+  def test_failed_batch_rolls_back_state(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    repo.add(make_tx(1, "Food", "1.00"))
+    repo.add(make_tx(2, "Food", "2.00"))
+    before = repo.load()
+
+    with mock.patch.object(repo, "_append", side_effect=OSError("disk full")):
+      with self.assertRaises(OSError):
+        with repo.batch():
+          repo.add(make_tx(3, "Food", "3.00"))
+          repo.update(0, make_tx(4, "Rent", "4.00"))
+          repo.delete([1, 0])
+    repo.add(make_tx(5, "Food", "5.00"))
+    repo.close()
+
+    self.assertEqual(JournalRepository(self.path).load(), [*before, make_tx(5, "Food", "5.00")])
+
+  def test_add_many_writes_one_journal_append(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    expected = [make_tx(day, "Food", f"{day}.00") for day in range(1, 6)]
+    with mock.patch.object(repo, "_append", wraps=repo._append) as append:
+      repo.add_many(expected)
+    repo.close()
+
+    self.assertEqual(append.call_count, 1)
+    self.assertEqual(JournalRepository(self.path).load(), expected)
+
+class TestSharedJournal(unittest.TestCase):
+  # Two repositories on one path behave like two processes: each takes its
+  # own lock descriptor and only sees the other's writes through the files.
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.path = Path(self._tmpdir.name) / "transactions.json"
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def open_repo(self, **kwargs: int) -> JournalRepository:
+    repo = JournalRepository(self.path, **kwargs)
+    repo.load()
+    self.addCleanup(repo.close)
+    return repo
+
+  def test_writes_wait_for_other_changes_to_be_merged(self) -> None:
+    gui, other = self.open_repo(), self.open_repo()
+    rent, food = make_tx(1, "Rent", "1200.00"), make_tx(2, "Food", "12.00")
+    other.add(rent)
+
+    with self.assertRaises(LedgerConflictError):
+      gui.update(0, food)
+    self.assertEqual([(entry.op, entry.tx) for entry in gui.refresh()], [("add", rent)])
+    gui.update(0, food)
+    gui.add(rent)
+
+    self.assertEqual([(entry.op, entry.index) for entry in other.refresh()], [("update", 0), ("add", None)])
+    self.assertEqual(other.refresh(), [])
+    self.assertEqual(JournalRepository(self.path).load(), [food, rent])
+
+  def test_snapshot_written_elsewhere_requires_reload(self) -> None:
+    gui, other = self.open_repo(), self.open_repo()
+    gui.add(make_tx(1, "Rent", "1200.00"))
+    self.assertEqual(len(other.refresh()), 1)
+    other.save([make_tx(2, "Food", "12.00")])
+
+    self.assertIsNone(gui.refresh())
+    with self.assertRaises(LedgerConflictError):
+      gui.add(make_tx(3, "Food", "3.00"))
+    self.assertEqual(gui.load(), [make_tx(2, "Food", "12.00")])
+    gui.add(make_tx(3, "Food", "3.00"))
+    self.assertEqual(len(JournalRepository(self.path).load()), 2)
+
+  def test_compaction_keeps_records_from_other_processes(self) -> None:
+    compacting, other = self.open_repo(compact_threshold=3), self.open_repo()
+    expected = [make_tx(day, "Food", f"{day}.00") for day in range(1, 5)]
+    other.add(expected[0])
+    compacting.refresh()
+    compacting.add(expected[1])
+    other.refresh()
+    other.add(expected[2])
+    compacting.refresh()
+    compacting.add(expected[3])
+    compacting.wait_for_compaction()
+
+    self.assertTrue(compacting._snapshot_path.exists())
+    # The records ``other`` had not seen were folded into the snapshot.
+    self.assertIsNone(other.refresh())
+    self.assertEqual(other.load(), expected)
+    self.assertEqual(JournalRepository(self.path).load(), expected)
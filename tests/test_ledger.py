@@ -0,0 +1,164 @@
+import unittest
+from datetime import date
+from pathlib import Path
+from unittest import mock
+
+from budget_app.controllers.budget_controller import BudgetController
+from budget_app.models.ledger import SORT_COLUMNS, Ledger
+from budget_app.models.transaction import Transaction
+from budget_app.storage.repository import TransactionRepository
+
+
+def make_tx(raw_date: str, category: str, amount: str = "10.00") -> Transaction:
+    return Transaction.from_input(
+        raw_date=raw_date,
+        raw_category=category,
+        raw_memo="",
+        raw_amount=amount,
+        raw_kind="expense",
+    )
+
+
+class TestLedger(unittest.TestCase):
+    def test_duplicates_get_distinct_ids(self) -> None:
+        tx = make_tx("2024-05-01", "Food")
+        ledger = Ledger([tx, tx])
+        first, second = ledger.id_at(0), ledger.id_at(1)
+
+        ledger.remove(second)
+        self.assertEqual(len(ledger), 1)
+        self.assertIn(first, ledger)
+        self.assertNotIn(second, ledger)
+
+    def test_positions_follow_insertion_order(self) -> None:
+        ledger = Ledger([make_tx(f"2024-05-{day:02d}", "Food") for day in range(1, 6)])
+        removed = ledger.remove(2)
+        self.assertEqual(ledger.position_of(3), 2)
+        ledger.restore(2, removed)
+        self.assertEqual([ledger.id_at(position) for position in range(5)], [0, 1, 2, 3, 4])
+        with self.assertRaises(KeyError):
+            ledger.position_of(99)
+
+    def test_removals_leave_tombstones_until_read(self) -> None:
+        for count in (10, 150):
+            with self.subTest(count=count):
+                ledger = Ledger([make_tx(f"2024-05-{index % 28 + 1:02d}", f"C{index % 3}") for index in range(300)])
+                gone = range(0, 2 * count, 2)
+                for tx_id in gone:
+                    ledger.remove(tx_id)
+                # Nothing has shifted yet; the next read compacts.
+                self.assertEqual(len(ledger._ids), 300)
+                self.assertEqual(len(ledger), 300 - count)
+                self.assertEqual(ledger.id_at(0), 1)
+                self.assertEqual(len(ledger._ids), 300 - count)
+                self.assertFalse(set(ledger.between()) & set(gone))
+
+    def test_bulk_removal_is_all_or_nothing(self) -> None:
+        for count in (5, 100):
+            with self.subTest(count=count):
+                ledger = Ledger([make_tx("2024-01-01", "Food") for _ in range(200)])
+                for bad in ([*range(count), 999], [*range(count), 0]):
+                    with self.assertRaises(KeyError):
+                        ledger.remove_many(bad)
+                    self.assertEqual(len(ledger), 200)
+                    self.assertEqual(len(ledger.query(category="Food")), 200)
+
+    def test_in_category_is_a_snapshot(self) -> None:
+        ledger = Ledger([make_tx("2024-01-01", "Food")])
+        members = ledger.in_category("Food")
+        self.assertIsInstance(members, frozenset)
+        ledger.remove(0)
+        self.assertEqual(members, {0})
+        self.assertEqual(ledger.in_category("Food"), frozenset())
+
+    def test_date_range_and_category_indexes(self) -> None:
+        ledger = Ledger(
+            [
+                make_tx("2024-03-01", "Rent"),
+                make_tx("2024-01-15", "Food"),
+                make_tx("2024-02-10", "Food"),
+                make_tx("2024-02-20", "Fuel"),
+            ]
+        )
+        self.assertEqual(ledger.between(date(2024, 2, 1), date(2024, 2, 29)), [2, 3])
+        self.assertEqual(ledger.query(category="Food"), [1, 2])
+        self.assertEqual(ledger.query(start=date(2024, 2, 1), category="Food"), [2])
+
+        ledger.update(2, make_tx("2024-04-01", "Rent"))
+        self.assertEqual(ledger.query(category="Rent"), [0, 2])
+        self.assertEqual(ledger.between(end=date(2024, 2, 29)), [1, 3])
+
+    def test_bulk_removal(self) -> None:
+        ledger = Ledger([make_tx("2024-01-01", f"C{index % 3}") for index in range(200)])
+        ledger.remove_many(range(0, 200, 2))
+        self.assertEqual(len(ledger), 100)
+        self.assertEqual(ledger.id_at(0), 1)
+        self.assertEqual(len(ledger.between()), 100)
+        self.assertEqual(sum(len(ledger.in_category(name)) for name in ledger.categories()), 100)
+
+        before = [make_tx("2024-01-01", f"C{index % 3}") for index in range(200)]
+        ledger.restore_many((tx_id, before[tx_id]) for tx_id in range(0, 200, 2))
+        self.assertEqual(list(ledger.items()), list(enumerate(before)))
+        self.assertEqual(ledger.between(), list(range(200)))
+        self.assertEqual(len(ledger.in_category("C0")), 67)
+        with self.assertRaises(KeyError):
+            ledger.restore_many([(tx_id, before[tx_id]) for tx_id in range(100, 200)])
+
+    def test_sort_orders_follow_edits(self) -> None:
+        def expected(column: str) -> list[int]:
+            keys = {
+                "date": lambda item: item[1].date,
+                "category": lambda item: item[1].category.casefold(),
+                "memo": lambda item: item[1].memo.casefold(),
+                "amount": lambda item: item[1].amount,
+            }
+            return [tx_id for tx_id, _ in sorted(ledger.items(), key=keys[column])]
+
+        ledger = Ledger(
+            make_tx(f"2024-{index % 12 + 1:02d}-{index % 28 + 1:02d}", ["rent", "Food", "fuel"][index % 3], f"{index * 7 % 10}.00")
+            for index in range(30)
+        )
+        orders = {column: ledger.sorted_ids(column) for column in SORT_COLUMNS}
+        ledger.add(make_tx("2023-12-31", "Books", "3.00"))
+        ledger.add_many([make_tx("2024-06-01", "food", "4.00")] * 100)
+        ledger.update(4, make_tx("2025-01-01", "Zoo", "99.00"))
+        removed = ledger.remove(7)
+        ledger.remove_many(range(40, 120))
+        ledger.restore(7, removed)
+        for column in SORT_COLUMNS:
+            with self.subTest(column=column):
+                # The arrays handed out earlier are the live orders.
+                self.assertIs(ledger.sorted_ids(column), orders[column])
+                self.assertEqual(list(orders[column]), expected(column))
+                self.assertEqual(ledger.sort_rank(column, 4), expected(column).index(4))
+
+        subset = [2, 5, 9, 7, 4]
+        order = expected("amount")
+        self.assertEqual(ledger.sort_ids("amount", subset), [tx_id for tx_id in order if tx_id in subset])
+        everything = list(ledger.sorted_ids("memo"))
+        self.assertEqual(ledger.sort_ids("memo", everything, descending=True), everything[::-1])
+        with self.assertRaises(ValueError):
+            ledger.sorted_ids("kind")
+
+
+class TestBudgetController(unittest.TestCase):
+    def test_mutations_by_id(self) -> None:
+        controller = BudgetController()
+        tx = make_tx("2024-05-01", "Food")
+        first = controller.add_transaction(tx)
+        second = controller.add_transaction(tx)
+
+        controller.update_transaction(second, make_tx("2024-05-02", "Fuel"))
+        controller.remove_transaction(first)
+
+        self.assertEqual([item.category for item in controller.get_transactions()], ["Fuel"])
+        self.assertIsNone(controller.remove_transaction(first))
+        self.assertEqual(controller.count_transactions(category="Fuel"), 1)
+
+    def test_file_repositories_are_not_asked_to_count(self) -> None:
+        repository = TransactionRepository(Path("unused.json"))
+        controller = BudgetController(repository)
+        controller.add_transaction(make_tx("2024-05-01", "Food"))
+        with mock.patch.object(repository, "count", side_effect=AssertionError("read the file")):
+            self.assertEqual(controller.count_transactions(category="Food"), 1)
+            self.assertEqual(len(controller.get_transactions_page(category="Food")), 1)
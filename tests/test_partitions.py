@@ -0,0 +1,165 @@
+import gzip
+import json
+import random
+import tempfile
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+from unittest import mock
+
+from budget_app import cli
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+from budget_app.storage import partitions
+from budget_app.storage.partitions import ArchivedPartitionError, PartitionedRepository
+from budget_app.storage.repository import TransactionRepository
+
+def make_ledger(count: int, seed: int = 5) -> list[Transaction]:
+  rng = random.Random(seed)
+  start = date(2021, 1, 1)
+  return [
+    Transaction(
+      date=start + timedelta(days=rng.randrange(3 * 365)),
+      category=rng.choice(["Food", "Rent", "Salary"]),
+      memo=f"memo {index}",
+      amount=Decimal(rng.randrange(-50000, 50000)).scaleb(-2),
+    )
+    for index in range(count)
+  ]
+
+def scan_totals(transactions: list[Transaction], start: date | None, end: date | None, category: str | None):
+  summary = SummaryAggregates(
+    tx
+    for tx in transactions
+    if (start is None or tx.date >= start)
+    and (end is None or tx.date <= end)
+    and (category is None or tx.category == category)
+  )
+  return summary.income, summary.expenses, summary.count
+
+class TestPartitionedRepository(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.root = Path(self._tmpdir.name) / "ledger"
+    self.main = make_ledger(600)
+    self.savings = make_ledger(100, seed=9)
+    repo = PartitionedRepository(self.root)
+    repo.add_many(self.main)
+    repo.add_many(self.savings, account="savings")
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def test_layout_and_windowed_loads(self) -> None:
+    self.assertEqual(sorted(path.name for path in (self.root / "main").iterdir()), ["2021.json", "2022.json", "2023.json"])
+    repo = PartitionedRepository(self.root)
+    self.assertEqual(repo.accounts(), ["main", "savings"])
+    self.assertEqual(repo.load(), sorted(self.main, key=lambda tx: tx.date.year))
+
+    reader = mock.Mock(wraps=partitions._read_partition)
+    with mock.patch.object(partitions, "_read_partition", reader):
+      fresh = PartitionedRepository(self.root)
+      window = fresh.load(start=date(2022, 3, 1), end=date(2022, 4, 30))
+    self.assertEqual(reader.call_count, 1)
+    self.assertEqual(window, [tx for tx in self.main if tx.date.year == 2022])
+
+    expected = sorted((tx for tx in self.main if date(2022, 3, 1) <= tx.date), key=lambda tx: tx.date)
+    self.assertEqual(list(repo.iter_transactions(start=date(2022, 3, 1))), expected)
+
+  def test_totals_match_a_full_scan_and_use_the_manifest(self) -> None:
+    windows = [
+      (None, None),
+      (date(2022, 1, 1), date(2022, 12, 31)),
+      (date(2021, 6, 15), date(2023, 2, 3)),
+      (date(2023, 5, 1), None),
+    ]
+    reader = mock.Mock(wraps=partitions._read_partition)
+    with mock.patch.object(partitions, "_read_partition", reader):
+      repo = PartitionedRepository(self.root)
+      for start, end in windows:
+        for category in (None, "Rent"):
+          with self.subTest(start=start, end=end, category=category):
+            income, expenses, count = scan_totals(self.main, start, end, category)
+            self.assertEqual(repo.totals(start=start, end=end, category=category), (income, expenses))
+            self.assertEqual(repo.count(start=start, end=end, category=category), count)
+      # Whole months are answered from the cached cells; only the two
+      # partitions the mid-month window edges fall in were read.
+      self.assertEqual(reader.call_count, 2)
+
+    everything = self.main + self.savings
+    self.assertEqual(
+      repo.totals(account=None, start=date(2022, 1, 1)),
+      scan_totals(everything, date(2022, 1, 1), None, None)[:2],
+    )
+
+  def test_save_rewrites_only_changed_partitions(self) -> None:
+    repo = PartitionedRepository(self.root)
+    stamps = {part.key: part.stamp for part in repo.partitions("main")}
+    window = repo.load(start=date(2022, 1, 1), end=date(2023, 12, 31))
+    kept = [tx for tx in window if tx.date.year != 2023]
+    repo.save(kept + [Transaction(date(2024, 1, 2), "Food", "", Decimal("-5"))], start=date(2022, 1, 1))
+
+    after = {part.key: part.stamp for part in PartitionedRepository(self.root).partitions("main")}
+    self.assertEqual(sorted(after), ["2021", "2022", "2024"])
+    self.assertEqual(after["2021"], stamps["2021"])
+    self.assertEqual(after["2022"], stamps["2022"])
+    self.assertFalse((self.root / "main" / "2023.json").exists())
+
+    with self.assertRaises(ValueError):
+      repo.save([self.main[0]], start=date(2024, 1, 1))
+
+  def test_archives_are_compressed_and_read_only(self) -> None:
+    repo = PartitionedRepository(self.root)
+    archived = repo.archive(before=date(2023, 1, 1), account="main")
+    self.assertEqual([part.key for part in archived], ["2021", "2022"])
+    path = self.root / "main" / "2021.json.gz"
+    self.assertEqual(len(json.loads(gzip.decompress(path.read_bytes()))), sum(tx.date.year == 2021 for tx in self.main))
+    self.assertFalse((self.root / "main" / "2021.json").exists())
+
+    other = PartitionedRepository(self.root)
+    self.assertEqual(other.totals(), scan_totals(self.main, None, None, None)[:2])
+    self.assertEqual(other.load(), sorted(self.main, key=lambda tx: tx.date.year))
+    with self.assertRaises(ArchivedPartitionError):
+      other.add_many([Transaction(date(2021, 3, 3), "Food", "", Decimal("-1"))])
+    other.save(other.load(end=date(2021, 12, 31)), end=date(2021, 12, 31))
+
+    other.unarchive("main", "2021")
+    other.add_many([Transaction(date(2021, 3, 3), "Food", "", Decimal("-1"))])
+    self.assertEqual(repo.count(), 601)
+
+  def test_manifest_is_rebuilt_and_stale_partitions_rescanned(self) -> None:
+    (self.root / "manifest.json").unlink()
+    repo = PartitionedRepository(self.root)
+    self.assertEqual(repo.count(account="savings"), 100)
+
+    path = self.root / "main" / "2021.json"
+    records = json.loads(path.read_text(encoding="utf-8"))
+    path.write_text(json.dumps(records[:10]), encoding="utf-8")
+    self.assertEqual(PartitionedRepository(self.root).count(end=date(2021, 12, 31)), 10)
+
+  def test_periods(self) -> None:
+    monthly = Path(self._tmpdir.name) / "monthly"
+    repo = PartitionedRepository(monthly, period="month")
+    repo.add_many(self.main[:50])
+    self.assertTrue(all(len(part.key) == 7 for part in repo.partitions()))
+    PartitionedRepository(monthly).add_many(self.main[50:60])
+    self.assertEqual(PartitionedRepository(monthly).count(), 60)
+    with self.assertRaises(ValueError):
+      PartitionedRepository(monthly, period="year").count()
+    with self.assertRaises(ValueError):
+      repo.add_many(self.main[:1], account="../escape")
+
+  def test_cli_partition_and_archive(self) -> None:
+    source = Path(self._tmpdir.name) / "transactions.json"
+    TransactionRepository(source).save(self.main)
+    root = Path(self._tmpdir.name) / "cli"
+    with mock.patch("builtins.print"):
+      self.assertEqual(cli.main(["partition", str(source), str(root), "--account", "cash"]), 0)
+      self.assertEqual(cli.main(["archive", str(root), "--before", "2022-01-01"]), 0)
+    repo = PartitionedRepository(root)
+    self.assertEqual(repo.count(account="cash"), 600)
+    self.assertEqual([part.archived for part in repo.partitions()], [True, False, False])
+
+if __name__ == "__main__":
+  unittest.main()
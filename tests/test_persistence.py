@@ -0,0 +1,87 @@
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from budget_app.models.transaction import Transaction
+from budget_app.storage.journal import JournalRepository
+from budget_app.storage.persistence import PersistenceWorker
+
+def make_tx(day: int, amount: str) -> Transaction:
+  return Transaction.from_input(
+    raw_date=f"2024-05-{day:02d}",
+    raw_category="Food",
+    raw_memo="",
+    raw_amount=amount,
+    raw_kind="expense",
+  )
+
+class TestPersistenceWorker(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.path = Path(self._tmpdir.name) / "transactions.json"
+    self.repo = JournalRepository(self.path)
+    self.repo.load()
+    self.errors: list[Exception] = []
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def test_coalesces_queued_writes_into_one_append(self) -> None:
+    release = threading.Event()
+    worker = PersistenceWorker(self.repo, on_error=self.errors.append, delay=0)
+    worker.submit(release.wait, lambda: None)
+    for day in range(1, 6):
+      worker.submit(lambda day=day: self.repo.add(make_tx(day, "1.00")), lambda: None)
+
+    with mock.patch.object(self.repo, "_append", wraps=self.repo._append) as append:
+      release.set()
+      worker.close()
+
+    self.assertEqual(append.call_count, 1)
+    self.assertEqual(len(append.call_args.args[0]), 5)
+    self.assertEqual(len(JournalRepository(self.path).load()), 5)
+    self.assertEqual(self.errors, [])
+
+  def test_failed_batch_holds_back_later_writes_until_taken(self) -> None:
+    worker = PersistenceWorker(self.repo, on_error=self.errors.append, delay=0)
+    undone: list[str] = []
+    with mock.patch.object(self.repo, "_append", side_effect=OSError("disk full")):
+      worker.submit(lambda: self.repo.add(make_tx(1, "1.00")), lambda: undone.append("first"))
+      worker.flush()
+    worker.submit(lambda: self.repo.add(make_tx(2, "2.00")), lambda: undone.append("second"))
+    worker.flush()
+
+    self.assertTrue(worker.failing)
+    self.assertEqual(len(self.errors), 1)
+    for undo in reversed(worker.take_failed()):
+      undo()
+    self.assertEqual(undone, ["second", "first"])
+    self.assertFalse(worker.failing)
+
+    worker.submit(lambda: self.repo.add(make_tx(3, "3.00")), lambda: None)
+    worker.close()
+    self.assertEqual(JournalRepository(self.path).load(), [make_tx(3, "3.00")])
+
+  def test_unexpected_errors_fail_the_batch_without_stopping_the_thread(self) -> None:
+    worker = PersistenceWorker(self.repo, on_error=self.errors.append, delay=0)
+    undone: list[str] = []
+
+    def broken() -> None:
+      raise TypeError("not serializable")
+
+    worker.submit(broken, lambda: undone.append("broken"))
+    worker.submit(lambda: self.repo.add(make_tx(1, "1.00")), lambda: undone.append("held back"))
+    flushed = threading.Thread(target=worker.flush, daemon=True)
+    flushed.start()
+    flushed.join(5)
+    self.assertFalse(flushed.is_alive(), "flush() hung after a non-OSError failure")
+
+    self.assertEqual([type(exc) for exc in self.errors], [TypeError])
+    for undo in reversed(worker.take_failed()):
+      undo()
+    self.assertEqual(undone, ["held back", "broken"])
+    worker.submit(lambda: self.repo.add(make_tx(2, "2.00")), lambda: None)
+    worker.close()
+    self.assertEqual(JournalRepository(self.path).load(), [make_tx(2, "2.00")])
@@ -0,0 +1,100 @@
+import random
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import mock
+
+from budget_app.models import reports
+from budget_app.models.reports import ReportCube, month_window, shift_month
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+
+
+def make_ledger(count: int, seed: int = 3) -> list[Transaction]:
+    rng = random.Random(seed)
+    categories = ["Food", "Rent", "Salary", "Fuel"]
+    start = date(2021, 1, 1)
+    return [
+        Transaction(
+            date=start + timedelta(days=rng.randrange(1100)),
+            category=rng.choice(categories),
+            memo="",
+            amount=Decimal(rng.randrange(-50000, 50000)).scaleb(-2),
+        )
+        for _ in range(count)
+    ]
+
+
+class ReportCubeMixin:
+    def setUp(self) -> None:
+        self.transactions = make_ledger(1000)
+
+    def test_batch_and_incremental_builds_agree(self) -> None:
+        batch = ReportCube(self.transactions)
+        incremental = ReportCube()
+        for tx in self.transactions:
+            incremental.add(tx)
+        self.assertEqual(batch.snapshot(), incremental.snapshot())
+
+    def test_rollups_match_a_rescan(self) -> None:
+        cube = ReportCube(self.transactions)
+        start, end = "2021-06", "2022-05"
+        selected = [tx for tx in self.transactions if start <= f"{tx.date:%Y-%m}" <= end]
+        summary = SummaryAggregates(selected)
+        by_category = cube.totals_by_category(start, end)
+        self.assertEqual(
+            {key: (value.income, value.expenses, value.count) for key, value in by_category.items()},
+            {key: (value.income, value.expenses, value.count) for key, value in summary.by_category.items()},
+        )
+        self.assertEqual(list(cube.totals_by_month(start, end)), sorted(summary.by_month))
+
+    def test_mutations_keep_cells_exact(self) -> None:
+        cube = ReportCube(self.transactions)
+        for tx in self.transactions[:300]:
+            cube.remove(tx)
+        cube.replace(self.transactions[300], self.transactions[0])
+        expected = [self.transactions[0], *self.transactions[301:]]
+        self.assertEqual(cube.snapshot(), ReportCube(expected).snapshot())
+
+    def test_sub_cent_amounts_fall_back_to_the_loop(self) -> None:
+        odd = Transaction(date=date(2021, 2, 1), category="Fuel", memo="", amount=Decimal("-1.005"))
+        cube = ReportCube([*self.transactions, odd])
+        self.assertEqual(cube.snapshot(), ReportCube([odd, *self.transactions]).snapshot())
+
+
+class TestReportCubePurePython(ReportCubeMixin, unittest.TestCase):
+    def setUp(self) -> None:
+        patcher = mock.patch.object(reports, "_pd", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        super().setUp()
+
+
+@unittest.skipIf(reports._pd is None, "pandas is not installed")
+class TestReportCubePandas(ReportCubeMixin, unittest.TestCase):
+    pass
+
+
+class TestReportTable(unittest.TestCase):
+    def test_months_helpers(self) -> None:
+        self.assertEqual(shift_month("2024-01", -1), "2023-12")
+        self.assertEqual(shift_month("2023-11", 14), "2025-01")
+        self.assertEqual(month_window(date(2024, 3, 5), 36), ("2021-04", "2024-03"))
+
+    def test_table_fills_every_month_in_range(self) -> None:
+        def tx(day: str, category: str, amount: str) -> Transaction:
+            return Transaction(date=date.fromisoformat(day), category=category, memo="", amount=Decimal(amount))
+
+        cube = ReportCube([
+            tx("2024-01-03", "Food", "-10"),
+            tx("2024-03-09", "Food", "-5"),
+            tx("2024-03-10", "Rent", "-900"),
+            tx("2024-02-01", "Salary", "2000"),
+        ])
+        months, rows = cube.table("2023-12", "2024-03")
+        self.assertEqual(months, ["2023-12", "2024-01", "2024-02", "2024-03"])
+        self.assertEqual(rows, [
+            ("Food", [None, Decimal("-10"), None, Decimal("-5")], Decimal("-15")),
+            ("Rent", [None, None, None, Decimal("-900")], Decimal("-900")),
+            ("Salary", [None, None, Decimal("0"), None], Decimal("0")),
+        ])
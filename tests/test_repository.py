@@ -2,9 +2,11 @@ import json
 import tempfile
 import unittest
 from pathlib import Path
+from unittest import mock
 
 from budget_app.models.transaction import Transaction
-from budget_app.storage.repository import TransactionRepository
+from budget_app.storage.locking import LedgerConflictError
+from budget_app.storage.repository import LoadReport, TransactionRepository
 
 class TestTransactionRepository(unittest.TestCase):
   def test_round_trip(self) -> None:
@@ -40,4 +42,67 @@ class TestTransactionRepository(unittest.TestCase):
       path.write_text(json.dumps([{"date": "bad"}]), encoding="utf-8")
 
       repo = TransactionRepository(path)
-      self.assertEqual(repo.load(), [])
\ No newline at end of file
+      self.assertEqual(repo.load(), [])
+  def test_iter_batches_streams_and_reports_skipped(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.json"
+      records = [
+        {"date": f"2024-01-{day:02d}", "category": "Food", "memo": "", "amount": "-1.00"}
+        for day in range(1, 26)
+      ]
+      records[3] = {"date": "bad"}
+      records[10] = "not a record"
+      path.write_text(json.dumps(records, indent=2), encoding="utf-8")
+
+      repo = TransactionRepository(path)
+      report = LoadReport()
+      batches = list(repo.iter_batches(batch_size=10, report=report))
+
+      self.assertEqual([len(batch) for batch in batches], [10, 10, 3])
+      self.assertEqual((report.loaded, report.skipped, report.error), (23, 2, None))
+      self.assertEqual(len(repo.load()), 23)
+      self.assertEqual(repo.last_report.skipped, 2)
+
+  def test_iter_batches_reports_malformed_file(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.json"
+      path.write_text('[{"date": "2024-01-01", "category": "Food", "amount": "1"}, {"date"', encoding="utf-8")
+
+      report = LoadReport()
+      batches = list(TransactionRepository(path).iter_batches(report=report))
+
+      self.assertEqual(sum(len(batch) for batch in batches), 1)
+      self.assertIsNotNone(report.error)
+
+  def test_save_replaces_file_atomically(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.json"
+      path.write_text("[]", encoding="utf-8")
+      repo = TransactionRepository(path)
+      with mock.patch("json.dumps", side_effect=ValueError("boom")):
+        with self.assertRaises(ValueError):
+          repo.save([])
+      self.assertEqual(path.read_text(encoding="utf-8"), "[]")
+      self.assertEqual(sorted(p.name for p in Path(tmpdir).iterdir()), ["transactions.json", "transactions.lock"])
+
+  def test_save_refuses_to_overwrite_newer_file(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      path = Path(tmpdir) / "transactions.json"
+      first, second = TransactionRepository(path), TransactionRepository(path)
+      first.load()
+      second.load()
+      tx = Transaction.from_input(
+        raw_date="2024-05-01",
+        raw_category="Food",
+        raw_memo="",
+        raw_amount="5.00",
+        raw_kind="expense",
+      )
+      second.save([tx])
+
+      with self.assertRaises(LedgerConflictError):
+        first.save([])
+      self.assertEqual(first.load(), [tx])
+      first.save([])
+      self.assertEqual(second.load(), [])
+
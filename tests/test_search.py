@@ -0,0 +1,123 @@
+import random
+import unittest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from budget_app.models.ledger import Ledger
+from budget_app.models.search import SearchQuery, parse_query, tokenize
+from budget_app.models.transaction import Transaction
+
+MEMOS = ("Coffee at Blue Bottle", "Grocery run", "Paycheck", "Rent for May", "Gas station", "Bottle deposit refund")
+CATEGORIES = ("Food", "Groceries", "Salary", "Rent", "Fuel")
+
+
+def make_tx(memo: str, category: str, amount: str, day: date = date(2024, 5, 1)) -> Transaction:
+    return Transaction(date=day, category=category, memo=memo, amount=Decimal(amount))
+
+
+def matches(tx: Transaction, query: SearchQuery) -> bool:
+    words = tokenize(tx.memo) + tokenize(tx.category)
+    for term in query.terms:
+        if len(term) < 3:
+            if not any(word.startswith(term) for word in words):
+                return False
+        elif not any(term in word for word in words):
+            return False
+    if query.start is not None and tx.date < query.start:
+        return False
+    if query.end is not None and tx.date > query.end:
+        return False
+    if query.min_amount is not None and abs(tx.amount) < query.min_amount:
+        return False
+    if query.max_amount is not None and abs(tx.amount) > query.max_amount:
+        return False
+    return True
+
+
+class TestParseQuery(unittest.TestCase):
+    def test_terms_and_filters(self) -> None:
+        query = parse_query("Coffee from:2024-01-01 to:2024-03-31 min:$5 max:-20.50 coffee")
+        self.assertEqual(query.terms, ("coffee",))
+        self.assertEqual(query.start, date(2024, 1, 1))
+        self.assertEqual(query.end, date(2024, 3, 31))
+        self.assertEqual(query.min_amount, Decimal("5"))
+        self.assertEqual(query.max_amount, Decimal("20.50"))
+
+    def test_bad_filter_is_searched_as_text(self) -> None:
+        query = parse_query("from:yesterday")
+        self.assertEqual(query.terms, ("from", "yesterday"))
+        self.assertTrue(parse_query("   ").is_empty)
+
+
+class TestLedgerSearch(unittest.TestCase):
+    def test_substring_and_prefix_terms(self) -> None:
+        ledger = Ledger(
+            [
+                make_tx("Coffee at Blue Bottle", "Food", "-4.50"),
+                make_tx("Grocery run", "Groceries", "-82.10"),
+                make_tx("Bottle deposit refund", "Food", "0.40"),
+            ],
+            search_index=True,
+        )
+        self.assertEqual(ledger.search(parse_query("bottle")), [0, 2])
+        self.assertEqual(ledger.search(parse_query("ocer")), [1])
+        self.assertEqual(ledger.search(parse_query("bo food")), [0, 2])
+        self.assertEqual(ledger.search(parse_query("ttl")), [0, 2])
+        self.assertEqual(ledger.search(parse_query("tt")), [])
+        self.assertEqual(ledger.search(parse_query("bottle min:1")), [0])
+        self.assertEqual(ledger.search(parse_query("")), [0, 1, 2])
+
+    def test_index_follows_mutations(self) -> None:
+        ledger = Ledger([make_tx("Coffee", "Food", "-3.00")], search_index=True)
+        tx_id = ledger.add(make_tx("Lunch", "Food", "-12.00"))
+        self.assertEqual(ledger.search(parse_query("lunch")), [tx_id])
+
+        ledger.update(tx_id, make_tx("Dinner", "Food", "-30.00"))
+        self.assertEqual(ledger.search(parse_query("lunch")), [])
+        self.assertEqual(ledger.search(parse_query("min:20")), [tx_id])
+
+        removed = ledger.remove(tx_id)
+        self.assertEqual(ledger.search(parse_query("dinner")), [])
+        ledger.restore(tx_id, removed)
+        self.assertEqual(ledger.search(parse_query("dinner")), [tx_id])
+
+    def test_matches_brute_force(self) -> None:
+        rng = random.Random(7)
+        start = date(2023, 1, 1)
+        transactions = [
+            make_tx(
+                rng.choice(MEMOS),
+                rng.choice(CATEGORIES),
+                f"{rng.randint(-50000, 50000) / 100:.2f}",
+                start + timedelta(days=rng.randrange(730)),
+            )
+            for _ in range(600)
+        ]
+        ledger = Ledger(transactions, search_index=True)
+        # Large enough to take the bulk path of remove_many.
+        ledger.remove_many(range(0, 600, 3))
+
+        queries = (
+            "bottle",
+            "gro",
+            "ent",
+            "food min:100",
+            "max:0.99",
+            "from:2023-06-01 to:2023-12-31 pay",
+            "min:20.005 max:40",
+            "station fuel from:2024-01-01",
+            "nothing-like-this",
+        )
+        for text in queries:
+            query = parse_query(text)
+            with self.subTest(query=text):
+                expected = [tx_id for tx_id in range(600) if tx_id in ledger and matches(ledger.get(tx_id), query)]
+                self.assertEqual(ledger.search(query), expected)
+
+    def test_requires_index(self) -> None:
+        with self.assertRaises(RuntimeError):
+            Ledger().search(parse_query("coffee"))
+
+
+if __name__ == "__main__":
+    unittest.main()
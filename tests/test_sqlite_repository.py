@@ -0,0 +1,110 @@
+import io
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from budget_app import cli
+from budget_app.controllers.budget_controller import BudgetController
+from budget_app.models.transaction import Transaction
+from budget_app.storage.sqlite_repository import SQLiteTransactionRepository
+
+def make_tx(raw_date: str, category: str, amount: str, kind: str = "expense") -> Transaction:
+  return Transaction.from_input(
+    raw_date=raw_date,
+    raw_category=category,
+    raw_memo="",
+    raw_amount=amount,
+    raw_kind=kind,
+  )
+
+class TestSQLiteTransactionRepository(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.repo = SQLiteTransactionRepository(Path(self._tmpdir.name) / "ledger.sqlite3")
+
+  def tearDown(self) -> None:
+    self.repo.close()
+    self._tmpdir.cleanup()
+
+  def test_round_trip(self) -> None:
+    original = [
+      make_tx("2024-05-01", "Salary", "3500.00", "income"),
+      make_tx("2024-05-02", "Rent", "1200.00"),
+    ]
+    self.repo.save(original)
+    self.assertEqual(self.repo.load(), original)
+
+  def test_row_level_changes(self) -> None:
+    row_id = self.repo.insert(make_tx("2024-05-02", "Rent", "1200.00"))
+    self.repo.update(row_id, make_tx("2024-05-02", "Rent", "1250.00"))
+    self.assertEqual(self.repo.get(row_id).amount, Decimal("-1250.00"))
+
+    self.repo.delete(row_id)
+    self.assertEqual(self.repo.count(), 0)
+    with self.assertRaises(KeyError):
+      self.repo.delete(row_id)
+
+  def test_filtered_pages_and_totals(self) -> None:
+    self.repo.insert_many(
+      [
+        make_tx("2024-01-15", "Food", "10.00"),
+        make_tx("2024-02-15", "Food", "20.00"),
+        make_tx("2024-02-20", "Salary", "100.00", "income"),
+        make_tx("2024-03-15", "Food", "30.00"),
+      ]
+    )
+    rows = self.repo.query(start=date(2024, 2, 1), category="Food")
+    self.assertEqual([tx.amount for _, tx in rows], [Decimal("-20.00"), Decimal("-30.00")])
+
+    page = self.repo.query(limit=2, offset=1)
+    self.assertEqual([tx.date for _, tx in page], [date(2024, 2, 15), date(2024, 2, 20)])
+
+    self.assertEqual(self.repo.totals(end=date(2024, 2, 29)), (Decimal("100.00"), Decimal("-30.00")))
+    self.assertEqual(self.repo.count(category="Food"), 3)
+
+  def test_rejects_sub_cent_amounts(self) -> None:
+    with self.assertRaises(ValueError):
+      self.repo.insert(make_tx("2024-05-02", "Fuel", "1.239"))
+
+  def test_controller_pages_through_repository(self) -> None:
+    self.repo.insert_many([make_tx(f"2024-01-{day:02d}", "Food", "1.00") for day in range(1, 11)])
+    controller = BudgetController(self.repo)
+
+    page = controller.get_transactions_page(offset=8, limit=5)
+    self.assertEqual([tx.date.day for tx in page], [9, 10])
+    self.assertEqual(controller.count_transactions(category="Food"), 10)
+    self.assertEqual([tx.date.day for tx in controller.get_transactions()], list(range(1, 11)))
+
+  def test_controller_writes_through_repository(self) -> None:
+    controller = BudgetController(self.repo)
+    salary = make_tx("2024-02-01", "Salary", "1.00", "income")
+    tx_id = controller.add_transaction(salary)
+    self.assertEqual(controller.get_transactions_page(), [salary])
+    self.assertEqual(controller.count_transactions(), 1)
+    self.assertEqual(controller.calculate_total(), Decimal("1.00"))
+
+    rent = make_tx("2024-02-02", "Rent", "5.00")
+    self.assertEqual(controller.update_transaction(tx_id, rent), salary)
+    self.assertEqual(controller.get_transaction(tx_id), rent)
+    self.assertEqual(controller.count_transactions(category="Rent"), 1)
+    self.assertEqual(controller.calculate_total(), Decimal("-5.00"))
+
+    self.assertEqual(controller.remove_transaction(tx_id), rent)
+    self.assertIsNone(controller.remove_transaction(tx_id))
+    self.assertIsNone(controller.update_transaction(tx_id, rent))
+    self.assertEqual(controller.count_transactions(), 0)
+    self.assertEqual(controller.calculate_total(), Decimal("0.00"))
+
+  def test_cli_reads_sqlite_ledgers(self) -> None:
+    self.repo.insert_many([make_tx("2024-01-02", "Salary", "300.00", "income"), make_tx("2024-02-03", "Food", "40.00")])
+    data = ["--data", str(Path(self._tmpdir.name) / "ledger.sqlite3")]
+    output = Path(self._tmpdir.name) / "food.csv"
+    stdout = io.StringIO()
+    with redirect_stdout(stdout):
+      self.assertEqual(cli.main([*data, "export", str(output), "--category", "Food"]), 0)
+      self.assertEqual(cli.main([*data, "forecast", "--from", "2024-02-01", "--days", "3"]), 0)
+    self.assertEqual(output.read_text(encoding="utf-8").splitlines()[1:], ["2024-02-03,Food,,-40.00"])
+    self.assertIn("Lowest: 300.00 on 2024-02-01", stdout.getvalue())
@@ -0,0 +1,54 @@
+import importlib.util
+import io
+import os
+import subprocess
+import sys
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from budget_app.utils.startup import StartupProfile
+
+SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+class TestStartupProfile(unittest.TestCase):
+    def test_phases_split_elapsed_time(self) -> None:
+        with mock.patch("budget_app.utils.startup.time.perf_counter", side_effect=[1.0, 1.25, 1.5, 2.5]):
+            profile = StartupProfile()
+            profile.mark("import gui")
+            profile.mark("build window")
+            profile.mark("ledger loaded")
+
+        self.assertEqual(
+            profile.phases(),
+            [("import gui", 0.25, 0.25), ("build window", 0.25, 0.5), ("ledger loaded", 1.0, 1.5)],
+        )
+        stream = io.StringIO()
+        profile.report(stream)
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(len(lines), 4)
+        self.assertTrue(lines[-1].startswith("ledger loaded"))
+        self.assertTrue(lines[-1].endswith("1500.0"))
+
+    @unittest.skipUnless(importlib.util.find_spec("tkinter"), "tkinter is not available")
+    def test_gui_defers_optional_modules(self) -> None:
+        deferred = (
+            "numpy",
+            "pandas",
+            "budget_app.models.reports",
+            "budget_app.storage.importer",
+            "budget_app.storage.exporter",
+            "budget_app.views.reports_view",
+        )
+        code = (
+            "import sys, budget_app.gui; "
+            f"print(','.join(name for name in {deferred!r} if name in sys.modules))"
+        )
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [str(SRC), os.environ.get("PYTHONPATH")])))
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, env=env, check=True)
+        self.assertEqual(result.stdout.strip(), "")
+
+
+if __name__ == "__main__":
+    unittest.main()
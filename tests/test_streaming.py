@@ -0,0 +1,24 @@
+import io
+import json
+import unittest
+
+from budget_app.storage.streaming import iter_json_array
+
+class TestIterJsonArray(unittest.TestCase):
+  def test_items_split_across_chunks(self) -> None:
+    items = [{"n": index, "text": "x" * (index % 7)} for index in range(50)] + [12345, "tail"]
+    handle = io.StringIO(json.dumps(items, indent=2))
+    self.assertEqual(list(iter_json_array(handle, chunk_size=5)), items)
+
+  def test_member_array_and_other_members(self) -> None:
+    document = {"format": "x", "seq": 42, "transactions": [1, 2, 3], "after": True}
+    members = {}
+    handle = io.StringIO(json.dumps(document))
+    items = list(iter_json_array(handle, member="transactions", on_member=members.__setitem__, chunk_size=3))
+    self.assertEqual(items, [1, 2, 3])
+    self.assertEqual(members, {"format": "x", "seq": 42, "after": True})
+
+  def test_malformed_input_raises(self) -> None:
+    for text in ('{"a": 1}', "[1, 2", "[1 2]", "[1] x", ""):
+      with self.subTest(text=text), self.assertRaises(ValueError):
+        list(iter_json_array(io.StringIO(text)))
@@ -0,0 +1,72 @@
+import unittest
+from decimal import Decimal
+
+from budget_app.controllers.budget_controller import BudgetController
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+
+
+def make_tx(raw_date: str, category: str, amount: str, kind: str) -> Transaction:
+    return Transaction.from_input(
+        raw_date=raw_date,
+        raw_category=category,
+        raw_memo="",
+        raw_amount=amount,
+        raw_kind=kind,
+    )
+
+
+class TestSummaryAggregates(unittest.TestCase):
+    def setUp(self) -> None:
+        self.salary = make_tx("2024-05-01", "Salary", "3500.00", "income")
+        self.rent = make_tx("2024-05-02", "Rent", "1200.00", "expense")
+        self.food = make_tx("2024-06-03", "Food", "45.10", "expense")
+
+    def test_initial_totals(self) -> None:
+        summary = SummaryAggregates([self.salary, self.rent, self.food])
+        self.assertEqual(summary.income, Decimal("3500.00"))
+        self.assertEqual(summary.expenses, Decimal("-1245.10"))
+        self.assertEqual(summary.balance, Decimal("2254.90"))
+        self.assertEqual(summary.count, 3)
+        self.assertEqual(summary.by_month["2024-05"].balance, Decimal("2300.00"))
+        self.assertEqual(summary.by_category["Food"].expenses, Decimal("-45.10"))
+
+    def test_deltas_match_full_recompute(self) -> None:
+        transactions = [self.salary, self.rent, self.food]
+        summary = SummaryAggregates(transactions)
+
+        cheaper_rent = make_tx("2024-05-02", "Rent", "1100.00", "expense")
+        summary.replace(self.rent, cheaper_rent)
+        transactions[1] = cheaper_rent
+        summary.remove(self.food)
+        transactions.pop()
+        summary.verify(transactions)
+
+        self.assertNotIn("Food", summary.by_category)
+        self.assertNotIn("2024-06", summary.by_month)
+        self.assertEqual(summary.balance, Decimal("2400.00"))
+
+    def test_roll_ups_are_kept_by_delta(self) -> None:
+        summary = SummaryAggregates([self.salary, self.rent])
+        by_category, by_month = summary.by_category, summary.by_month
+        summary.add(self.food)
+        self.assertIs(summary.by_category, by_category)
+        self.assertEqual(by_month["2024-06"].expenses, Decimal("-45.10"))
+        self.assertEqual(by_category["Food"].count, 1)
+
+        restored = SummaryAggregates.from_cells(summary.cells)
+        restored.verify([self.salary, self.rent, self.food])
+        self.assertEqual(restored.by_month["2024-05"].balance, Decimal("2300.00"))
+
+    def test_verify_detects_drift(self) -> None:
+        summary = SummaryAggregates([self.salary])
+        with self.assertRaises(AssertionError):
+            summary.verify([self.salary, self.rent])
+
+    def test_controller_total_tracks_mutations(self) -> None:
+        controller = BudgetController()
+        salary_id = controller.add_transaction(self.salary)
+        rent_id = controller.add_transaction(self.rent)
+        controller.update_transaction(rent_id, self.food)
+        controller.remove_transaction(salary_id)
+        self.assertEqual(controller.calculate_total(), Decimal("-45.10"))
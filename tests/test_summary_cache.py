@@ -0,0 +1,94 @@
+import json
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from pathlib import Path
+
+from budget_app.models.reports import ReportCube
+from budget_app.models.summary import SummaryAggregates
+from budget_app.models.transaction import Transaction
+from budget_app.storage.journal import JournalRepository
+from budget_app.storage.repository import TransactionRepository
+
+def make_tx(day: int, category: str, amount: str, kind: str = "expense") -> Transaction:
+  return Transaction.from_input(
+    raw_date=f"2024-05-{day:02d}",
+    raw_category=category,
+    raw_memo="",
+    raw_amount=amount,
+    raw_kind=kind,
+  )
+
+class TestSummaryCache(unittest.TestCase):
+  def setUp(self) -> None:
+    self._tmpdir = tempfile.TemporaryDirectory()
+    self.path = Path(self._tmpdir.name) / "transactions.json"
+    self.sidecar = Path(self._tmpdir.name) / "transactions.summary.json"
+    self.transactions = [
+      make_tx(1, "Salary", "3500.00", "income"),
+      make_tx(2, "Rent", "1200.00"),
+      make_tx(3, "Food", "45.10"),
+    ]
+
+  def tearDown(self) -> None:
+    self._tmpdir.cleanup()
+
+  def test_save_writes_matching_sidecar(self) -> None:
+    TransactionRepository(self.path).save(self.transactions)
+    self.assertTrue(self.sidecar.exists())
+
+    cached = TransactionRepository(self.path).cached_summary()
+    self.assertIsNotNone(cached)
+    cached.verify(self.transactions)
+    self.assertEqual(cached.balance, Decimal("2254.90"))
+    self.assertEqual(cached.by_month["2024-05"].count, 3)
+
+  def test_changed_ledger_invalidates_sidecar(self) -> None:
+    TransactionRepository(self.path).save(self.transactions)
+    stat = self.path.stat()
+    # Same size and mtime, different content: only the hash can tell.
+    self.path.write_text(self.path.read_text().replace("1200.00", "1300.00"))
+    os.utime(self.path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    self.assertIsNone(TransactionRepository(self.path).cached_summary())
+
+    self.path.unlink()
+    self.assertIsNone(TransactionRepository(self.path).cached_summary())
+
+  def test_unreadable_sidecar_is_ignored(self) -> None:
+    repo = TransactionRepository(self.path)
+    repo.save(self.transactions)
+    payload = json.loads(self.sidecar.read_text())
+    payload["cells"][0][2] = "not a number"
+    self.sidecar.write_text(json.dumps(payload))
+    self.assertIsNone(repo.cached_summary())
+    self.sidecar.write_text("{")
+    self.assertIsNone(repo.cached_summary())
+
+  def test_journal_summary_covers_every_file(self) -> None:
+    repo = JournalRepository(self.path)
+    repo.load()
+    repo.add_many(self.transactions)
+    repo.save_summary(SummaryAggregates(self.transactions))
+    repo.close()
+
+    reopened = JournalRepository(self.path)
+    cached = reopened.cached_summary()
+    self.assertIsNotNone(cached)
+    cached.verify(reopened.load())
+
+    reopened.delete([2])
+    self.assertIsNone(reopened.cached_summary())
+    reopened.close()
+
+  def test_cells_seed_report_cube(self) -> None:
+    summary = SummaryAggregates(self.transactions)
+    restored = SummaryAggregates.from_cells(summary.cells)
+    restored.verify(self.transactions)
+
+    cube = ReportCube([make_tx(9, "Stale", "1.00")])
+    cube.restore(summary.cells)
+    self.assertEqual(cube.snapshot(), ReportCube(self.transactions).snapshot())
+
+if __name__ == "__main__":
+  unittest.main()
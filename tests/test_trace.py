@@ -0,0 +1,94 @@
+import json
+import pstats
+import tempfile
+import unittest
+from datetime import date
+from decimal import Decimal
+from pathlib import Path
+
+from budget_app import cli
+from budget_app.models.transaction import Transaction
+from budget_app.storage.repository import TransactionRepository
+from budget_app.utils import trace
+
+
+class TestTrace(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.dir = Path(self._tmpdir.name)
+        self.transactions = [
+            Transaction(date=date(2024, 5, day), category="Food", memo="", amount=Decimal("-4.50"))
+            for day in range(1, 11)
+        ]
+
+    def tearDown(self) -> None:
+        previous = trace.install(None)
+        if previous is not None:
+            previous.close()
+        self._tmpdir.cleanup()
+
+    def test_disabled_tracing_is_inert(self) -> None:
+        self.assertIsNone(trace.active())
+        with trace.span("anything", rows=1) as span:
+            span.set(bytes=2)
+        trace.count("anything")
+        self.assertIs(trace.span("other"), trace.action("other"))
+
+    def test_json_lines_record_repository_io(self) -> None:
+        path = self.dir / "trace.jsonl"
+        tracer = trace.Tracer(path)
+        trace.install(tracer)
+        repository = TransactionRepository(self.dir / "transactions.json")
+        repository.save(self.transactions)
+        repository.load()
+        tracer.close()
+
+        events = [json.loads(line) for line in path.read_text(encoding="utf-8").splitlines()]
+        spans = {event["name"]: event for event in events if event["type"] == "span"}
+        size = (self.dir / "transactions.json").stat().st_size
+        self.assertEqual(spans["repository.save"]["rows"], 10)
+        self.assertEqual(spans["repository.save"]["bytes"], size)
+        self.assertEqual(spans["repository.load"]["rows"], 10)
+        self.assertGreaterEqual(spans["repository.load"]["ms"], 0)
+        self.assertEqual(tracer.counters["repository.bytes_written"], size)
+
+    def test_chrome_trace_and_action_profiles(self) -> None:
+        path = self.dir / "trace.json"
+        tracer = trace.Tracer(path, profile_actions=["gui.add"])
+        trace.install(tracer)
+        with trace.action("gui.add"):
+            with trace.action("gui.add"):
+                sum(range(1000))
+        with trace.action("gui.delete"):
+            pass
+        trace.count("tree.rows_filled", 3)
+        tracer.close()
+
+        events = json.loads(path.read_text(encoding="utf-8"))
+        self.assertEqual([event["ph"] for event in events], ["X", "X", "X", "C"])
+        # The nested action is part of the outer capture, not a second one.
+        profiles = sorted(self.dir.glob("*.prof"))
+        self.assertEqual([profile.name for profile in profiles], ["gui.add.1.prof"])
+        self.assertEqual(events[1]["args"]["profile"], str(profiles[0]))
+        pstats.Stats(str(profiles[0]))
+
+    def test_environment_and_cli_flag(self) -> None:
+        self.assertIsNone(trace.from_environment({}))
+        tracer = trace.from_environment({trace.TRACE_ENV: str(self.dir / "env.jsonl")})
+        self.assertEqual(tracer.path, self.dir / "env.jsonl")
+        self.assertFalse(tracer.chrome)
+        tracer.close()
+
+        data = self.dir / "transactions.json"
+        TransactionRepository(data).save(self.transactions)
+        output = self.dir / "transactions.ledger"
+        status = cli.main(["--data", str(data), "--trace", str(self.dir / "cli.jsonl"), "convert", str(data), str(output)])
+        self.assertEqual(status, 0)
+        names = [json.loads(line)["name"] for line in (self.dir / "cli.jsonl").read_text(encoding="utf-8").splitlines()]
+        self.assertIn("repository.load", names)
+        self.assertEqual(names[-1], "cli.convert")
+        self.assertIsNone(trace.active())
+
+
+if __name__ == "__main__":
+    unittest.main()
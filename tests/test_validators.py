@@ -0,0 +1,98 @@
+import unittest
+from datetime import date
+from decimal import Decimal
+
+from budget_app.models.transaction import Transaction
+from budget_app.utils.validators import (
+    FORM_VALIDATOR,
+    FieldError,
+    RowError,
+    TransactionValidator,
+    validate_transaction,
+)
+
+
+class TestTransactionValidator(unittest.TestCase):
+    def test_batch_matches_from_input_row_by_row(self) -> None:
+        rows = [
+            ("2024-05-01", "Food", " lunch ", "12.50", "Expense"),
+            ("2024-05-01", "Food", "", "12.50", "income"),
+            ("2024-05-02", "  ", "", "1", "expense"),
+            ("2024-05-02", "Rent", "", "1", "transfer"),
+            ("05/02/2024", "Rent", "", "1", "expense"),
+            ("2024-05-03", "Rent", "", "NaN", "expense"),
+            ("2024-05-03", "Rent", "", "-900", "expense"),
+        ]
+        report = FORM_VALIDATOR.validate(*(list(column) for column in zip(*rows)))
+
+        expected = []
+        for row, (raw_date, category, memo, amount, kind) in enumerate(rows):
+            try:
+                tx = Transaction.from_input(
+                    raw_date=raw_date, raw_category=category, raw_memo=memo, raw_amount=amount, raw_kind=kind
+                )
+            except ValueError as exc:
+                expected.append(str(exc))
+            else:
+                expected.append(tx)
+        self.assertEqual(report.transactions, [value for value in expected if isinstance(value, Transaction)])
+        self.assertEqual(report.rows, [0, 1, 6])
+        self.assertEqual(
+            report.errors,
+            [
+                RowError(2, "category", "Category cannot be empty."),
+                RowError(3, "kind", "Select Income or Expense."),
+                RowError(4, "date", "Use YYYY-MM-DD format."),
+                RowError(5, "amount", "Enter a valid numeric amount."),
+            ],
+        )
+        self.assertEqual([error.message for error in report.errors], [v for v in expected if isinstance(v, str)])
+        self.assertEqual(report.transactions[0].amount, Decimal("-12.50"))
+        self.assertEqual(report.transactions[2].amount, Decimal("-900"))
+
+    def test_missing_kinds_use_the_sign_and_options_apply(self) -> None:
+        validator = TransactionValidator(
+            kinds={"credit": "income", "debit": "expense"},
+            infer_unknown_kinds=True,
+            thousands_separator=",",
+            categories={"Food", "Salary"},
+        )
+        report = validator.validate(
+            ["2024-01-01", "2024-01-02", "2024-01-03", "2024-01-04"],
+            ["Salary", "Food", "Food", "Fuel"],
+            ["", "", "", ""],
+            ["1,200.00", "-4.20", "9", "1"],
+            ["credit", None, "POS", "debit"],
+        )
+        self.assertEqual([tx.amount for tx in report.transactions], [Decimal("1200.00"), Decimal("-4.20"), Decimal("9")])
+        self.assertEqual(report.transactions[0].date, date(2024, 1, 1))
+        self.assertEqual(report.errors, [RowError(3, "category", "Unknown category 'Fuel'.")])
+        self.assertFalse(report.ok)
+
+    def test_thousands_separators_only_group_digits(self) -> None:
+        validator = TransactionValidator(thousands_separator=",", infer_unknown_kinds=True)
+        amounts = ["12,50", "1,234,567.89", "-1,000", "1,2345", ",100", "1000,", "1,234"]
+        report = validator.validate(["2024-01-01"] * 7, ["Food"] * 7, [""] * 7, amounts, [None] * 7)
+        self.assertEqual(
+            [tx.amount for tx in report.transactions],
+            [Decimal("1234567.89"), Decimal("-1000"), Decimal("1234")],
+        )
+        self.assertEqual([error.row for error in report.errors], [0, 3, 4, 5])
+        self.assertEqual({error.field for error in report.errors}, {"amount"})
+
+    def test_single_rows_and_mismatched_columns(self) -> None:
+        with self.assertRaises(FieldError) as caught:
+            FORM_VALIDATOR.fields(raw_date="2024-01-01", raw_category="Food", raw_memo="", raw_amount="x", raw_kind="income")
+        self.assertEqual(caught.exception.field, "amount")
+        with self.assertRaises(ValueError):
+            FORM_VALIDATOR.validate(["2024-01-01"], [], [], [])
+
+    def test_legacy_helpers(self) -> None:
+        self.assertEqual(validate_transaction("12", "2024-01-01", "Food", ["Food"]), (True, "Transaction is valid."))
+        self.assertFalse(validate_transaction("-3", "2024-01-01", "Food", ["Food"])[0])
+        self.assertFalse(validate_transaction("inf", "2024-01-01", "Food", ["Food"])[0])
+        self.assertFalse(validate_transaction("3", "01/01/2024", "Food", ["Food"])[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
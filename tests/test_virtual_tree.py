@@ -0,0 +1,143 @@
+import unittest
+
+from budget_app.views.virtual_tree import VirtualTreeview
+
+
+class FakeTreeview:
+    def __init__(self) -> None:
+        self.children: list[str] = []
+        self.items: dict[str, dict] = {}
+        self.selected: list[str] = []
+        self.calls = 0
+        self._next = 0
+
+    def configure(self, **_options) -> None:
+        pass
+
+    def bind(self, *_args, **_kwargs) -> None:
+        pass
+
+    def insert(self, _parent, index, **options) -> str:
+        self.calls += 1
+        iid = f"I{self._next}"
+        self._next += 1
+        position = len(self.children) if index == "end" else index
+        self.children.insert(position, iid)
+        self.items[iid] = {"text": "", "values": (), "tags": ()}
+        self.items[iid].update(options)
+        return iid
+
+    def item(self, iid, option=None, **options):
+        self.calls += 1
+        if option is not None:
+            return self.items[iid][option]
+        self.items[iid].update(options)
+        return None
+
+    def delete(self, *iids) -> None:
+        self.calls += 1
+        for iid in iids:
+            self.children.remove(iid)
+            del self.items[iid]
+            if iid in self.selected:
+                self.selected.remove(iid)
+
+    def move(self, iid, _parent, index) -> None:
+        self.calls += 1
+        self.children.remove(iid)
+        self.children.insert(len(self.children) if index == "end" else index, iid)
+
+    def selection(self) -> tuple[str, ...]:
+        return tuple(self.selected)
+
+    def selection_set(self, items) -> None:
+        self.selected = list(items)
+
+    def yview_moveto(self, _fraction) -> None:
+        pass
+
+
+class FakeScrollbar:
+    def configure(self, **_options) -> None:
+        pass
+
+    def set(self, first, last) -> None:
+        self.position = (first, last)
+
+
+class TestVirtualTreeview(unittest.TestCase):
+    def setUp(self) -> None:
+        self.rows = [f"row {index}" for index in range(100)]
+        self.tree = FakeTreeview()
+        self.view = VirtualTreeview(
+            self.tree,
+            FakeScrollbar(),
+            row_count=lambda: len(self.rows),
+            row_key=str,
+            row_values=lambda index: (self.rows[index],),
+            visible_rows=10,
+            buffer=5,
+        )
+        self.view.reset()
+
+    def assert_window_consistent(self) -> None:
+        offset = self.view.offset
+        expected = min(15, len(self.rows) - offset)
+        self.assertEqual(len(self.tree.children), expected)
+        for position, iid in enumerate(self.tree.children):
+            row = offset + position
+            self.assertEqual(self.tree.items[iid]["text"], str(row))
+            self.assertEqual(self.tree.items[iid]["values"], (self.rows[row],))
+
+    def test_only_window_is_materialized(self) -> None:
+        self.assertEqual(self.view.materialized, 15)
+        self.assert_window_consistent()
+
+    def test_scrolling_recycles_items(self) -> None:
+        self.view._on_scrollbar("scroll", "3", "units")
+        self.assert_window_consistent()
+        self.view._on_scrollbar("moveto", "0.5")
+        self.assert_window_consistent()
+        self.view._on_scrollbar("scroll", "-2", "units")
+        self.assert_window_consistent()
+        self.view._on_scrollbar("moveto", "1.0")
+        self.assertEqual(self.view.offset, 90)
+        self.assert_window_consistent()
+
+    def test_single_row_changes_touch_few_items(self) -> None:
+        self.tree.calls = 0
+        self.rows[3] = "edited"
+        self.view.row_updated(3)
+        self.assertEqual(self.tree.calls, 1)
+
+        self.rows.append("appended")
+        self.view.row_inserted(len(self.rows) - 1)
+        self.assert_window_consistent()
+
+    def test_delete_keeps_index_text_in_sync(self) -> None:
+        self.view._on_scrollbar("moveto", "0.2")
+        offset = self.view.offset
+        for row in (offset + 12, offset + 4, offset - 3):
+            del self.rows[row]
+        self.view.rows_deleted([offset + 12, offset + 4, offset - 3])
+        self.assertEqual(self.view.offset, offset - 1)
+        self.assert_window_consistent()
+
+    def test_delete_at_bottom_reveals_rows_above(self) -> None:
+        self.view._on_scrollbar("moveto", "1.0")
+        del self.rows[95:]
+        self.view.rows_deleted(range(95, 100))
+        self.assertEqual(self.view.offset, 85)
+        self.assert_window_consistent()
+
+    def test_selection_follows_rows(self) -> None:
+        self.tree.selection_set([self.tree.children[6]])
+        self.assertEqual(self.view.selected_rows(), [6])
+
+        del self.rows[2]
+        self.view.row_deleted(2)
+        self.assertEqual(self.view.selected_rows(), [5])
+
+        self.view._on_scrollbar("moveto", "0.5")
+        self.assertEqual(self.tree.selection(), ())
+        self.assertEqual(self.view.selected_rows(), [5])
@@ -0,0 +1,27 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from budget_app.storage.watcher import FileWatcher, file_stamp
+
+class TestFileWatcher(unittest.TestCase):
+  def test_poll_reports_appends_replacements_and_new_files(self) -> None:
+    with tempfile.TemporaryDirectory() as tmpdir:
+      journal = Path(tmpdir) / "transactions.journal"
+      segment = Path(tmpdir) / "transactions.journal.3"
+      journal.write_bytes(b"one\n")
+      changes = []
+      watcher = FileWatcher(lambda: sorted(Path(tmpdir).iterdir()), lambda: changes.append(1))
+
+      self.assertFalse(watcher.poll())
+      with open(journal, "ab") as handle:
+        handle.write(b"two\n")
+      self.assertTrue(watcher.poll())
+      journal.replace(segment)
+      self.assertTrue(watcher.poll())
+      self.assertIsNone(file_stamp(journal))
+      self.assertFalse(watcher.poll())
+      self.assertEqual(len(changes), 2)
+
+if __name__ == "__main__":
+  unittest.main()